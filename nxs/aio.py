@@ -0,0 +1,216 @@
+# This program is public domain
+
+"""
+Asynchronous access to NeXus files for asyncio applications.
+
+The NeXus library blocks the calling thread for the whole of a read, so
+the functions here run the library calls on a thread pool and return
+awaitables instead.  Calls on the same handle are queued one after the
+other, since a handle has a single open path, while calls on different
+handles run in parallel on the pool.
+
+Example
+=======
+.. code-block:: python
+
+  import nxs.aio
+
+  async def counts(filename, frame):
+      async with await nxs.aio.open(filename) as file:
+          return await file.getslab('/entry/data/counts', [frame,0,0],
+                                    [1,256,256])
+
+  async def total(filename):
+      async with await nxs.aio.open(filename) as file:
+          result = 0
+          async for offset,slab in file.iterslabs('/entry/data/counts'):
+              result += slab.sum()
+          return result
+
+Trees returned by :py:func:`read_tree` load large fields lazily; use
+:py:func:`getfield` to read them without blocking the event loop.
+
+The library calls themselves are serialized by the lock mode set with
+:py:func:`nxs.napi.setlockmode`.  Reads from different files only run
+at the same time in 'handle' or 'none' mode, which need a thread-safe
+build of libNeXus and HDF5.
+
+This module needs Python 3.6 or later, and is not installed with the
+package on older versions.
+"""
+
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from . import napi
+
+__all__ = ['AsyncNeXus', 'open', 'read_tree', 'getfield', 'setexecutor']
+
+# Number of threads in the default executor
+MAXWORKERS = 8
+
+_executor = None
+_locks = weakref.WeakKeyDictionary()
+
+def setexecutor(executor):
+    """
+    Use executor to run the library calls instead of the default pool
+    of MAXWORKERS threads.
+    """
+    global _executor
+    _executor = executor
+
+def _getexecutor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAXWORKERS)
+    return _executor
+
+def _lockfor(file):
+    """
+    Return the asyncio lock serializing calls on the file handle from the
+    running event loop.  An asyncio lock can only be used by one loop,
+    so each loop gets its own.
+    """
+    loop = asyncio.get_event_loop()
+    locks = _locks.get(file)
+    if locks is None:
+        locks = _locks[file] = weakref.WeakKeyDictionary()
+    lock = locks.get(loop)
+    if lock is None:
+        lock = locks[loop] = asyncio.Lock()
+    return lock
+
+async def _run(fn, *args, **kw):
+    """Run fn(*args,**kw) on the executor"""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(_getexecutor(),
+                                      functools.partial(fn, *args, **kw))
+
+
+class AsyncNeXus(object):
+    """
+    Awaitable interface to a NeXus file handle.
+
+    Each method opens the given path and reads from it as one call on
+    the executor, so concurrent requests on the same handle cannot move
+    each other's file cursor.  Use :py:func:`open` to create one.
+    """
+    def __init__(self, file):
+        self.file = file
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+    async def _call(self, fn, *args, **kw):
+        async with _lockfor(self.file):
+            return await _run(fn, *args, **kw)
+
+    def _getdata(self, path, out):
+        self.file.openpath(path)
+        return self.file.getdata(out)
+
+    async def getdata(self, path, out=None):
+        """
+        Return the data at path.  See NeXus.getdata.
+        """
+        return await self._call(self._getdata, path, out)
+
+    def _getslab(self, path, offset, shape, out):
+        self.file.openpath(path)
+        return self.file.getslab(offset, shape, out)
+
+    async def getslab(self, path, offset, shape, out=None):
+        """
+        Return a slab of the data at path.  See NeXus.getslab.
+        """
+        return await self._call(self._getslab, path, offset, shape, out)
+
+    def _getattrs(self, path):
+        self.file.openpath(path)
+        return self.file.getattrs()
+
+    async def getattrs(self, path):
+        """
+        Return the attributes of the group or data at path as a dictionary.
+        """
+        return await self._call(self._getattrs, path)
+
+    def _scandir(self, path, values):
+        self.file.openpath(path)
+        return list(self.file.scandir(values=values))
+
+    async def scandir(self, path, values=0):
+        """
+        Return the list of entries in the group at path.  See
+        NeXus.scandir.
+        """
+        return await self._call(self._scandir, path, values)
+
+    def _iterslabs(self, path, axis, rows, budget):
+        self.file.openpath(path)
+        return self.file.iterslabs(axis, rows, budget, prefetch=True)
+
+    async def iterslabs(self, path, axis=0, rows=None, budget=None):
+        """
+        Iterate over consecutive slabs of the data at path.
+
+        async for offset,data in file.iterslabs(path, rows=10):
+            process(offset,data)
+
+        The next slab is read in the background while the current one
+        is processed.  Other calls on the handle wait until the
+        iteration is finished.  See NeXus.iterslabs.
+        """
+        async with _lockfor(self.file):
+            slabs = await _run(self._iterslabs, path, axis, rows, budget)
+            try:
+                while True:
+                    item = await _run(next, slabs, None)
+                    if item is None:
+                        break
+                    yield item
+            finally:
+                await _run(slabs.close)
+
+    async def close(self):
+        """
+        Close the file.
+        """
+        await self._call(self.file.close)
+
+
+async def open(filename, mode='r'):
+    """
+    Open the NeXus file and return an AsyncNeXus for it.
+
+    Raises NeXusError if the file could not be opened.
+    """
+    file = await _run(napi.open, filename, mode)
+    return AsyncNeXus(file)
+
+async def read_tree(filename, mode='r'):
+    """
+    Read the structure of the NeXus file, returning the NXroot as
+    nxs.tree.load does.
+    """
+    from . import tree
+    return await _run(tree.load, filename, mode)
+
+async def getfield(field, offset=None, size=None):
+    """
+    Return the value of an NXfield from a tree, or the slab at offset
+    of the given size, reading it from the file if needed.
+    """
+    if not field.nxfile:
+        return field.nxdata if offset is None else field.get(offset, size)
+    async with _lockfor(field.nxfile):
+        if offset is None:
+            return await _run(lambda: field.nxdata)
+        else:
+            return await _run(field.get, offset, size)
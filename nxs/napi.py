@@ -39,13 +39,15 @@ order:
 * ``LIBDIR`` defaults to ``/usr/local/lib``, but is replaced by the value of
   ``--libdir`` during configure.
 
-The import will raise an :py:exc:`OSError` exception if the library wasn't
-found or couldn't be loaded.  Note that on Windows in particular this may be
-because the supporting HDF5 dlls were not available in the usual places.
+The library is not loaded when nxs is imported, but on the first call
+into it, usually when the first file is opened.  That call will raise an
+:py:exc:`OSError` exception if the library wasn't found or couldn't be
+loaded.  Note that on Windows in particular this may be because the
+supporting HDF5 dlls were not available in the usual places.
 
 If you are extracting the nexus library from a bundle at runtime, set
 `os.environ['NEXUSLIB']` to the path where it is extracted before the
-first import of nxs.
+first file is opened.
 
 Example
 =======
@@ -145,9 +147,11 @@ numpy A.shape attribute for the dimensions of array A.
 
 Compression codes are::
 
- 'none' 'lzw' 'rle' 'huffman'
+ 'none' 'lzw' 'rle' 'huffman' 'auto'
 
-  As of this writing NeXus only supports 'none' and 'lzw'.
+  As of this writing NeXus only supports 'none' and 'lzw'.  'auto' chooses
+  between the codes available for the file format by compressing samples
+  of the data; see :py:func:`nxs.napi.choosecompression`.
 
 Miscellaneous constants:
     
@@ -165,6 +169,41 @@ Miscellaneous constants:
 | P              |                                                              |
 +----------------+--------------------------------------------------------------+
 
+Threads
+=======
+
+Calls into the NeXus library are serialized by a lock, since libNeXus
+and HDF5 are usually built without thread support.  The lock mode is
+set with :py:func:`nxs.napi.setlockmode` before files are opened:
+
++-----------+-------------------------------------------------------------+
+| Mode      | Description                                                 |
++===========+=============================================================+
+| 'library' | one lock shared by all handles (default)                    |
++-----------+-------------------------------------------------------------+
+| 'handle'  | one lock per handle, for thread-safe builds of the library |
++-----------+-------------------------------------------------------------+
+| 'none'    | no locking, for handles only ever used by one thread        |
++-----------+-------------------------------------------------------------+
+
+The lock only protects individual calls.  A handle has a single open
+path, so threads sharing a handle should hold ``file.lock`` around each
+sequence of openpath/getdata calls.  :py:func:`nxs.napi.readslabs` reads
+from many files on a thread pool.
+
+Profiling
+=========
+
+:py:func:`nxs.napi.profile` records the calls into the library made
+within a block: the number of calls and their latency for each library
+function, and the bytes read and written for each dataset path::
+
+    with nxs.napi.profile() as profiler:
+        tree = nxs.load('run.nxs')
+    print(profiler.snapshot()['paths'])
+
+Profiling is off by default and costs nothing until started.
+
 Caveats
 =======
 
@@ -185,9 +224,14 @@ from __future__ import print_function
 #  Test program for NeXus python interface
 
 __all__ = ['UNLIMITED', 'MAXRANK', 'MAXNAMELEN','MAXPATHLEN','H4SKIP',
-           'NeXus','NeXusError','open']
-
-import sys, os, numpy, ctypes
+           'NeXus','NeXusError','NeXusPath','NeXusEntry','BufferPool',
+           'DatasetHandle','Appender','AsyncWriter','HandleCache','open','readslabs','setlockmode',
+           'sethandlecache','planchunks','choosecompression','Profiler',
+           'profile','startprofile','stopprofile','NeXusVisitor',
+           'ShowVisitor','SlabScheduler']
+
+import sys, os, time, atexit, itertools, zlib, numpy, ctypes, collections
+import functools, threading, contextlib
 import six
 
 # Defined ctypes
@@ -239,6 +283,29 @@ _nxtype_code=dict(
 # Note: put this in a lambda to hide v,k from the local namespace
 _pytype_code=(lambda : dict([(v,k) for (k,v) in six.iteritems(_nxtype_code)]))()
 
+# Largest block (in bytes) copied at once when writing strided or
+# mistyped data
+BLOCKSIZE = 4*1024*1024
+
+# Default size (in bytes) of the slabs returned by NeXus.iterslabs
+SLABBUDGET = 64*1024*1024
+
+# Default size (in bytes) of the cache of chunks kept by each handle
+CHUNKCACHE = 32*1024*1024
+
+# Target size (in bytes) of the chunks chosen by planchunks
+CHUNKBYTES = 1024*1024
+
+# Access patterns understood by planchunks
+ACCESS_PATTERNS = ('rows','frames','columns','tiles','append')
+
+# Assumed overhead (s) of one slab read, used by getpoints and getindexed
+# to decide when reading unwanted data is cheaper than another read
+CALLCOST = 100e-6
+
+# Assumed disk throughput (bytes/s) when trading compression against speed
+IORATE = 200e6
+
 # Compression to use when creating data blocks
 _compression_code=dict(
     none=100,
@@ -257,6 +324,72 @@ def _is_string_like(obj):
     except (TypeError, ValueError): return False
     return True
 
+# Encodings which agree with ASCII, so that ASCII text can be converted
+# by numpy's vectorized casts
+_ascii_compatible = ('ascii','utf-8','utf8','latin-1','latin1','iso-8859-1')
+
+def _encodestrings(strings, encoding):
+    """
+    Return an 'S' array of the strings, encoding unicode with encoding.
+    """
+    strings = numpy.asarray(strings)
+    if strings.dtype.kind == 'S':
+        return strings
+    if strings.dtype.kind != 'U':
+        strings = strings.astype('U')
+    if encoding.lower() in _ascii_compatible:
+        try:
+            return strings.astype('S%d'%max(1,strings.dtype.itemsize//4))
+        except UnicodeEncodeError:
+            pass
+    return numpy.char.encode(strings, encoding)
+
+def _decodestrings(data, encoding):
+    """
+    Return a 'U' array of the 'S' array data decoded with encoding.
+    """
+    if encoding.lower() in _ascii_compatible:
+        try:
+            return data.astype('U%d'%max(1,data.dtype.itemsize))
+        except UnicodeDecodeError:
+            pass
+    return numpy.char.decode(data, encoding)
+
+def _datainfo(value, dtype=None, shape=None):
+    """
+    Return value,dtype,shape for writing value to a new dataset, filling
+    in the type and shape from the value if they are not given.  Strings
+    are encoded as UTF-8 and stored as 'char', one per row.
+    """
+    if dtype is None:
+        if _is_string_like(value):
+            dtype = 'char'
+        else:
+            value = numpy.asarray(value)
+            dtype = 'char' if value.dtype.kind in 'SU' else str(value.dtype)
+    if str(dtype) == 'char':
+        value = _encodestrings(value, 'utf-8')
+        if shape is None:
+            shape = list(value.shape) + [max(1,value.dtype.itemsize)]
+    elif shape is None:
+        shape = list(numpy.shape(value)) or [1]
+    return value,dtype,shape
+
+def _parsechunks(value, rank):
+    """
+    Return the chunk shape recorded in a chunk_shape attribute value as
+    a list of rank positive ints, or None if it is missing or invalid.
+    """
+    if hasattr(value,'decode'):
+        value = value.decode('ascii')
+    try:
+        chunks = [int(n) for n in value.split(',')]
+    except (AttributeError,ValueError):
+        return None
+    if len(chunks) != rank or min(chunks) < 1:
+        return None
+    return chunks
+
 def _is_list_like(obj):
     """
     Return True if object acts like a list
@@ -265,6 +398,54 @@ def _is_list_like(obj):
     except TypeError: return False
     return True
 
+def _asbuffer(data, dtype, shape):
+    """
+    Return data as a numpy array, sharing memory with data if it supports
+    the buffer protocol.  Untyped byte buffers such as bytearray are
+    reinterpreted as an array of dtype with the given shape.
+    """
+    if isinstance(data, numpy.ndarray):
+        return data
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return numpy.asarray(data)
+    data = numpy.asarray(view)
+    dtype = numpy.dtype(dtype)
+    if (view.format in ('B','b','c') and dtype.itemsize > 1
+            and data.flags.c_contiguous and data.nbytes%dtype.itemsize == 0):
+        data = data.reshape(-1).view(dtype)
+        if data.size == numpy.prod(shape):
+            data = data.reshape([int(n) for n in shape])
+    return data
+
+def _slabblocks(shape, itemsize, nbytes):
+    """
+    Split a slab into blocks of at most nbytes, but at least one element.
+
+    Yields offset,shape for each block, relative to the start of the
+    slab and in storage order.  Whole trailing dimensions are kept
+    together when they fit so that the blocks are as large as possible.
+    """
+    shape = [int(n) for n in shape]
+    rank = len(shape)
+    # Find the outermost axis k such that shape[k:] fits in a block
+    k,inner = rank,itemsize
+    while k > 0 and inner*shape[k-1] <= nbytes:
+        k -= 1
+        inner *= shape[k]
+    if k == 0:
+        yield [0]*rank,shape
+        return
+    # Step through axis k-1 in pieces; axes before it go one at a time
+    axis = k-1
+    step = max(1, nbytes//inner)
+    for index in numpy.ndindex(*shape[:axis]):
+        for start in range(0, shape[axis], step):
+            offset = list(index) + [start] + [0]*(rank-axis-1)
+            size = [1]*axis + [min(step,shape[axis]-start)] + shape[axis+1:]
+            yield offset,size
+
 def _libnexus():
     """
     Load the NeXus library.
@@ -322,8 +503,303 @@ def _init():
     lib.NXMDisableErrorReporting()
     return lib
 
+class _LazyFunction(object):
+    """
+    Placeholder for a library function before the library is loaded.
+
+    Prototype attributes such as restype and argtypes are kept until
+    the library is loaded and then copied to the real function.
+    """
+    def __init__(self, library, name):
+        self.__dict__['_library'] = library
+        self.__dict__['_name'] = name
+        self.__dict__['_prototype'] = {}
+
+    def __setattr__(self, name, value):
+        self._prototype[name] = value
+
+    def __getattr__(self, name):
+        try:
+            return self._prototype[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __call__(self, *args):
+        self._library.load()
+        return self._library._bind(self._name)(*args)
+
+class _LazyLibrary(object):
+    """
+    Stand-in for the NeXus library which finds and loads it on the first
+    call into any of its functions.
+
+    Searching for the library and loading it with its HDF dependencies
+    takes a while, and is wasted in processes which only use nxs.unit or
+    build trees in memory.  Functions are looked up once when loaded and
+    then stored on the instance, so later lookups go straight to ctypes.
+    """
+    def __init__(self, init):
+        self._init = init
+        self._lib = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._lib is not None
+
+    def load(self):
+        """
+        Load the library and bind the functions prototyped so far.
+
+        Raises OSError if the library could not be found or loaded.
+        """
+        with self._lock:
+            if self._lib is not None:
+                return
+            self._lib = self._init()
+            for name,stub in list(self.__dict__.items()):
+                if isinstance(stub, _LazyFunction):
+                    self._bind(name)
+
+    def _bind(self, name):
+        """Replace the placeholder for name with the library function"""
+        fn = getattr(self._lib, name)
+        stub = self.__dict__.get(name)
+        if isinstance(stub, _LazyFunction):
+            for key,value in stub._prototype.items():
+                setattr(fn, key, value)
+        self.__dict__[name] = fn
+        return fn
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if self._lib is None:
+            fn = _LazyFunction(self, name)
+        else:
+            fn = getattr(self._lib, name)
+        self.__dict__[name] = fn
+        return fn
+
 # Define the interface to the dll
-nxlib = _init()
+nxlib = _LazyLibrary(_init)
+
+def _hdf5layout(filename, path):
+    """
+    Return offset,dtype,shape for the dataset at path if it is stored in
+    one contiguous unfiltered block of the HDF5 file, or None if it is not
+    or h5py is not available to tell.  Dtype is the type in the file,
+    including its byte order.
+
+    The file is opened a second time with h5py while the NeXus handle
+    still has it open, which HDF5 only allows for files opened read-only
+    by both.  If the second open fails, None is returned.
+    """
+    try:
+        import h5py
+    except ImportError:
+        return None
+    try:
+        with h5py.File(filename, 'r') as fid:
+            dataset = fid[path]
+            plist = dataset.id.get_create_plist()
+            if plist.get_layout() != h5py.h5d.CONTIGUOUS \
+                    or plist.get_nfilters() > 0:
+                return None
+            offset = dataset.id.get_offset()
+            if offset is None:
+                return None
+            return int(offset),dataset.dtype,dataset.shape
+    except Exception:
+        # Not HDF5, or not readable alongside the NeXus handle
+        return None
+
+def _hdf5maxshape(filename, path):
+    """
+    Return the maximum shape of the dataset at path, with None for
+    unlimited dimensions, or None if the file is not HDF5 or h5py is not
+    available to tell.  As for _hdf5layout, the file is opened a second
+    time alongside the NeXus handle, which may be refused.
+    """
+    try:
+        import h5py
+    except ImportError:
+        return None
+    try:
+        with h5py.File(filename, 'r') as fid:
+            return fid[path].maxshape
+    except Exception:
+        return None
+
+# Clock for timing library calls
+_timer = getattr(time, 'perf_counter', time.time)
+
+class Profiler(object):
+    """
+    Statistics on calls into the NeXus library.
+
+    For each library function the profiler counts the calls and their
+    total time, keeps a sample of up to samples call times for latency
+    percentiles, and adds up the bytes read and written.  Reads and
+    writes of data are also totalled for each dataset path.
+
+    Profiling is off until started with startprofile or profile::
+
+        with nxs.napi.profile() as profiler:
+            tree = nxs.load('run.nxs')
+        stats = profiler.snapshot()
+        print(stats['functions']['nxiopengroup_']['calls'])
+    """
+    def __init__(self, samples=10000):
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """
+        Clear the statistics.
+        """
+        with self._lock:
+            self._functions = {}
+            self._paths = {}
+
+    def _stats(self, table, key):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = dict(calls=0, time=0., read=0, written=0,
+                                      latency=[])
+        return stats
+
+    def _call(self, name, seconds):
+        """Record a call to the named library function"""
+        self._local.last = name,seconds
+        with self._lock:
+            stats = self._stats(self._functions, name)
+            stats['calls'] += 1
+            stats['time'] += seconds
+            latency = stats['latency']
+            if len(latency) < self.samples:
+                latency.append(seconds)
+            else:
+                # Reservoir sampling keeps a uniform sample of the calls
+                k = numpy.random.randint(stats['calls'])
+                if k < self.samples:
+                    latency[k] = seconds
+
+    def transfer(self, path, nbytes, write=False):
+        """
+        Record nbytes moved to or from path by the last library call on
+        this thread.
+        """
+        name,seconds = getattr(self._local, 'last', (None,0.))
+        field = 'written' if write else 'read'
+        with self._lock:
+            if name is not None:
+                self._stats(self._functions, name)[field] += nbytes
+            stats = self._stats(self._paths, path)
+            stats['calls'] += 1
+            stats['time'] += seconds
+            stats[field] += nbytes
+
+    def snapshot(self):
+        """
+        Return the statistics so far as a dictionary with keys 'functions'
+        and 'paths', each mapping names to a dictionary of calls, time,
+        read and written, plus p50, p90, p99 and max latency in seconds
+        for functions.
+        """
+        with self._lock:
+            result = dict(functions={}, paths={})
+            for table,key in ((self._functions,'functions'),
+                              (self._paths,'paths')):
+                for name,stats in table.items():
+                    item = dict((k,v) for k,v in stats.items()
+                                if k != 'latency')
+                    if key == 'functions' and stats['latency']:
+                        p = numpy.percentile(stats['latency'],[50,90,99,100])
+                        item.update(p50=float(p[0]), p90=float(p[1]),
+                                    p99=float(p[2]), max=float(p[3]))
+                    result[key][name] = item
+        return result
+
+class _ProfiledLibrary(object):
+    """
+    Stand-in for the library which times each call for a Profiler.
+    """
+    def __init__(self, lib, profiler):
+        self._lib = lib
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        fn = getattr(self._lib, name)
+        if isinstance(fn, _LazyFunction):
+            # Load the library first, so that the timed calls go straight
+            # to the library function rather than through the placeholder
+            self._lib.load()
+            fn = getattr(self._lib, name)
+        record = self._profiler._call
+        def call(*args):
+            start = _timer()
+            try:
+                return fn(*args)
+            finally:
+                record(name, _timer()-start)
+        # Keep the wrapper so later lookups skip __getattr__
+        self.__dict__[name] = call
+        return call
+
+_profiler = None
+
+def startprofile(profiler=None):
+    """
+    Start recording library calls in profiler, or in a new Profiler if
+    none is given.  Returns the profiler.
+    """
+    global nxlib, _profiler
+    stopprofile()
+    _profiler = profiler if profiler is not None else Profiler()
+    nxlib = _ProfiledLibrary(nxlib, _profiler)
+    return _profiler
+
+def stopprofile():
+    """
+    Stop recording library calls.  Returns the profiler which was in use,
+    or None.
+    """
+    global nxlib, _profiler
+    profiler,_profiler = _profiler,None
+    if isinstance(nxlib, _ProfiledLibrary):
+        nxlib = nxlib._lib
+    return profiler
+
+@contextlib.contextmanager
+def profile(profiler=None):
+    """
+    Context manager recording library calls made within the block.
+
+    with nxs.napi.profile() as profiler:
+        process(file)
+    print(profiler.snapshot())
+    """
+    profiler = startprofile(profiler)
+    try:
+        yield profiler
+    finally:
+        stopprofile()
+
+def _transferred(source, nbytes, write=False):
+    """
+    Record the bytes moved by the last library call on source, a file or
+    handle, when profiling.  The path of source is only looked up while
+    profiling, so this costs nothing otherwise.
+    """
+    if _profiler is not None:
+        _profiler.transfer(source.path, nbytes, write)
+
+def _nbytes(data):
+    """Size of data passed to the library, which may be a string"""
+    return data.nbytes if hasattr(data, 'nbytes') else len(data)
 
 
 def open(filename, mode='r'):
@@ -332,16 +808,1284 @@ def open(filename, mode='r'):
     """
     return NeXus(filename, mode)
 
+_lockmode = 'library'
+_librarylock = threading.RLock()
+
+class _NoLock(object):
+    """Lock which does nothing, for lock mode 'none'"""
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        return False
+    def acquire(self, blocking=True):
+        return True
+    def release(self):
+        pass
+
+def setlockmode(mode):
+    """
+    Set how calls into the NeXus library are serialized between threads.
+
+    mode is 'library' to use one lock for all handles, which is needed
+    unless libNeXus and HDF5 are built thread-safe, 'handle' to use one
+    lock for each handle, or 'none' for no locking.  The mode applies to
+    handles created after the call.
+
+    Returns the previous mode.
+
+    Raises ValueError if the mode is invalid.
+    """
+    global _lockmode
+    if mode not in ('library','handle','none'):
+        raise ValueError("Invalid lock mode %s" % str(mode))
+    previous,_lockmode = _lockmode,mode
+    return previous
+
+def _newlock():
+    """Return the lock for a new handle according to the lock mode"""
+    if _lockmode == 'library':
+        return _librarylock
+    elif _lockmode == 'handle':
+        return threading.RLock()
+    else:
+        return _NoLock()
+
+def _synchronized(method):
+    """Decorator holding the handle lock for the duration of the method"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kw):
+        with self.lock:
+            return method(self, *args, **kw)
+    return wrapper
+
+class HandleCache(object):
+    """
+    Cache of open library handles which have been closed by NeXus objects.
+
+    When a NeXus object opened read-only is closed its handle is parked
+    in the cache instead of being closed, and the next read-only open of
+    the same file reuses it, saving NXopen/NXclose.  Opening the file for
+    writing closes its parked handle first, so that writable handles are
+    never kept open after close.  A parked handle is only reused if the
+    inode, size and modification time of the file are unchanged, so a
+    file replaced or rewritten by another process is opened afresh.
+
+    At most maxopen handles are kept, closing the least recently used
+    first, and handles idle for more than timeout seconds are closed the
+    next time the cache is used.  With maxopen=0 the cache is disabled.
+
+    There is one cache for the process, configured with
+    nxs.napi.sethandlecache, and shared by all NeXus objects including
+    NeXusTree objects returned by nxs.load.
+    """
+    def __init__(self, maxopen=0, timeout=None):
+        self.maxopen = maxopen
+        self.timeout = timeout
+        self._handles = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._handles)
+
+    def _key(self, filename, mode):
+        return os.path.abspath(filename),mode
+
+    def _signature(self, filename):
+        """Return the inode, size and modification time of the file"""
+        try:
+            info = os.stat(filename)
+        except OSError:
+            return None
+        return (info.st_ino, info.st_size,
+                getattr(info, 'st_mtime_ns', info.st_mtime))
+
+    def revive(self, filename, mode):
+        """
+        Return a parked handle for the file and mode, or None.  A handle
+        parked before the file changed on disk is closed instead.
+        """
+        with self._lock:
+            stale = self._evict()
+            entry = self._handles.pop(self._key(filename,mode),None)
+        if entry is not None and entry[2] != self._signature(filename):
+            stale.append(entry[0])
+            entry = None
+        self._close(stale)
+        return entry[0] if entry is not None else None
+
+    def discard(self, filename):
+        """
+        Close the parked handles for the file, whatever their mode.
+        """
+        path = os.path.abspath(filename)
+        with self._lock:
+            stale = [self._handles.pop(key)[0]
+                     for key in list(self._handles) if key[0] == path]
+        self._close(stale)
+
+    def park(self, filename, mode, handle):
+        """
+        Keep the handle open for reuse, closing the handles beyond
+        maxopen.  The handle must be at the root of the file.
+
+        Returns False if the cache is disabled, already holds a handle
+        for the file or the file can no longer be found, in which case
+        the handle should be closed by the caller.
+        """
+        key = self._key(filename,mode)
+        signature = self._signature(filename)
+        with self._lock:
+            if self.maxopen <= 0 or key in self._handles \
+                    or signature is None:
+                return False
+            self._handles[key] = (handle,time.time(),signature)
+            stale = self._evict()
+        self._close(stale)
+        return True
+
+    def expire(self):
+        """
+        Close handles which have been idle for longer than the timeout,
+        and any beyond maxopen.
+        """
+        with self._lock:
+            stale = self._evict()
+        self._close(stale)
+
+    def clear(self):
+        """
+        Close all parked handles.
+        """
+        with self._lock:
+            stale = [entry[0] for entry in self._handles.values()]
+            self._handles.clear()
+        self._close(stale)
+
+    def _evict(self):
+        """Remove and return the idle handles and those beyond maxopen"""
+        stale = []
+        oldest = time.time() - self.timeout if self.timeout is not None else 0
+        while self._handles:
+            key,(handle,parked,_) = next(iter(self._handles.items()))
+            if len(self._handles) <= self.maxopen and parked > oldest:
+                break
+            del self._handles[key]
+            stale.append(handle)
+        return stale
+
+    def _close(self, handles):
+        # Parked handles belong to no NeXus object, so only the library
+        # lock applies.  Errors are ignored since there is no caller to
+        # report them to.
+        for handle in handles:
+            with _newlock():
+                nxlib.nxiclose_(_ref(handle))
+
+_handlecache = HandleCache()
+atexit.register(_handlecache.clear)
+
+def sethandlecache(maxopen=0, timeout=None):
+    """
+    Configure the cache of open file handles.
+
+    Up to maxopen read-only handles are kept open after their NeXus
+    objects are closed, and are closed after being idle for timeout seconds if a
+    timeout is given.  The default, maxopen=0, disables the cache.
+    Handles beyond the new limit are closed immediately.
+
+    Raises ValueError if maxopen is negative.
+    """
+    if maxopen < 0:
+        raise ValueError("maxopen must be non-negative")
+    _handlecache.maxopen,_handlecache.timeout = maxopen,timeout
+    _handlecache.expire()
+
+def readslabs(requests, maxworkers=None):
+    """
+    Read data from many files on a pool of threads.
+
+    requests is a sequence of (filename, path, offset, shape) tuples,
+    with offset and shape None to read the whole dataset.  Each file is
+    opened once and read by a single thread, and up to maxworkers files
+    (default is the number of files, up to 16) are read at a time.
+
+    Returns the list of arrays in the same order as the requests.
+
+    The library call releases the interpreter lock, so reads from
+    different files run in parallel when the lock mode is 'handle' or
+    'none'.  With the default 'library' mode the reads are safe but run
+    one at a time.
+
+    Raises ValueError if maxworkers is less than one, or NeXusError or
+    ValueError from the first failed file.
+    """
+    if maxworkers is not None and maxworkers < 1:
+        raise ValueError("readslabs needs at least one worker, not %s"
+                         % str(maxworkers))
+    byfile = collections.OrderedDict()
+    for index,(filename,path,offset,shape) in enumerate(requests):
+        byfile.setdefault(filename,[]).append((index,path,offset,shape))
+    results = [None]*sum(len(items) for items in byfile.values())
+    if not byfile:
+        return results
+
+    def _read(filename, items):
+        file = NeXus(filename,'r')
+        try:
+            for index,path,offset,shape in items:
+                file.openpath(path)
+                if offset is None:
+                    results[index] = file.getdata()
+                else:
+                    results[index] = file.getslab(offset,shape)
+        finally:
+            file.close()
+
+    work = six.moves.queue.Queue()
+    for job in enumerate(byfile.items()):
+        work.put(job)
+    errors = {}
+    def _worker():
+        while True:
+            try:
+                k,(filename,items) = work.get_nowait()
+            except six.moves.queue.Empty:
+                return
+            try:
+                _read(filename, items)
+            except Exception as exc:
+                errors[k] = exc
+
+    if maxworkers is None:
+        maxworkers = min(len(byfile),16)
+    threads = [threading.Thread(target=_worker)
+               for _ in range(min(maxworkers,len(byfile)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[min(errors)]
+    return results
+
 class NeXusError(Exception):
     """NeXus Error"""
     pass
 
+class BufferPool(object):
+    """
+    Reusable output buffers keyed by data type and shape.
+
+    Pass the pool as the out argument of NeXus.getdata or NeXus.getslab
+    to read into the same C-contiguous array each time a slab of a given
+    type and shape is requested::
+
+        pool = nxs.BufferPool()
+        for i in range(nframes):
+            frame = file.getslab([i,0,0],[1,ny,nx],out=pool)
+            process(frame)
+
+    The returned array is overwritten by the next read of the same type
+    and shape, so copy it if it must be kept.  The pool is not shared
+    between threads; give each reader its own.
+
+    At most maxsize buffers are kept, with the least recently used
+    buffer released first.
+    """
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._buffers = collections.OrderedDict()
+
+    def get(self, dtype, shape):
+        """
+        Return the buffer for a data element of the given NeXus type and
+        shape, allocating it if it is not already in the pool.  Strings
+        ('char') use an 'S#' array with one element per string.
+        """
+        if isinstance(shape, int):
+            shape = [shape]
+        if dtype == 'char':
+            dtype,shape = 'S%d'%shape[-1],shape[:-1]
+        key = (numpy.dtype(dtype).str, tuple(int(n) for n in shape))
+        try:
+            data = self._buffers.pop(key)
+        except KeyError:
+            data = numpy.empty(key[1], key[0])
+            while self._buffers and len(self._buffers) >= self.maxsize:
+                self._buffers.popitem(last=False)
+        self._buffers[key] = data
+        return data
+
+    def clear(self):
+        """
+        Release all buffers in the pool.
+        """
+        self._buffers.clear()
+
+class DatasetHandle(object):
+    """
+    Slab access to an open dataset for tight loops.
+
+    The shape and type of the dataset are looked up once, and the offset
+    and shape arguments for NXgetslab/NXputslab are built once, so that
+    each read or write is a single call into NeXus.  The slab shape
+    defaults to the whole dataset and can be changed with setslab::
+
+        h = file.opendataset('data', slab=[1,1,Nk])
+        vector = h.empty()
+        for i in range(Ni):
+            for j in range(Nj):
+                h.read([i,j,0], vector)
+                process(vector)
+        h.close()
+
+    The dataset must remain open on the file while the handle is in use;
+    do not move the file cursor between reads and writes.
+
+    Attributes are file, path, shape (at the time the handle was
+    created), dtype, rank and slab.
+    """
+    def __init__(self, file, slab=None):
+        self.file = file
+        self.path = file.path
+        self.shape,self.dtype = file.getrawinfo()
+        self.rank = len(self.shape)
+        self._offset = (c_int64*self.rank)()
+        self._size = (c_int64*self.rank)()
+        self._buffer,self._pbuffer = None,None
+        self.setslab(self.shape if slab is None else slab)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def setslab(self, slab):
+        """
+        Set the shape of the slab moved by read and write.
+        """
+        if len(slab) != self.rank:
+            raise ValueError("Slab %s does not match rank %d: %s" %
+                             (list(slab), self.rank, self.file._loc()))
+        self.slab = tuple(int(n) for n in slab)
+        self._size[:] = self.slab
+        if self.dtype == 'char':
+            self._type = numpy.dtype('S%d'%self.slab[-1])
+            self._shape = self.slab[:-1]
+        else:
+            self._type = numpy.dtype(self.dtype)
+            self._shape = self.slab
+        self._count = int(numpy.prod(self._shape))
+
+    def empty(self):
+        """
+        Return a new uninitialized array suitable for read.
+        """
+        return numpy.empty(self._shape, self._type)
+
+    def _pointer(self, data):
+        """
+        Return the address of data, remembering it for the next call.
+        """
+        if data is not self._buffer:
+            self._buffer,self._pbuffer = data,data.ctypes.data
+        return self._pbuffer
+
+    def read(self, offset, out=None):
+        """
+        Read the slab starting at offset, returning a new array or out.
+
+        out must be a C-contiguous writable array of the dataset type
+        holding one slab, such as the one returned by empty().
+
+        Raises ValueError if this fails.
+
+        Corresponds to NXgetslab(handle,data,offset,shape)
+        """
+        if out is None:
+            out = self.empty()
+        elif (out.dtype != self._type or out.size != self._count
+              or not out.flags.c_contiguous or not out.flags.writeable):
+            raise ValueError("Output buffer does not match slab %s %s: %s" %
+                             (self.dtype, self.slab, self.file._loc()))
+        self._offset[:] = [int(i) for i in offset]
+        with self.file.lock:
+            status = nxlib.nxigetslab64_(self.file.handle, self._pointer(out),
+                                         self._offset, self._size)
+        if status == ERROR:
+            raise ValueError("Could not read slab: %s" % (self.file._loc()))
+        _transferred(self, out.nbytes)
+        return out
+
+    def write(self, offset, data):
+        """
+        Write data as the slab starting at offset.
+
+        Contiguous arrays of the dataset type and slab size are written
+        directly; anything else goes through NeXus.putslab, which checks
+        and converts it.
+
+        Raises ValueError if this fails.
+
+        Corresponds to NXputslab(handle,data,offset,shape)
+        """
+        if (not isinstance(data, numpy.ndarray) or data.dtype != self._type
+                or data.size != self._count or not data.flags.c_contiguous):
+            self.file.putslab(data, offset, self.slab)
+            return
+        self._offset[:] = [int(i) for i in offset]
+        self.file._chunkcache.invalidate(self.path)
+        with self.file.lock:
+            status = nxlib.nxiputslab64_(self.file.handle, self._pointer(data),
+                                         self._offset, self._size)
+        if status == ERROR:
+            raise ValueError("Could not write slab: %s" % (self.file._loc()))
+        _transferred(self, data.nbytes, write=True)
+
+    def close(self):
+        """
+        Close the dataset on the file.
+        """
+        self.file.closedata()
+        self._buffer = self._pbuffer = None
+
+class Appender(object):
+    """
+    Buffered writing of rows to the end of a dataset whose first
+    dimension is UNLIMITED.
+
+    Rows are collected in a buffer holding a whole number of chunks and
+    written with a single call into NeXus each time the buffer fills::
+
+        file.compmakedata('counts','uint32',[nxs.UNLIMITED,Ny,Nx],
+                          chunks='append')
+        with file.appender('counts') as out:
+            for frame in acquire():
+                out.append(frame)
+
+    The appender keeps track of the extent of the dataset itself rather
+    than asking NeXus before each write.  The buffer defaults to the
+    largest number of whole chunks in BLOCKSIZE bytes.  As for
+    DatasetHandle, the dataset remains open on the file until the
+    appender is closed, so do not move the file cursor in between.
+
+    Attributes are file, path, dtype, rows (the size of the buffer),
+    pending (the rows in the buffer) and extent (the rows in the file).
+    """
+    def __init__(self, file, rows=None):
+        self.file = file
+        self.path = file.path
+        shape,self.dtype = file.getrawinfo()
+        if len(shape) == 0 or self.dtype == 'char':
+            raise ValueError("Can only append to numeric arrays: %s" %
+                             (file._loc()))
+        if file._isunlimited() is False:
+            raise ValueError("First dimension is not UNLIMITED: %s" %
+                             (file._loc()))
+        if rows is not None and int(rows) < 1:
+            raise ValueError("Appender needs at least one row, not %s: %s"
+                             % (str(rows),file._loc()))
+        self.extent = int(shape[0])
+        self.rowshape = tuple(int(n) for n in shape[1:])
+        self._type = numpy.dtype(self.dtype)
+        if rows is None:
+            rowbytes = max(1, _product(self.rowshape)*self._type.itemsize)
+            chunks = file.getchunks()
+            step = chunks[0] if chunks is not None else 1
+            rows = max(step, (BLOCKSIZE//rowbytes)//step*step)
+        self.rows = int(rows)
+        self.pending = 0
+        self._buffer = numpy.empty((self.rows,)+self.rowshape, self._type)
+        self._offset = (c_int64*len(shape))()
+        self._size = (c_int64*len(shape))(0,*self.rowshape)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.extent + self.pending
+
+    def append(self, row):
+        """
+        Add one row to the end of the dataset.
+        """
+        self._buffer[self.pending] = row
+        self.pending += 1
+        if self.pending == self.rows:
+            self.flush()
+
+    def extend(self, rows):
+        """
+        Add a sequence of rows to the end of the dataset.
+        """
+        rows = numpy.asarray(rows)
+        start = 0
+        while start < len(rows):
+            count = min(self.rows-self.pending, len(rows)-start)
+            self._buffer[self.pending:self.pending+count] = \
+                rows[start:start+count]
+            self.pending += count
+            start += count
+            if self.pending == self.rows:
+                self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows to the file.
+
+        Raises ValueError if this fails.
+
+        Corresponds to NXputslab(handle,data,offset,shape)
+        """
+        if self.pending == 0:
+            return
+        self._offset[0] = self.extent
+        self._size[0] = self.pending
+        self.file._chunkcache.invalidate(self.path)
+        with self.file.lock:
+            status = nxlib.nxiputslab64_(self.file.handle,
+                                         self._buffer.ctypes.data,
+                                         self._offset, self._size)
+        if status == ERROR:
+            raise ValueError("Could not append rows: %s" % (self.file._loc()))
+        _transferred(self, self.pending*self._buffer[0].nbytes, write=True)
+        self.extent += self.pending
+        self.pending = 0
+
+    def close(self):
+        """
+        Write the buffered rows and close the dataset on the file.
+        """
+        try:
+            self.flush()
+        finally:
+            self.file.closedata()
+
+class _Future(object):
+    """
+    Result of a call run on another thread, with the result, exception
+    and done methods of concurrent.futures.Future, which is not available
+    on Python 2.
+    """
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = self._exception = None
+
+    def set_result(self, result):
+        self._result = result
+        self._done.set()
+
+    def set_exception(self, exception):
+        self._exception = exception
+        self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def exception(self, timeout=None):
+        """
+        Return the error raised by the call, or None if it succeeded.
+
+        Raises RuntimeError if the call has not finished within timeout
+        seconds.
+        """
+        self._done.wait(timeout)
+        if not self._done.is_set():
+            raise RuntimeError("Timed out waiting for result")
+        return self._exception
+
+    def result(self, timeout=None):
+        """
+        Return the result of the call, raising its error if it failed.
+
+        Raises RuntimeError if the call has not finished within timeout
+        seconds.
+        """
+        if self.exception(timeout) is not None:
+            raise self._exception
+        return self._result
+
+class AsyncWriter(object):
+    """
+    Write to a NeXus file from a background thread.
+
+    Calls on the file are queued and run in order on a thread which owns
+    the handle, so the caller can carry on while NeXus compresses and
+    writes the data::
+
+        writer = AsyncWriter(nxs.open('run.nxs','w5'))
+        writer.submit('makegroup','entry','NXentry')
+        writer.submit('opengroup','entry')
+        writer.compmakedata('frames','uint16',[nxs.UNLIMITED,Ny,Nx],
+                            chunks='frames')
+        writer.submit('opendata','frames')
+        for i,frame in enumerate(acquire()):
+            writer.putslab(frame,[i,0,0],[1,Ny,Nx])
+        writer.close()
+
+    At most maxsize calls wait in the queue; submitting more blocks until
+    the thread catches up.  Arrays passed to a call are copied when it is
+    submitted, so the caller may reuse its buffers.  Each call returns a
+    future for its result, with the result, exception and done methods
+    of concurrent.futures.Future.  After a call fails the
+    remaining queued calls are skipped, and the error is raised by the
+    next submit, drain or close.  Do not use the file directly while the
+    writer is open.
+    """
+    def __init__(self, file, maxsize=16):
+        self.file = file
+        self._queue = six.moves.queue.Queue(maxsize)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                method,args,kw,future = item
+                if self._error is not None:
+                    future.set_exception(self._error)
+                    continue
+                try:
+                    result = getattr(self.file,method)(*args,**kw)
+                except Exception as exc:
+                    self._error = exc
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, method, *args, **kw):
+        """
+        Queue the call file.method(*args,**kw) and return a future for
+        its result.  Blocks while the queue is full.
+
+        Raises ValueError if the writer is closed, or the error from an
+        earlier call.
+        """
+        if self._closed:
+            raise ValueError("Writer for %s is closed" % (self.file.filename))
+        self._check()
+        args = tuple(numpy.array(a) if isinstance(a,(numpy.ndarray,bytearray))
+                     else a for a in args)
+        future = _Future()
+        self._queue.put((method,args,kw,future))
+        return future
+
+    def makedata(self, name, dtype=None, shape=None):
+        """Queue NeXus.makedata"""
+        return self.submit('makedata',name,dtype,shape)
+
+    def compmakedata(self, name, dtype=None, shape=None, mode='lzw',
+                     chunks=None):
+        """Queue NeXus.compmakedata"""
+        return self.submit('compmakedata',name,dtype,shape,mode,chunks)
+
+    def putdata(self, data, cast=False):
+        """Queue NeXus.putdata on a copy of data"""
+        return self.submit('putdata',data,cast)
+
+    def putslab(self, data, slab_offset, slab_shape, cast=False):
+        """Queue NeXus.putslab on a copy of data"""
+        return self.submit('putslab',data,list(slab_offset),
+                           list(slab_shape),cast)
+
+    def putattr(self, name, value, dtype=None):
+        """Queue NeXus.putattr"""
+        return self.submit('putattr',name,value,dtype)
+
+    def drain(self):
+        """
+        Wait until all queued calls have run.
+
+        Raises the error from the first failed call.
+        """
+        self._queue.join()
+        self._check()
+
+    def close(self, closefile=True):
+        """
+        Run the queued calls, stop the thread and, if closefile is True,
+        close the file.
+
+        Raises the error from the first failed call.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+            if closefile:
+                self.file.close()
+        self._check()
+
+class SlabScheduler(object):
+    """
+    Coalesce slab reads requested by several consumers of one file.
+
+    Requests are queued for window seconds after the first one arrives,
+    then overlapping and adjacent slabs of the same dataset are merged
+    into larger reads on a background thread, and each request gets a
+    read-only view of the merged slab::
+
+        scheduler = SlabScheduler(file)
+        a = scheduler.submit('/entry/data/counts',[0,0,0],[1,256,256])
+        b = scheduler.submit('/entry/data/counts',[1,0,0],[1,256,256])
+        frames = a.result(),b.result()
+        print(scheduler.stats()['ratio'])
+
+    Two slabs are merged while the unwanted data read with them costs
+    less at IORATE than another read at CALLCOST, up to maxbytes
+    (default SLABBUDGET) per read.  Each request returns a future for its
+    data, as AsyncWriter does; a failed read sets the error on the
+    requests it served.  Reads hold the file lock and return the file to
+    the path it was at, so the file can still be used directly between
+    them.
+    """
+    def __init__(self, file, window=0.002, maxbytes=None):
+        self.file = file
+        self.window = window
+        self.maxbytes = maxbytes
+        self._queue = six.moves.queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = dict(requests=0, reads=0, requested=0, read=0)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def submit(self, path, slab_offset, slab_shape):
+        """
+        Queue a read of the slab of the dataset at path and return a
+        future for the data.
+
+        Raises ValueError if the scheduler is closed, or if the offset
+        and shape differ in length, an offset is negative or a size is
+        less than one.  Requests outside the dataset fail with ValueError
+        on their future.
+        """
+        if self._closed:
+            raise ValueError("Scheduler for %s is closed" % (self.file.filename))
+        offset = [int(n) for n in slab_offset]
+        size = [int(n) for n in slab_shape]
+        if len(offset) != len(size) or any(o < 0 for o in offset) \
+                or any(n < 1 for n in size):
+            raise ValueError("Invalid slab offset %s and shape %s for %s"
+                             % (offset,size,path))
+        future = _Future()
+        self._queue.put((path,offset,size,future))
+        return future
+
+    def stats(self):
+        """
+        Return a dictionary with the number of requests and reads, the
+        bytes requested and read, and the coalescing ratio of requests
+        per read.
+        """
+        with self._lock:
+            result = dict(self._stats)
+        result['ratio'] = (float(result['requests'])/result['reads']
+                           if result['reads'] else 0.)
+        return result
+
+    def close(self, closefile=False):
+        """
+        Complete the queued requests, stop the thread and, if closefile is
+        True, close the file.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+            if closefile:
+                self.file.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.time() + self.window
+            stop = False
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except six.moves.queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            bypath = collections.OrderedDict()
+            for item in batch:
+                bypath.setdefault(item[0],[]).append(item)
+            for path,requests in bypath.items():
+                try:
+                    self._read(path,requests)
+                except Exception as exc:
+                    # Fail the waiting requests rather than the thread
+                    for request in requests:
+                        if not request[3].done():
+                            request[3].set_exception(exc)
+            if stop:
+                return
+
+    def _atpath(self, path, fn, *args):
+        """
+        Return fn(*args) called with the file at path, restoring the path
+        the file was at afterwards.
+        """
+        file = self.file
+        with file.lock:
+            oldpath = file.path
+            try:
+                file.openpath(path)
+                return fn(*args)
+            finally:
+                if file.path != oldpath:
+                    file.openpath(oldpath)
+
+    def _read(self, path, requests):
+        """Merge the requests on one dataset and read them"""
+        file = self.file
+        try:
+            shape,dtype = self._atpath(path, file.getinfo)
+        except Exception as exc:
+            for request in requests:
+                request[3].set_exception(exc)
+            return
+        dims = [int(n) for n in shape]
+        valid = []
+        for request in requests:
+            _,offset,count,future = request
+            if len(offset) != len(dims) or any(o+n > d for o,n,d
+                                               in zip(offset,count,dims)):
+                future.set_exception(ValueError(
+                    "Slab %s+%s outside %s: %s" % (offset,count,dims,path)))
+            else:
+                valid.append(request)
+        requests = valid
+        if dtype == 'char':
+            # Strings come back as python strings, so read them one by one
+            itemsize = 1
+            boxes = [(r[1],[o+n-1 for o,n in zip(r[1],r[2])],[r])
+                     for r in requests]
+        else:
+            itemsize = numpy.dtype(dtype).itemsize
+            boxes = self._merge(requests, itemsize)
+        for lo,hi,members in boxes:
+            size = [b-a+1 for a,b in zip(lo,hi)]
+            out = None if dtype == 'char' else numpy.empty(size,dtype)
+            try:
+                block = self._atpath(path, file.getslab, lo, size, out)
+            except Exception as exc:
+                for request in members:
+                    request[3].set_exception(exc)
+                continue
+            with self._lock:
+                self._stats['reads'] += 1
+                self._stats['requests'] += len(members)
+                self._stats['read'] += _product(size)*itemsize
+                self._stats['requested'] += itemsize*sum(_product(r[2])
+                                                         for r in members)
+            if out is None:
+                members[0][3].set_result(block)
+                continue
+            block.flags.writeable = False
+            for _,offset,count,future in members:
+                index = tuple(slice(o-a,o-a+n)
+                              for o,a,n in zip(offset,lo,count))
+                future.set_result(block[index])
+
+    def _merge(self, requests, itemsize):
+        """
+        Group the requests into boxes lo,hi,members, merging boxes while
+        the unwanted data added costs less to read than another read.
+
+        The requests are taken in order of offset, and each is merged into
+        the box before it or starts a new box, so a batch is merged in one
+        pass.
+        """
+        allowance = CALLCOST*IORATE
+        maxbytes = self.maxbytes if self.maxbytes is not None else SLABBUDGET
+        boxes = []
+        for r in sorted(requests,key=lambda r: r[1]):
+            lo2,hi2 = r[1],[o+n-1 for o,n in zip(r[1],r[2])]
+            if boxes:
+                lo1,hi1,m1 = boxes[-1]
+                lo = [min(a,b) for a,b in zip(lo1,lo2)]
+                hi = [max(a,b) for a,b in zip(hi1,hi2)]
+                volume = _product([b-a+1 for a,b in zip(lo,hi)])
+                waste = volume \
+                    - _product([b-a+1 for a,b in zip(lo1,hi1)]) \
+                    - _product(r[2])
+                if waste*itemsize <= allowance \
+                        and volume*itemsize <= maxbytes:
+                    m1.append(r)
+                    boxes[-1] = (lo,hi,m1)
+                    continue
+            boxes.append((lo2,hi2,[r]))
+        return boxes
+
+def _product(values):
+    """Product of python ints, which unlike numpy.prod cannot overflow"""
+    result = 1
+    for n in values:
+        result *= n
+    return result
+
+def _coalesce(points, nbytes):
+    """
+    Group sorted points, an integer array of shape (n,rank), into boxes to
+    be read as slabs, each element of the boxes being nbytes.
+
+    Returns a list of start,stop,lo,hi where points[start:stop] lie in the
+    box from lo to hi inclusive.  A box grows to take in the next point
+    while the unwanted elements it adds cost less to read at IORATE than
+    another read at CALLCOST, and it stays within SLABBUDGET.
+    """
+    allowance = CALLCOST*IORATE
+    boxes = []
+    start = 0
+    lo = hi = [int(k) for k in points[0]]
+    volume = 1
+    for i in range(1,len(points)):
+        p = [int(k) for k in points[i]]
+        newlo = [min(a,b) for a,b in zip(lo,p)]
+        newhi = [max(a,b) for a,b in zip(hi,p)]
+        newvolume = _product([b-a+1 for a,b in zip(newlo,newhi)])
+        if (newvolume-volume-1)*nbytes <= allowance \
+                and newvolume*nbytes <= SLABBUDGET:
+            lo,hi,volume = newlo,newhi,newvolume
+        else:
+            boxes.append((start,i,lo,hi))
+            start,lo,hi,volume = i,p,p,1
+    boxes.append((start,len(points),lo,hi))
+    return boxes
+
+def planchunks(shape, dtype, pattern='rows', nbytes=None):
+    """
+    Return the chunk dimensions for a dataset of the given shape and type
+    which will be accessed with the given pattern:
+
+        'rows'     runs of up to 100000 elements along the fastest varying
+                   dimension (the default chunking for tree writes)
+        'frames'   one frame over the last two dimensions per chunk
+        'columns'  long runs along the first dimension, for reading the
+                   series at fixed indices in the other dimensions
+        'tiles'    blocks of similar extent in every dimension
+        'append'   whole rows of the first dimension, for data which
+                   grows along the first dimension
+
+    Apart from 'rows', chunks are sized to hold about nbytes bytes
+    (default CHUNKBYTES), splitting frames and rows when they are larger.
+    UNLIMITED dimensions are treated as unbounded.
+
+    Raises ValueError if the pattern is not known.
+    """
+    extent = [int(n) if int(n) > 0 else sys.maxsize for n in shape]
+    rank = len(extent)
+    if rank == 0:
+        return []
+    itemsize = 1 if str(dtype) == 'char' else numpy.dtype(dtype).itemsize
+    if nbytes is None:
+        nbytes = CHUNKBYTES
+    target = max(1, nbytes//itemsize)
+
+    def shrink(dims):
+        # Halve the largest of the dims until the chunk fits
+        while _product(chunks) > target:
+            d = max(dims, key=lambda d: chunks[d])
+            if chunks[d] == 1:
+                break
+            chunks[d] = (chunks[d]+1)//2
+    def grow(dims):
+        # Extend the dims in turn until the chunk is full
+        for d in dims:
+            room = target//_product(chunks)
+            if room <= 1:
+                break
+            chunks[d] = min(extent[d], chunks[d]*room)
+
+    chunks = [1]*rank
+    if pattern == 'rows':
+        chunks[-1] = min(extent[-1], 100000)
+    elif pattern == 'frames':
+        frame = range(max(rank-2,0), rank)
+        for d in frame:
+            chunks[d] = extent[d]
+        shrink(frame)
+    elif pattern == 'columns':
+        chunks[0] = min(extent[0], target)
+        grow(range(rank-1, 0, -1))
+    elif pattern == 'tiles':
+        side = max(1, int(target**(1.0/rank)))
+        chunks = [min(n, side) for n in extent]
+        grow(range(rank-1, -1, -1))
+    elif pattern == 'append':
+        row = range(1, rank)
+        for d in row:
+            chunks[d] = extent[d]
+        shrink(row)
+        chunks[0] = max(1, min(extent[0], target//_product(chunks)))
+    else:
+        raise ValueError("Unknown access pattern %s" % str(pattern))
+    return chunks
+
+def _rlesize(raw):
+    """Estimated size of byte-wise run length encoding of raw"""
+    b = numpy.frombuffer(raw,'uint8')
+    if b.size == 0:
+        return 0
+    starts = numpy.flatnonzero(numpy.concatenate(([True],b[1:] != b[:-1])))
+    runs = numpy.diff(numpy.concatenate((starts,[b.size])))
+    repeats = runs[runs >= 3]
+    literals = runs[runs < 3].sum()
+    return int(2*numpy.ceil(repeats/128.).sum() + literals
+               + numpy.ceil(literals/128.))
+
+def _huffmansize(raw):
+    """Estimated size of byte-wise Huffman coding of raw"""
+    b = numpy.frombuffer(raw,'uint8')
+    if b.size == 0:
+        return 0
+    p = numpy.bincount(b,minlength=256)/float(b.size)
+    p = p[p > 0]
+    entropy = -(p*numpy.log2(p)).sum()
+    return int(numpy.ceil(b.size*max(entropy,1/8.)/8)) + 256
+
+def _timed(fn, samples):
+    """Return total result of fn over samples and the seconds it takes"""
+    repeat,elapsed = 0,0.
+    while elapsed < 0.01 and repeat < 100:
+        start = time.time()
+        result = sum(fn(raw) for raw in samples)
+        elapsed += time.time()-start
+        repeat += 1
+    return result,elapsed/repeat
+
+def _samplechunks(data, chunks, count):
+    """Return up to count chunks of data spread through the array as bytes"""
+    grid = [(n+c-1)//c for n,c in zip(data.shape,chunks)]
+    total = _product(grid)
+    samples = []
+    for k in sorted(set(int(i) for i in numpy.linspace(0,total-1,count))):
+        index = numpy.unravel_index(k,grid)
+        part = tuple(slice(i*c,(i+1)*c) for i,c in zip(index,chunks))
+        samples.append(numpy.ascontiguousarray(data[part]).tobytes())
+    return samples
+
+def choosecompression(data, objective='size', modes=('none','lzw'),
+                      chunks=None, samples=3):
+    """
+    Return the compression mode from modes which best meets the objective
+    for data, by compressing a few sample chunks with each mode.
+
+    The objective is 'size' for the smallest file, 'read' for the fastest
+    reads, or 'write' for the fastest writes.  Read and write times
+    include the time to transfer the compressed data at IORATE bytes/s
+    as well as the time to decode or encode it.  The samples are chunks
+    of the given shape (default from planchunks) taken from the start,
+    middle and end of the data.
+
+    'lzw' is measured with zlib, which implements the deflate filter
+    NeXus uses for it.  'rle' and 'huffman' have no codec here, so their
+    size is estimated from the runs and byte frequencies in the samples
+    and they are only considered for the 'size' objective.  If modes has
+    neither 'none' nor 'lzw', 'read' and 'write' choose by size.
+
+    Returns the mode, or 'none' if data is empty.
+
+    Raises ValueError if the objective or a mode is not known.
+    """
+    if objective not in ('size','read','write'):
+        raise ValueError("Unknown compression objective %s" % str(objective))
+    for mode in modes:
+        if mode not in _compression_code:
+            raise ValueError("Unknown compression mode %s" % str(mode))
+    data = numpy.asarray(data)
+    if data.size == 0:
+        return 'none'
+    if data.ndim == 0:
+        data = data.reshape(1)
+    if chunks is None:
+        chunks = planchunks(data.shape,data.dtype,'rows')
+    sample = _samplechunks(data,chunks,samples)
+    if objective != 'size':
+        timed = [mode for mode in modes if mode in ('none','lzw')]
+        if timed:
+            modes = timed
+        else:
+            objective = 'size'
+
+    best,bestcost = None,None
+    for mode in modes:
+        if mode == 'none':
+            size,encode = _timed(lambda s: len(bytes(s)),sample)
+            decode = encode
+        elif mode == 'lzw':
+            packed = [zlib.compress(s,6) for s in sample]
+            size,encode = _timed(lambda s: len(zlib.compress(s,6)),sample)
+            _,decode = _timed(lambda s: len(zlib.decompress(s)),packed)
+        elif mode == 'rle':
+            size = sum(_rlesize(s) for s in sample)
+        else:
+            size = sum(_huffmansize(s) for s in sample)
+        if objective == 'size':
+            cost = size
+        elif objective == 'read':
+            cost = decode + size/IORATE
+        else:
+            cost = encode + size/IORATE
+        if bestcost is None or cost < bestcost:
+            best,bestcost = mode,cost
+    return best
+
+class _ChunkCache(object):
+    """
+    Least recently used cache of the chunks of chunked datasets, keyed
+    by (path, chunk index), holding at most maxbytes of data.
+    """
+    def __init__(self, maxbytes):
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self._chunks = collections.OrderedDict()
+
+    def get(self, key):
+        chunk = self._chunks.pop(key, None)
+        if chunk is not None:
+            self._chunks[key] = chunk
+        return chunk
+
+    def put(self, key, chunk):
+        old = self._chunks.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self._chunks[key] = chunk
+        self.nbytes += chunk.nbytes
+        self.trim()
+
+    def trim(self):
+        while self._chunks and self.nbytes > self.maxbytes:
+            self.nbytes -= self._chunks.popitem(last=False)[1].nbytes
+
+    def invalidate(self, path):
+        for key in [key for key in self._chunks if key[0] == path]:
+            self.nbytes -= self._chunks.pop(key).nbytes
+
+    def clear(self):
+        self._chunks.clear()
+        self.nbytes = 0
+
+class NeXusPath(object):
+    """
+    A parsed path within a NeXus file.
+
+    Paths are written '/entry/data/counts', optionally with the class of
+    each level as in '/entry:NXentry/data:NXdata/counts:SDS'.  Relative
+    paths, '.' and '..' are supported.  Parsing a path once and passing
+    the NeXusPath to NeXus.openpath avoids parsing it on every call.
+
+    Attributes are text, absolute and levels, with levels a tuple of
+    (name,nxclass) pairs and nxclass None when it is not given.
+    """
+    def __init__(self, path):
+        self.text = path
+        self.absolute = path.startswith('/')
+        levels = []
+        for item in path.split('/'):
+            if item in ('','.'):
+                continue
+            if item == '..':
+                if levels and levels[-1][0] != '..':
+                    levels.pop()
+                elif self.absolute:
+                    raise ValueError("too many '..' in path")
+                else:
+                    levels.append(('..',None))
+            else:
+                name,_,nxclass = item.partition(':')
+                levels.append((name,nxclass if nxclass else None))
+        self.levels = tuple(levels)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return "NeXusPath('%s')"%self.text
+
+    def resolve(self, current):
+        """
+        Return the list of (name,nxclass) levels reached by following
+        this path from the current levels.
+        """
+        if self.absolute:
+            return list(self.levels)
+        target = list(current)
+        for level in self.levels:
+            if level[0] != '..':
+                target.append(level)
+            elif target:
+                target.pop()
+            else:
+                raise ValueError("too many '..' in path")
+        return target
+
+# Parsed paths, so that openpath on a path string only parses it once
+_pathcache = {}
+def _parsepath(path):
+    """
+    Return the NeXusPath for the path string, reusing earlier parses.
+    """
+    try:
+        return _pathcache[path]
+    except KeyError:
+        pass
+    parsed = NeXusPath(path)
+    if len(_pathcache) >= 1024:
+        _pathcache.clear()
+    _pathcache[path] = parsed
+    return parsed
+
+# Record returned by NeXus.scandir for each entry in a group
+NeXusEntry = collections.namedtuple('NeXusEntry',
+    'name nxclass shape dtype attrs target value')
+
 class NeXus(object):
 
     # ==== File ====
     nxlib.nxiopen_.restype = c_int
     nxlib.nxiopen_.argtypes = [c_char_p, c_int, c_void_pp]
-    def __init__(self, filename, mode='r'):
+    def __init__(self, filename, mode='r', defer=False):
         """
         Open the NeXus file returning a handle.
 
@@ -353,12 +2097,21 @@ class NeXus(object):
             nxs.ACC_CREATE5   'w5'    open a Nexus file with HDF5
             nxs.ACC_CREATEXML 'wx'    open a Nexus file with XML
 
+        If defer is True, the file is not opened until open() is called.
+        This is only allowed for modes 'r' and 'rw'.
+
         Raises ValueError if the open mode is invalid.
 
         Raises NeXusError if the file could not be opened, with the
         filename as part of the error message.
 
         Corresponds to NXopen(filename,mode,&handle)
+
+        The handle holds a lock around calls into the library, chosen
+        according to setlockmode.  If the handle cache is enabled with
+        sethandlecache, a cached handle for the file is used when the
+        file is opened read-only, and cached handles for the file are
+        closed when it is opened for writing.
         """
         self.isopen = False
 
@@ -366,12 +2119,33 @@ class NeXus(object):
         if mode in _nxopen_mode: mode = _nxopen_mode[mode]
         if mode not in _nxopen_mode.values():
             raise ValueError("Invalid open mode %s" % str(mode))
+        if defer and mode not in (ACC_READ,ACC_RDWR):
+            raise ValueError("Cannot defer opening %s for writing" % filename)
 
         self.filename, self.mode = filename, mode
         self.handle = c_void_p(None)
+        self.lock = _newlock()
+        self._dircache = {}
+        self._chunkinfo = {}
+        self._unlimited = {}
+        self._mapinfo = {}
+        self._chunkcache = _ChunkCache(CHUNKCACHE)
         self._path = []
         self._indata = False
-        status = nxlib.nxiopen_(filename,mode,_ref(self.handle))
+        self._dtype = self._shape = None
+        if defer:
+            return
+        with self.lock:
+            handle = None
+            if mode == ACC_READ:
+                handle = _handlecache.revive(filename,mode)
+            else:
+                _handlecache.discard(filename)
+            if handle is not None:
+                self.handle = handle
+                status = OK
+            else:
+                status = nxlib.nxiopen_(filename,mode,_ref(self.handle))
         if status == ERROR:
             if mode in [ACC_READ, ACC_RDWR]:
                 op = 'open'
@@ -405,6 +2179,7 @@ class NeXus(object):
         return "NeXus('%s')"%self.filename
 
 
+    @_synchronized
     def open(self):
         """
         Opens the NeXus file handle if it is not already open.
@@ -416,16 +2191,28 @@ class NeXus(object):
         if self.isopen: return
         if self.mode==ACC_READ:
             mode = ACC_READ
+            handle = _handlecache.revive(self.filename,mode)
         else:
             mode = ACC_RDWR
-        status = nxlib.nxiopen_(self.filename,mode,_ref(self.handle))
-        if status == ERROR:
-            raise NeXusError("Could not open %s" % (self.filename))
+            handle = None
+            _handlecache.discard(self.filename)
+        if handle is not None:
+            self.handle = handle
+        else:
+            status = nxlib.nxiopen_(self.filename,mode,_ref(self.handle))
+            if status == ERROR:
+                raise NeXusError("Could not open %s" % (self.filename))
+        self.isopen = True
+        self._dircache = {}
+        self._mapinfo = {}
+        self._chunkcache.clear()
         self._path = []
         self._indata = False
+        self._dtype = self._shape = None
 
     nxlib.nxiclose_.restype = c_int
     nxlib.nxiclose_.argtypes = [c_void_pp]
+    @_synchronized
     def close(self):
         """
         Close the NeXus file associated with handle.
@@ -433,18 +2220,46 @@ class NeXus(object):
         Raises NeXusError if file could not be closed.
 
         Corresponds to NXclose(&handle)
+
+        If the handle cache is enabled and the file is open read-only,
+        the handle is kept open for reuse by a later open of the file.
         """
         if self.isopen:
             self.isopen = False
-            status = nxlib.nxiclose_(_ref(self.handle))
-            if status == ERROR:
-                raise NeXusError("Could not close NeXus file %s" %
-                                 (self.filename))
+            if (_handlecache.maxopen > 0 and self.mode == ACC_READ
+                    and self._park()):
+                self.handle = c_void_p(None)
+            else:
+                status = nxlib.nxiclose_(_ref(self.handle))
+                if status == ERROR:
+                    raise NeXusError("Could not close NeXus file %s" %
+                                     (self.filename))
+        self._dircache = {}
+        self._mapinfo = {}
+        self._chunkcache.clear()
         self._path = []
         self._indata = False
+        self._dtype = self._shape = None
+
+    def _park(self):
+        """
+        Return the read-only handle to the root of the file and place it
+        in the handle cache.  Returns False if the handle could not be
+        parked.
+        """
+        if self._indata:
+            status = nxlib.nxiclosedata_(self.handle)
+            if status == ERROR:
+                return False
+        for _ in range(len(self._path) - (1 if self._indata else 0)):
+            status = nxlib.nxiclosegroup_(self.handle)
+            if status == ERROR:
+                return False
+        return _handlecache.park(self.filename,ACC_READ,self.handle)
 
     nxlib.nxiflush_.restype = c_int
     nxlib.nxiflush_.argtypes = [c_void_pp]
+    @_synchronized
     def flush(self):
         """
         Flush all data to the NeXus file.
@@ -459,6 +2274,7 @@ class NeXus(object):
 
     nxlib.nxisetnumberformat_.restype = c_int
     nxlib.nxisetnumberformat_.argtypes = [c_void_p, c_int, c_char_p]
+    @_synchronized
     def setnumberformat(self,type,format):
         """
         Set the output format for the numbers of the given type (only
@@ -477,6 +2293,7 @@ class NeXus(object):
     # ==== Group ====
     nxlib.nximakegroup_.restype = c_int
     nxlib.nximakegroup_.argtypes = [c_void_p, c_char_p, c_char_p]
+    @_synchronized
     def makegroup(self, name, nxclass):
         """
         Create the group nxclass:name.
@@ -487,12 +2304,14 @@ class NeXus(object):
         """
         # print("makegroup", self._loc(), name, nxclass)
         status = nxlib.nximakegroup_(self.handle, name, nxclass)
+        self._dircache.pop(self.path, None)
         if status == ERROR:
             raise NeXusError("Could not create %s:%s in %s" %
                              (nxclass, name, self._loc()))
 
     nxlib.nxiopenpath_.restype = c_int
     nxlib.nxiopenpath_.argtypes = [c_void_p, c_char_p]
+    @_synchronized
     def openpath(self, path):
         """
         Open a particular group '/path/to/group'.  Paths can be
@@ -503,92 +2322,43 @@ class NeXus(object):
         which will prevent searching the file for the types associated
         with the supplied names.
 
-        Raises ValueError.
+        The path can also be a NeXusPath, which saves parsing the path
+        string again when the same path is opened repeatedly.
 
-        Corresponds to NXopenpath(handle, path)
-        """
-        self._openpath(path, opendata=True)
+        Only the levels which differ from the currently open path are
+        closed and reopened.  The names and classes in each group are
+        cached on first use, so opening a path costs one call to NeXus
+        per level once the groups along it have been seen.
 
-    def _openpath(self, path, opendata=True):
-        """helper function: open relative path and maybe data"""
-        # Determine target node as sequence of group names
-        if path == '/':
-            target = []
-        else:
-            if path.endswith("/"):
-                path = path[:-1]
-            if path.startswith('/'):
-                target = path[1:].split('/')
-            else:
-                target = self._path + path.split('/')
+        Raises ValueError.
 
-        # Remove relative path indicators from target
-        L = []
-        for t in target:
-            if t == '.':
-                # Skip current node
-                pass
-            elif t == '..':
-                if L == []:
-                    raise ValueError("too many '..' in path")
-                L.pop()
-            else:
-                L.append(t)
-        target = L
+        Corresponds to NXopenpath(handle, path)
+        """
+        self._openpath(path, opendata=True)
 
-        # split out nxclass from each level if available
-        L = []
-        for t in target:
-            try:
-                item = t.split(":")
-                if len(item) == 1:
-                    L.append((item[0], None))
-                else:
-                    L.append(tuple(item))
-            except AttributeError:
-                L.append(t)
-        target = L
-
-        # print("current path", self._path)
-        # print("%s" % path, target)
-
-        # Find which groups need to be closed and opened
-        up = []
-        down = []
-        for (i, (name, nxclass)) in enumerate(target):
-            if i == len(self._path):
-                # print("target longer than current")
-                up = []
-                down = target[i:]
-                break
-            elif self._path[i] != name:
-                # print("target and current differ at", name)
-                up = self._path[i:]
-                down = target[i:]
+    def _openpath(self, path, opendata=True):
+        """helper function: open relative path and maybe data"""
+        if not isinstance(path, NeXusPath):
+            path = _parsepath(path)
+        target = path.resolve(self._path)
+
+        # Keep the levels shared with the current path
+        n = 0
+        for (name,nxclass),(current,currentclass) in zip(target,self._path):
+            if name != current or nxclass not in (None,currentclass):
                 break
-        else:
-            # print("target shorter than current")
-            up = self._path[len(target):]
-            down = []
-
-        # add more information to the down path
-        for i in xrange(len(down)):
-            try:
-                (name, nxclass) = down[i]
-            except ValueError:
-                down[i] = (down[i], None)
-        # print("close,open", up, down)
+            n += 1
+        # print("current path", self._path, "keep", n, "open", target[n:])
 
         # Close groups on the way up
-        if self._indata and up != []:
-            self.closedata()
-            up.pop()
-        for target in up:
-            self.closegroup()
+        while len(self._path) > n:
+            if self._indata:
+                self.closedata()
+            else:
+                self.closegroup()
 
         # Open groups on the way down
-        for target in down:
-            (name, nxclass) = target
+        for name,nxclass in target[n:]:
             if nxclass is None:
                 nxclass = self.__getnxclass(name)
             if nxclass != "SDS":
@@ -598,6 +2368,53 @@ class NeXus(object):
             else:
                 raise ValueError("node %s not in %s" % (name, self.path))
 
+    def readpaths(self, paths, skipmissing=False):
+        """
+        Return a dictionary of the data at each of the paths, keyed by
+        the paths as given.
+
+        The paths are sorted by hierarchy and read in one session, so
+        each group is opened once however many fields are read from it.
+        The file is opened if needed and left as it was found, with the
+        same path open.
+
+        Raises NeXusError or ValueError if a path cannot be read, unless
+        skipmissing is True, in which case the path is left out.
+
+        This does not correspond to an existing NeXus API function, but
+        combines openpath and getdata for many paths.
+        """
+        wasopen = self.isopen
+        self.open()
+        results = {}
+        with self.lock:
+            start = list(self._path)
+            targets = []
+            for path in paths:
+                parsed = path if isinstance(path, NeXusPath) \
+                    else _parsepath(path)
+                levels = parsed.resolve(start)
+                text = '/'+'/'.join(name if nxclass is None
+                                    else name+':'+nxclass
+                                    for name,nxclass in levels)
+                targets.append(([name for name,_ in levels],text,path))
+            targets.sort(key=lambda target: target[0])
+            try:
+                for _,text,path in targets:
+                    try:
+                        self._openpath(_parsepath(text))
+                        results[path] = self.getdata()
+                    except (NeXusError,ValueError):
+                        if not skipmissing:
+                            raise
+            finally:
+                if wasopen:
+                    self._openpath(NeXusPath('/'+'/'.join(
+                        name+':'+nxclass for name,nxclass in start)))
+                else:
+                    self.close()
+        return results
+
     nxlib.nxiopengrouppath_.restype = c_int
     nxlib.nxiopengrouppath_.argtypes = [c_void_p, c_char_p]
     def opengrouppath(self, path):
@@ -614,6 +2431,7 @@ class NeXus(object):
 
     nxlib.nxiopengroup_.restype = c_int
     nxlib.nxiopengroup_.argtypes = [c_void_p, c_char_p, c_char_p]
+    @_synchronized
     def opengroup(self, name, nxclass=None):
         """
         Open the group nxclass:name. If the nxclass is not specified
@@ -634,6 +2452,7 @@ class NeXus(object):
 
     nxlib.nxiclosegroup_.restype = c_int
     nxlib.nxiclosegroup_.argtypes = [c_void_p]
+    @_synchronized
     def closegroup(self):
         """
         Close the currently open group.
@@ -652,6 +2471,7 @@ class NeXus(object):
 
     nxlib.nxigetgroupinfo_.restype = c_int
     nxlib.nxigetgroupinfo_.argtypes = [c_void_p, c_int_p, c_char_p, c_char_p]
+    @_synchronized
     def getgroupinfo(self):
         """
         Query the currently open group returning the tuple
@@ -678,6 +2498,7 @@ class NeXus(object):
 
     nxlib.nxiinitgroupdir_.restype = c_int
     nxlib.nxiinitgroupdir_.argtypes = [c_void_p]
+    @_synchronized
     def initgroupdir(self):
         """
         Reset getnextentry to return the first entry in the group.
@@ -692,6 +2513,7 @@ class NeXus(object):
 
     nxlib.nxigetnextentry_.restype = c_int
     nxlib.nxigetnextentry_.argtypes = [c_void_p, c_char_p, c_char_p, c_int_p]
+    @_synchronized
     def getnextentry(self):
         """
         Return the next entry in the group as name,nxclass tuple. If
@@ -730,31 +2552,36 @@ class NeXus(object):
         Return a dictionary of the groups[name]=type below the
         existing open one.
 
+        The result is also remembered for looking up classes when
+        opening paths, until the group is changed with makegroup,
+        makedata or makelink.
+
         Raises NeXusError if this fails.
         """
         self.initgroupdir()
         result = {}
         (name, nxclass) = self.getnextentry()
-        if (name, nxclass) != (None, None):
-            result[name] = nxclass
         while (name, nxclass) != (None, None):
             result[name] = nxclass
             (name, nxclass) = self.getnextentry()
-        return result
+        self._dircache[self.path] = result
+        return dict(result)
 
     def __getnxclass(self, target):
         """
         Return the nxclass of the supplied name.
+
+        Uses the cached listing of the current group, scanning the group
+        only if it has not been scanned or the name is not in it.
         """
-        self.initgroupdir()
-        while True:
-            (nxname, nxclass) = self.getnextentry()
-            if nxname == target:
-                return nxclass
-            if nxname is None:
-                break
-        raise NeXusError("Failed to find entry with name \"%s\" at %s" %
-                         (target, self.path))
+        entries = self._dircache.get(self.path)
+        if entries is None or target not in entries:
+            entries = self.getentries()
+        try:
+            return entries[target]
+        except KeyError:
+            raise NeXusError("Failed to find entry with name \"%s\" at %s" %
+                             (target, self.path))
 
     def entries(self):
         """
@@ -794,9 +2621,79 @@ class NeXus(object):
                 self.opengroup(name,nxclass)
             yield name,nxclass
 
+    def scandir(self, attrs=True, values=0, groups=True):
+        """
+        Iterator of entry records.
+
+        for entry in nxs.scandir():
+            process(entry.name,entry.nxclass,entry.shape,entry.dtype)
+
+        Scans the current group once, returning a NeXusEntry record
+        with fields name, nxclass, shape, dtype, attrs, target and value
+        for each entry.  Datasets are opened just long enough to read
+        their shape and type, and their attributes if attrs is True.
+        If values is nonzero, datasets with fewer than values elements
+        are also read.  Groups have shape and dtype None, and if attrs
+        and groups are True they are opened to read their attributes.
+        Target is the path of the linked object for links, otherwise
+        None, and is only known if the attributes are read.  Fields
+        which are not read are None.  Entries in nxs.H4SKIP are ignored.
+
+        The current group is open between entries, and other groups
+        may be opened and closed while processing an entry, but the
+        group must not be changed while processing the list.
+
+        This does not correspond to an existing NeXus API function,
+        but combines the work of initgroupdir/getnextentry with
+        getinfo, attrs and getdata on each entry.
+        """
+        path = self.path
+        prefix = path.rstrip('/')+'/'
+        listing = {}
+        self.initgroupdir()
+        while True:
+            name,nxclass = self.getnextentry()
+            if name is None:
+                break
+            listing[name] = nxclass
+            if nxclass in H4SKIP:
+                continue
+            shape = dtype = entryattrs = target = value = None
+            if nxclass == "SDS":
+                self.opendata(name)
+                try:
+                    shape,dtype = self.getinfo()
+                    if attrs:
+                        entryattrs = self.getattrs()
+                        target = entryattrs.get('target')
+                        if target == prefix+name:
+                            target = None
+                        self._chunkinfo[prefix+name] = _parsechunks(
+                            entryattrs.get('chunk_shape'), len(shape))
+                    if values and target is None \
+                            and numpy.prod(shape) < values:
+                        try:
+                            value = self.getdata()
+                        except ValueError:
+                            value = None
+                finally:
+                    self.closedata()
+            elif attrs and groups:
+                self.opengroup(name,nxclass)
+                try:
+                    entryattrs = self.getattrs()
+                    target = entryattrs.get('target')
+                    if target == prefix+name:
+                        target = None
+                finally:
+                    self.closegroup()
+            yield NeXusEntry(name,nxclass,shape,dtype,entryattrs,target,value)
+        self._dircache[path] = listing
+
     # ==== Data ====
     nxlib.nxigetrawinfo64_.restype = c_int
     nxlib.nxigetrawinfo64_.argtypes = [c_void_p, c_int_p, c_void_p, c_int_p]
+    @_synchronized
     def getrawinfo(self):
         """
         Returns the tuple dimensions,type for the currently open dataset.
@@ -830,6 +2727,7 @@ class NeXus(object):
 
     nxlib.nxigetinfo64_.restype = c_int
     nxlib.nxigetinfo64_.argtypes = [c_void_p, c_int_p, c_void_p, c_int_p]
+    @_synchronized
     def getinfo(self):
         """
         Returns the tuple dimensions,type for the currently open dataset.
@@ -867,6 +2765,7 @@ class NeXus(object):
 
     nxlib.nxiopendata_.restype = c_int
     nxlib.nxiopendata_.argtypes = [c_void_p, c_char_p]
+    @_synchronized
     def opendata(self, name):
         """
         Open the named data set within the current group.
@@ -884,9 +2783,87 @@ class NeXus(object):
             raise ValueError("Could not open data %s: %s" % (name, self._loc()))
         self._path.append((name,"SDS"))
         self._indata = True
+        self._dtype = self._shape = None
+
+    def opendataset(self, name, slab=None):
+        """
+        Open the named data set within the current group and return a
+        DatasetHandle for fast slab access.  See DatasetHandle for the
+        meaning of slab.
+
+        Raises ValueError if could not open the dataset.
+
+        This does not correspond to an existing NeXus API function.
+        """
+        self.opendata(name)
+        return DatasetHandle(self, slab)
+
+    def appender(self, name, rows=None):
+        """
+        Open the named data set within the current group and return an
+        Appender which adds rows to its UNLIMITED first dimension, holding
+        up to rows rows in memory between writes.
+
+        Raises ValueError if could not open the dataset, if its first
+        dimension is not UNLIMITED or if rows is less than one.  NeXus
+        cannot report whether a dimension is UNLIMITED, so this is only
+        checked for data created by this handle, or found with h5py.
+
+        This does not correspond to an existing NeXus API function.
+        """
+        self.opendata(name)
+        try:
+            return Appender(self, rows)
+        except:
+            self.closedata()
+            raise
+
+    def _recordunlimited(self, name, shape):
+        """
+        Record whether the first dimension of the data created in the
+        current group is UNLIMITED, which NeXus cannot report.
+        """
+        if len(shape) > 0:
+            self._unlimited[self.path.rstrip('/')+'/'+name] = \
+                int(shape[0]) == UNLIMITED
+
+    def _isunlimited(self):
+        """
+        Return True if the first dimension of the open data is UNLIMITED,
+        False if it is not, or None if this cannot be told.
+        """
+        path = self.path
+        if path not in self._unlimited:
+            maxshape = _hdf5maxshape(self.filename, path)
+            self._unlimited[path] = (None if maxshape is None
+                                     else len(maxshape) > 0
+                                     and maxshape[0] is None)
+        return self._unlimited[path]
+
+    def _getdtype(self):
+        """
+        Return the storage type of the open dataset, only asking NeXus
+        the first time since it cannot change while the dataset is open.
+        The shape is recorded at the same time until the next write.
+        """
+        if self._dtype is None:
+            shape,self._dtype = self.getrawinfo()
+            self._shape = [int(n) for n in shape]
+        return self._dtype
+
+    def _getshape(self):
+        """
+        Return the shape of the open dataset, asking NeXus only after
+        a write may have extended it.
+        """
+        if self._dtype is None or self._shape is None:
+            shape,self._dtype = self.getrawinfo()
+            self._shape = [int(n) for n in shape]
+        return self._shape
 
     nxlib.nxiclosedata_.restype = c_int
     nxlib.nxiclosedata_.argtypes = [c_void_p]
+    @_synchronized
     def closedata(self):
         """
         Close the currently open data set.
@@ -902,10 +2879,12 @@ class NeXus(object):
             raise NeXusError("Could not close data at %s" % (self._loc()))
         self._path.pop()
         self._indata = False
+        self._dtype = self._shape = None
 
     nxlib.nximakedata64_.restype = c_int
     nxlib.nximakedata64_.argtypes  = [c_void_p, c_char_p, c_int, c_int, c_int64_p]
-    def makedata(self, name, dtype=None, shape=None):
+    @_synchronized
+    def makedata(self, name, dtype=None, shape=None, value=None, attrs=None):
         """
         Create a data element of the given type and shape.  See getinfo
         for details on types.  This does not open the data for writing.
@@ -913,34 +2892,89 @@ class NeXus(object):
         Set the first dimension to nxs.UNLIMITED, for extensible data sets,
         and use putslab to write individual slabs.
 
+        If value or attrs is given, the data is opened, the attributes
+        and the value are written, and the data is closed again.  Attrs
+        maps names to values, or to (value,dtype) pairs.  The type and
+        shape default to those of the value; strings are stored as 'char'.
+
         Raises ValueError if it fails.
 
-        Corresponds to NXmakedata(handle,name,type,rank,dims)
+        Corresponds to NXmakedata(handle,name,type,rank,dims), followed by
+        NXopendata, NXputattr, NXputdata and NXclosedata when writing a
+        value or attributes.
         """
         # TODO: With keywords for compression and chunks, this can act as
         # TODO: compmakedata.
-        # TODO: With keywords for value and attr, this can be used for
-        # TODO: makedata, opendata, putdata, putattr, putattr, ..., closedata
         # print("makedata", self._loc(), name, shape, dtype)
+        if value is not None:
+            value,dtype,shape = _datainfo(value,dtype,shape)
         storage = _nxtype_code[str(dtype)]
         shape = numpy.asarray(shape,'int64')
         status = nxlib.nximakedata64_(self.handle,name,storage,len(shape),
                                       shape.ctypes.data_as(c_int64_p))
+        self._dircache.pop(self.path, None)
         if status == ERROR:
             raise ValueError("Could not create data %s: %s" %
                              (name,self._loc()))
+        self._recordunlimited(name, shape)
+        if value is not None or attrs:
+            self.opendata(name)
+            try:
+                self._putattrs(attrs)
+                if value is not None:
+                    self._putdata(value,str(dtype),list(shape))
+            finally:
+                self.closedata()
+
+    @_synchronized
+    def makestrings(self, name, strings, codes=None, encoding='utf-8'):
+        """
+        Create and write a string column, a 'char' dataset with one fixed
+        width string per row, wide enough for the longest string.
+
+        Strings is a sequence or numpy array of str, unicode or bytes.  If
+        codes is given, strings holds the categories and row i is
+        strings[codes[i]].  Unicode is encoded with encoding.  The strings
+        are converted and packed with numpy array operations, so columns
+        of millions of rows are written in one call.  See putstrings.
+
+        Raises ValueError if this fails.
+
+        This does not correspond to an existing NeXus API function, but
+        combines makedata, opendata, putdata and closedata.
+        """
+        data = _encodestrings(strings, encoding)
+        if codes is not None:
+            data = data[numpy.asarray(codes)]
+        shape = list(data.shape) + [data.dtype.itemsize]
+        self.makedata(name,'char',shape)
+        self.opendata(name)
+        try:
+            self.putdata(data)
+        finally:
+            self.closedata()
 
     nxlib.nxicompmakedata64_.restype = c_int
     nxlib.nxicompmakedata64_.argtypes  = [c_void_p, c_char_p, c_int, c_int, c_int64_p,
                                           c_int, c_int64_p]
+    @_synchronized
     def compmakedata(self, name, dtype=None, shape=None, mode='lzw',
-                     chunks=None):
+                     chunks=None, sample=None, objective='size'):
         """
         Create a data element of the given dimensions and type.  See
         getinfo for details on types.  Compression mode is one of
         'none', 'lzw', 'rle' or 'huffman'.  chunks gives the alignment
         of the compressed chunks in the data file.  There should be one
-        chunk size for each dimension in the data.
+        chunk size for each dimension in the data, or chunks can name
+        the access pattern for planchunks, such as 'frames'.  The chunk
+        size is recorded in the chunk_shape attribute of the data, as a
+        string such as '1,1024', and is returned by getchunks.
+
+        With mode='auto' the compression is chosen by choosecompression
+        from the modes the file format supports, using sample (typically
+        the data to be written) and objective ('size', 'read' or
+        'write').  Without a sample 'lzw' is used.  The mode is recorded
+        in the compression attribute of the data.
 
         Defaults to mode='lzw' with chunk size set to the length of the
         fastest varying dimension.
@@ -949,6 +2983,22 @@ class NeXus(object):
 
         Corresponds to NXmakedata(handle,name,type,rank,dims).
         """
+        attrs = self._compmakedata(name,dtype,shape,mode,chunks,
+                                   sample,objective)
+        # NeXus cannot report the chunk shape, so record it for readers
+        self.opendata(name)
+        try:
+            self._putattrs(attrs)
+        finally:
+            self.closedata()
+
+    def _compmakedata(self, name, dtype, shape, mode='lzw', chunks=None,
+                      sample=None, objective='size'):
+        """
+        Create the compressed data element without opening it, returning
+        the chunk_shape and, for mode='auto', compression attributes
+        to write to it.
+        """
         storage = _nxtype_code[str(dtype)]
         # Make sure shape/chunk_shape are integers; hope that 32/64 bit issues
         # with the c int type sort themselves out.
@@ -956,19 +3006,89 @@ class NeXus(object):
         if chunks is None:
             chunks = numpy.ones(dims.shape,'int64')
             chunks[-1] = shape[-1]
+        elif isinstance(chunks, six.string_types):
+            chunks = numpy.array(planchunks(shape,dtype,chunks),'int64')
         else:
             chunks = numpy.array(chunks,'int64')
+        auto = (mode == 'auto')
+        if auto:
+            if sample is None:
+                mode = 'lzw'
+            else:
+                mode = choosecompression(sample,objective,self._compressionmodes(),
+                                         [int(c) for c in chunks])
         status = nxlib.nxicompmakedata64_(self.handle,name,storage,len(dims),
                                           dims.ctypes.data_as(c_int64_p),
                                           _compression_code[mode],
                                           chunks.ctypes.data_as(c_int64_p))
+        self._dircache.pop(self.path, None)
         if status == ERROR:
             raise ValueError("Could not create compressed data %s: %s" %
                              (name, self._loc()))
+        self._chunkinfo[self.path.rstrip('/')+'/'+name] = \
+            [int(n) for n in chunks]
+        self._recordunlimited(name, dims)
+        attrs = [('chunk_shape',','.join(str(n) for n in chunks))]
+        if auto:
+            attrs.append(('compression',mode))
+        return attrs
+
+    def _compressionmodes(self):
+        """
+        Return the compression modes supported by the file format, which
+        is only known for files created by this handle.
+        """
+        if self.mode in (ACC_CREATE,ACC_CREATE4):
+            return ('none','lzw','rle','huffman')
+        elif self.mode == ACC_CREATEXML:
+            return ('none',)
+        else:
+            return ('none','lzw')
+
+    @_synchronized
+    def maketree(self, spec):
+        """
+        Create the groups, data, attributes and links described by spec
+        in the current group and return the number of calls made to NeXus.
+
+        Spec maps names to entries, each of which is one of::
+
+            {'nxclass':'NXentry', 'attrs':{...}, 'entries':{...}}
+            {'link':'/entry/instrument/detector/counts'}
+            {'value':v, 'dtype':'float32', 'shape':[...], 'attrs':{...},
+             'compression':'lzw', 'chunks':[...]}
+            v
+
+        for a group, a link, or data with its value v.  Attrs are as for
+        makedata, and the type and shape of data default to those of the
+        value.  Data is compressed with compmakedata if compression or
+        chunks is given.  Spec can also be an NXgroup from nxs.tree, which
+        is written into the current group, or an NXroot, whose entries are.
+
+        The tree is written in one depth first pass: each node is created,
+        opened, written and closed once, and the ids of link targets are
+        captured while they are open, so no path is reopened.  Links are
+        made as soon as their target has been written; the groups holding
+        links to later targets are reentered at the end of the pass.  Link
+        targets are absolute paths of nodes in spec.
+
+        Raises NeXusError if a link target is not in spec, or the error
+        from the call that failed, leaving the nodes written before it.
+
+        This does not correspond to an existing NeXus API function, but
+        combines makegroup, makedata, putattr, putdata and makelink.
+        """
+        if hasattr(spec, 'nxclass'):
+            from .tree import _treespec
+            spec = _treespec(spec)
+        writer = _TreeWriter(self)
+        writer.write(spec)
+        return writer.calls
 
     nxlib.nxigetdata_.restype = c_int
     nxlib.nxigetdata_.argtypes = [c_void_p, c_void_p]
-    def getdata(self):
+    @_synchronized
+    def getdata(self, out=None):
         """
         Return the data.  If data is a string (1-D char array), a python
         string is returned.  If data is a scalar (1-D numeric array of
@@ -977,35 +3097,152 @@ class NeXus(object):
         length is returned.  If data is a numeric array, a numpy array
         is returned.
 
+        If out is given the data is read into it and out is returned.  It
+        must be a C-contiguous writable numpy array of the dataset type
+        with the same number of elements as the dataset (for strings, an
+        'S#' array with one element per string).  Alternatively, out can
+        be a BufferPool, in which case a pooled buffer is filled and
+        returned.
+
         Raises ValueError if this fails.
 
         Corresponds to NXgetdata(handle, data)
         """
-        # TODO: consider accepting preallocated data so we don't thrash memory
         shape,dtype = self.getinfo()
-        dummy_data,pdata,dummy_size,datafn = self._poutput(dtype,shape)
+        dummy_data,pdata,size,datafn = self._poutput(dtype,shape,out)
         status = nxlib.nxigetdata_(self.handle,pdata)
         if status == ERROR:
             raise ValueError("Could not read data: %s" % (self._loc()))
+        _transferred(self, size)
         # print("getdata", self._loc(), shape, dtype)
         return datafn()
 
+    def mapdata(self):
+        """
+        Return the data as a read-only numpy.memmap of the file, so that
+        only the pages touched are read from disk.
+
+        Mapping needs h5py to find where the data is stored, and is only
+        possible for numeric datasets which are stored contiguously
+        without compression in a file opened read-only.  Otherwise the
+        data is read with getdata as a numpy array.  Unlike getdata,
+        scalars are returned as arrays of length one.  The layout is
+        found by opening the file again with h5py alongside this handle;
+        see _hdf5layout.
+
+        Raises ValueError if the data cannot be read.
+
+        This is an extension to the NeXus API.
+        """
+        layout = self._getmapping()
+        if layout is None:
+            return numpy.asarray(self.getdata())
+        offset,dtype,shape = layout
+        return numpy.memmap(self.filename, dtype=dtype, mode='r',
+                            offset=offset, shape=shape)
+
+    def _getmapping(self):
+        """
+        Return offset,dtype,shape of the open dataset in the file, or None
+        if it cannot be mapped.
+        """
+        path = self.path
+        if path not in self._mapinfo:
+            self._mapinfo[path] = None
+            shape,dtype = self.getinfo()
+            if self.mode == ACC_READ and dtype != 'char' \
+                    and numpy.prod(shape) > 0:
+                self._mapinfo[path] = _hdf5layout(self.filename, path)
+        return self._mapinfo[path]
+
+    @_synchronized
+    def getstrings(self, strip=True, encoding=None, categorical=False):
+        """
+        Return the strings in the open 'char' dataset as a numpy array.
+
+        Each row of the last dimension is one string, so an N x L dataset
+        gives N strings, and a 1-D dataset gives a 0-d array.  The strings
+        are read directly into an 'S' array.  If strip is True, trailing
+        nulls and white space are removed and the array is narrowed to
+        the longest string.  If encoding is given the strings are decoded
+        into a 'U' array.  These steps are numpy array operations, with no
+        python loop over the strings.
+
+        If categorical is True, categories,codes is returned instead, with
+        categories the sorted distinct strings and codes the smallest
+        unsigned integer array such that categories[codes] are the
+        strings.  This suits columns of labels with few distinct values.
+
+        Raises ValueError if the dataset is not a string or cannot be read.
+
+        This is an extension to the NeXus API.
+        """
+        shape,dtype = self.getrawinfo()
+        if dtype != 'char':
+            raise ValueError("Data is not a string: %s" % (self._loc()))
+        shape = [int(n) for n in shape]
+        data = numpy.zeros(shape[:-1], dtype='S%d'%max(1,shape[-1]))
+        if data.size > 0 and shape[-1] > 0:
+            status = nxlib.nxigetdata_(self.handle,data.ctypes.data)
+            if status == ERROR:
+                raise ValueError("Could not read data: %s" % (self._loc()))
+            _transferred(self, data.nbytes)
+        if strip:
+            data = numpy.asarray(numpy.char.rstrip(data))
+            width = numpy.char.str_len(data).max() if data.size else 1
+            data = data.astype('S%d'%max(1,width))
+        if encoding is not None:
+            data = _decodestrings(data, encoding)
+        if categorical:
+            categories,codes = numpy.unique(data, return_inverse=True)
+            codetype = numpy.min_scalar_type(max(len(categories)-1,0))
+            return categories,codes.reshape(data.shape).astype(codetype)
+        return data
+
     nxlib.nxigetslab64_.restype = c_int
     nxlib.nxigetslab64_.argtypes = [c_void_p, c_void_p, c_int64_p, c_int64_p]
-    def getslab(self, slab_offset, slab_shape):
+    @_synchronized
+    def getslab(self, slab_offset, slab_shape, out=None, stride=None):
         """
         Get a slab from the data array.
 
         Offsets are 0-origin.  Shape can be inferred from the data.
         Offset and shape must each have one entry per dimension.
 
+        If stride is given, it is the step between the elements read along
+        each dimension, and shape is the number of elements read.  For
+        example, offset [0,0], shape [10,50] and stride [100,2] reads
+        every 100th row and every other column of a [1000,100] array.
+        NeXus cannot read strided slabs, so the selected elements are
+        gathered from dense slabs of at most SLABBUDGET bytes, reading
+        the selected planes one at a time where the stride skips whole
+        chunks.
+
+        If out is given the slab is read into it and out is returned.  See
+        getdata for the requirements on out.  Reading frame after frame
+        into the same array (or from the same BufferPool) avoids
+        allocating a new array for each slab.
+
+        For chunked datasets whose chunk shape is already known, from
+        getchunks or the attributes read by scandir, small slabs are read through a cache of whole chunks so that
+        repeated and overlapping reads do not decompress the same chunks
+        again.  Writes to the dataset clear its cached chunks.
+
         Raises ValueError if this fails.
 
         Corresponds to NXgetslab(handle,data,offset,shape)
         """
-        # TODO: consider accepting preallocated data so we don't thrash memory
-        dummy_shape,dtype = self.getrawinfo()
-        dummy_data,pdata,dummy_size,datafn = self._poutput(dtype,slab_shape)
+        dtype = self._getdtype()
+        data,pdata,size,datafn = self._poutput(dtype,slab_shape,out)
+        if stride is not None and any(int(n) != 1 for n in stride):
+            if dtype == 'char':
+                raise ValueError("Cannot read strided strings: %s"
+                                 % (self._loc()))
+            self._getstridedslab(data,dtype,slab_offset,slab_shape,stride)
+            return datafn()
+        if dtype != 'char' and self._chunkcache.maxbytes > 0:
+            if self._getchunkedslab(data,dtype,slab_offset,slab_shape):
+                return datafn()
         slab_offset = numpy.asarray(slab_offset,'int64')
         slab_shape = numpy.asarray(slab_shape,'int64')
         status = nxlib.nxigetslab64_(self.handle,pdata,
@@ -1014,54 +3251,472 @@ class NeXus(object):
         # print("slab", offset, size, data)
         if status == ERROR:
             raise ValueError("Could not read slab: %s" % (self._loc()))
+        _transferred(self, size)
         return datafn()
 
+    def getpoints(self, points):
+        """
+        Return the values at a list of points in the open dataset.
+
+        Points is an integer array of shape (n,rank), or a list of n
+        indices for a 1-D dataset, and the n values are returned as a
+        1-D array in the same order.  Negative indices count from the end.
+
+        The points are sorted and gathered into as few slab reads as
+        makes sense (see CALLCOST), so scattered pixels from a large
+        array are read without loading all of it.  Small slabs go
+        through the chunk cache, so points sharing a chunk only
+        decompress it once.
+
+        Raises ValueError if a point is out of range or the read fails.
+
+        This is an extension to the NeXus API.
+        """
+        shape,dtype = self.getinfo()
+        if dtype == 'char':
+            raise ValueError("Cannot gather points from strings: %s"
+                             % (self._loc()))
+        dims = [int(n) for n in shape]
+        points = numpy.array(points,'int64')
+        if points.ndim == 1 and len(dims) == 1:
+            points = points.reshape((-1,1))
+        if points.ndim != 2 or points.shape[1] != len(dims):
+            raise ValueError("Points need %d indices: %s"
+                             % (len(dims),self._loc()))
+        result = numpy.empty(len(points),dtype)
+        if len(points) == 0:
+            return result
+        points += (points < 0)*numpy.array(dims,'int64')
+        if (points < 0).any() or (points >= numpy.array(dims)).any():
+            raise ValueError("Point out of range: %s" % (self._loc()))
+        order = numpy.lexsort(points.T[::-1])
+        points = points[order]
+        itemsize = numpy.dtype(dtype).itemsize
+        for start,stop,lo,hi in _coalesce(points,itemsize):
+            size = [b-a+1 for a,b in zip(lo,hi)]
+            block = self.getslab(lo,size,numpy.empty(size,dtype))
+            local = points[start:stop] - numpy.array(lo,'int64')
+            result[order[start:stop]] = block[tuple(local.T)]
+        return result
+
+    def getindexed(self, indices, axis=0, slab_offset=None, slab_shape=None,
+                   stride=None):
+        """
+        Return the entries at a list of indices along axis of the open
+        dataset, for example a list of frames from a stack of images.
+
+        The result has len(indices) entries along axis in the order given,
+        repeats included.  Along the other axes the whole dataset is
+        returned, or the slab given by slab_offset, slab_shape and stride
+        as for getslab, whose values for axis are ignored.
+
+        The indices are sorted and runs of nearby indices are read as one
+        slab (see CALLCOST), then the entries are put back in the order
+        requested.
+
+        Raises ValueError if an index is out of range or the read fails.
+
+        This is an extension to the NeXus API.
+        """
+        shape,dtype = self.getinfo()
+        if dtype == 'char':
+            raise ValueError("Cannot gather strings: %s" % (self._loc()))
+        dims = [int(n) for n in shape]
+        rank = len(dims)
+        if axis < 0:
+            axis += rank
+        offset = [0]*rank if slab_offset is None else [int(n) for n in slab_offset]
+        count = list(dims) if slab_shape is None else [int(n) for n in slab_shape]
+        stride = [1]*rank if stride is None else [int(n) for n in stride]
+        indices = numpy.array(indices,'int64').ravel()
+        indices += (indices < 0)*dims[axis]
+        if (indices < 0).any() or (indices >= dims[axis]).any():
+            raise ValueError("Index out of range: %s" % (self._loc()))
+        unique,inverse = numpy.unique(indices,return_inverse=True)
+        count[axis] = len(unique)
+        values = numpy.empty(count,dtype)
+        if len(unique) > 0:
+            # Each entry along axis is a plane of the other axes
+            plane = _product(count)//len(unique)*numpy.dtype(dtype).itemsize
+            for start,stop,lo,hi in _coalesce(unique.reshape((-1,1)),plane):
+                offset[axis],count[axis] = lo[0],hi[0]-lo[0]+1
+                stride[axis] = 1
+                block = self.getslab(offset,count,numpy.empty(count,dtype),
+                                     stride)
+                rows = unique[start:stop]-lo[0]
+                index = [slice(None)]*rank
+                index[axis] = slice(start,stop)
+                values[tuple(index)] = numpy.take(block,rows,axis=axis)
+        return numpy.take(values,inverse.ravel(),axis=axis)
+
+    def _getstridedslab(self, data, dtype, slab_offset, slab_shape, stride):
+        """
+        Fill data with every stride'th element of the slab, reading it in
+        dense pieces.
+        """
+        offset = [int(n) for n in slab_offset]
+        count = [int(n) for n in slab_shape]
+        stride = [int(n) for n in stride]
+        if len(stride) != len(count) or min(stride) < 1:
+            raise ValueError("Invalid stride %s: %s" % (stride,self._loc()))
+        if min(count) < 1:
+            return
+        chunks = self.getchunks()
+        # The stride skips whole chunks along a dimension if the stride is
+        # at least as large as the chunks
+        if chunks is None:
+            skip = [False]*len(count)
+        else:
+            skip = [s > 1 and s >= c for s,c in zip(stride,chunks)]
+        span = [(n-1)*s+1 for n,s in zip(count,stride)]
+        itemsize = numpy.dtype(dtype).itemsize
+        self._gather(0, offset, count, stride, span, skip, itemsize,
+                     data.reshape(count), dtype)
+
+    def _gather(self, dim, offset, count, stride, span, skip, itemsize,
+                out, dtype):
+        """
+        Fill out with the strided selection of dimensions dim and above,
+        the lower dimensions being fixed at their offsets.
+        """
+        rank = len(count)
+        inner = _product(span[dim+1:])*itemsize
+        if dim < rank-1 and (inner > SLABBUDGET or any(skip[dim+1:])):
+            # Too much to read densely below this dimension; go plane by plane
+            for k in range(count[dim]):
+                plane = list(offset)
+                plane[dim] += k*stride[dim]
+                self._gather(dim+1, plane, count, stride, span, skip,
+                             itemsize, out[k], dtype)
+            return
+        if skip[dim]:
+            step = 1
+        else:
+            step = max(1, (SLABBUDGET//max(inner,1) - 1)//stride[dim] + 1)
+        select = (slice(None,None,stride[dim]),) \
+            + tuple(slice(None,None,s) for s in stride[dim+1:])
+        for k in range(0, count[dim], step):
+            n = min(step, count[dim]-k)
+            block_offset = list(offset)
+            block_offset[dim] += k*stride[dim]
+            block_shape = [1]*dim + [(n-1)*stride[dim]+1] + span[dim+1:]
+            block = numpy.empty(block_shape, dtype)
+            self.getslab(block_offset, block_shape, block)
+            out[k:k+n] = block.reshape(block_shape[dim:])[select]
+
+    def getchunks(self):
+        """
+        Return the chunk shape of the open dataset as a list, or None if
+        it is not known.
+
+        NeXus has no call to query the chunk shape, so this is the shape
+        recorded by compmakedata in the chunk_shape attribute.  It is read
+        the first time the dataset is seen, unless scandir has already
+        read the attributes, and remembered while the handle exists since
+        the chunks of a dataset cannot change.
+
+        This is an extension to the NeXus API.
+        """
+        path = self.path
+        if path not in self._chunkinfo:
+            self._chunkinfo[path] = _parsechunks(
+                self.getattrs().get('chunk_shape'), len(self._getshape()))
+        return self._chunkinfo[path]
+
+    def setchunkcache(self, maxbytes):
+        """
+        Set the size in bytes of the cache of chunks used by getslab.
+        The default is CHUNKCACHE; 0 turns the cache off.
+
+        This is an extension to the NeXus API.
+        """
+        self._chunkcache.maxbytes = maxbytes
+        self._chunkcache.trim()
+
+    @_synchronized
+    def _getchunkedslab(self, data, dtype, slab_offset, slab_shape):
+        """
+        Fill data with the slab from the chunk cache, first reading the
+        missing chunks as one chunk-aligned slab.  Returns False without
+        reading if the chunks are not already known or the chunks covering
+        the slab would take more than half the cache.
+
+        The chunks are not looked up here, so that reads of datasets
+        whose chunks are unknown cost no more calls than without the
+        cache.
+        """
+        chunks = self._chunkinfo.get(self.path)
+        if chunks is None:
+            return False
+        shape = self._getshape()
+        offset = [int(n) for n in slab_offset]
+        size = [int(n) for n in slab_shape]
+        if len(offset) != len(shape) or len(size) != len(shape) \
+                or min(size) < 1 or min(offset) < 0 \
+                or any(o+z > n for o,z,n in zip(offset,size,shape)):
+            return False
+        first = [o//c for o,c in zip(offset,chunks)]
+        last = [(o+z-1)//c for o,z,c in zip(offset,size,chunks)]
+        span = [min((l+1)*c,n)-f*c
+                for f,l,c,n in zip(first,last,chunks,shape)]
+        itemsize = numpy.dtype(dtype).itemsize
+        if numpy.prod(span)*itemsize > self._chunkcache.maxbytes//2:
+            return False
+
+        path = self.path
+        indices = list(itertools.product(*[range(f,l+1)
+                                           for f,l in zip(first,last)]))
+        cached = dict((index,self._chunkcache.get((path,index)))
+                      for index in indices)
+        missing = [index for index in indices if cached[index] is None]
+        if missing:
+            # Read the chunk-aligned box around the missing chunks at once
+            low = [min(index[d] for index in missing)
+                   for d in range(len(shape))]
+            high = [max(index[d] for index in missing)
+                    for d in range(len(shape))]
+            region_offset = numpy.array([l*c for l,c in zip(low,chunks)],
+                                        'int64')
+            region_shape = numpy.array([min((h+1)*c,n)-l*c for l,h,c,n
+                                        in zip(low,high,chunks,shape)],
+                                       'int64')
+            region = numpy.empty(region_shape,dtype)
+            status = nxlib.nxigetslab64_(self.handle,region.ctypes.data,
+                                region_offset.ctypes.data_as(c_int64_p),
+                                region_shape.ctypes.data_as(c_int64_p))
+            if status == ERROR:
+                raise ValueError("Could not read slab: %s" % (self._loc()))
+            _transferred(self, region.nbytes)
+            for index in itertools.product(*[range(l,h+1)
+                                             for l,h in zip(low,high)]):
+                part = tuple(slice(i*c-r, min((i+1)*c,n)-r) for i,c,n,r
+                             in zip(index,chunks,shape,region_offset))
+                chunk = region[part].copy()
+                self._chunkcache.put((path,index),chunk)
+                if index in cached:
+                    cached[index] = chunk
+
+        data = data.reshape(size)
+        for index in indices:
+            chunk = cached[index]
+            start = [i*c for i,c in zip(index,chunks)]
+            lo = [max(o,s) for o,s in zip(offset,start)]
+            hi = [min(o+z,s+k) for o,z,s,k in zip(offset,size,start,chunk.shape)]
+            data[tuple(slice(l-o,h-o) for l,h,o in zip(lo,hi,offset))] = \
+                chunk[tuple(slice(l-s,h-s) for l,h,s in zip(lo,hi,start))]
+        return True
+
+    def iterslabs(self, axis=0, rows=None, budget=None, prefetch=True):
+        """
+        Iterate over consecutive slabs of the open dataset along an axis.
+
+        for offset,data in file.iterslabs(axis=0):
+            process(offset,data)
+
+        Each slab covers rows indices along the axis and the whole of the
+        other dimensions.  If rows is not given it is chosen so that each
+        slab fits within budget bytes (default SLABBUDGET), with at least
+        one index per slab, and rounded down to a whole number of chunks
+        if the chunk shape of the dataset is known.  If prefetch is True
+        the next slab is read on a background thread while the current
+        slab is being processed.
+
+        The dataset must stay open until the iterator is exhausted or
+        closed, so do not change the open path while iterating.
+
+        Raises ValueError if the dataset is a scalar or axis is invalid.
+
+        This does not correspond to an existing NeXus API function, but
+        combines the work of getrawinfo and getslab.
+        """
+        shape,dtype = self.getrawinfo()
+        shape = [int(n) for n in shape]
+        if not shape:
+            raise ValueError("Cannot iterate over a scalar: %s" % self._loc())
+        if not -len(shape) <= axis < len(shape):
+            raise ValueError("Invalid axis %d for rank %d: %s" %
+                             (axis, len(shape), self._loc()))
+        axis = axis % len(shape)
+        if rows is None:
+            itemsize = 1 if dtype == 'char' else numpy.dtype(dtype).itemsize
+            rowbytes = itemsize*int(numpy.prod(shape))//max(shape[axis],1)
+            if budget is None:
+                budget = SLABBUDGET
+            rows = max(1, budget//max(rowbytes,1))
+            # Whole chunks along the axis so no chunk is read twice
+            chunks = self.getchunks()
+            if chunks is not None and rows > chunks[axis]:
+                rows -= rows % chunks[axis]
+        slabs = []
+        for start in range(0, shape[axis], rows):
+            offset = [0]*len(shape)
+            offset[axis] = start
+            size = list(shape)
+            size[axis] = min(rows, shape[axis]-start)
+            slabs.append((offset,size))
+
+        if not prefetch or len(slabs) < 2:
+            for offset,size in slabs:
+                yield offset,self.getslab(offset,size)
+            return
+
+        def _prefetch(offset, size):
+            result = {}
+            def _read():
+                try:
+                    result['data'] = self.getslab(offset,size)
+                except Exception as exc:
+                    result['error'] = exc
+            thread = threading.Thread(target=_read)
+            thread.daemon = True
+            thread.start()
+            return thread,result
+
+        thread,result = _prefetch(*slabs[0])
+        try:
+            for k,(offset,size) in enumerate(slabs):
+                thread.join()
+                if 'error' in result:
+                    raise result['error']
+                data = result['data']
+                if k+1 < len(slabs):
+                    thread,result = _prefetch(*slabs[k+1])
+                yield offset,data
+        finally:
+            thread.join()
+
     nxlib.nxiputdata_.restype = c_int
     nxlib.nxiputdata_.argtypes = [c_void_p, c_void_p]
-    def putdata(self, data):
+    @_synchronized
+    def putdata(self, data, cast=False):
         """
         Write data into the currently open data block.
 
+        Data can be a numpy array (including numpy.memmap) or any object
+        supporting the buffer protocol, such as a memoryview or bytearray.
+        Untyped byte buffers are interpreted as the type of the dataset.
+        Contiguous data of the correct type is written in place without
+        copying.  Strided data is copied in blocks of at most BLOCKSIZE
+        bytes rather than all at once.
+
+        If cast is True, data of a different type is converted to the type
+        of the dataset, again in blocks of at most BLOCKSIZE bytes.
+
         Raises ValueError if this fails.
 
         Corresponds to NXputdata(handle, data)
         """
         shape,dtype = self.getrawinfo()
         # print("putdata", self._loc(), shape, dtype)
-        data,pdata = self._pinput(data,dtype,shape)
+        self._putdata(data,dtype,shape,cast)
+
+    def _putdata(self, data, dtype, shape, cast=False):
+        """
+        Write data into the open dataset of the given type and shape,
+        returning the number of calls to NeXus.
+        """
+        self._chunkcache.invalidate(self.path)
+        data,pdata = self._pinput(data,dtype,shape,cast)
+        if pdata is None:
+            return self._putblocks(data,dtype,
+                                   numpy.zeros(len(shape),'int64'),shape)
         status = nxlib.nxiputdata_(self.handle,pdata)
         if status == ERROR:
             raise ValueError("Could not write data: %s" % (self._loc()))
+        _transferred(self, _nbytes(data), write=True)
+        return 1
+
+    def putstrings(self, strings, codes=None, encoding='utf-8'):
+        """
+        Write strings into the open 'char' dataset, one per row of the
+        last dimension.
+
+        Strings is a sequence or numpy array of str, unicode or bytes, or
+        with codes, the categories as returned by getstrings.  Unicode is
+        encoded with encoding.  Strings longer than the rows are cut
+        short and shorter ones are padded with nulls.  See makestrings
+        to create a column of the right width.
+
+        Raises ValueError if this fails.
+
+        This is an extension to the NeXus API.
+        """
+        shape,dtype = self.getrawinfo()
+        if dtype != 'char':
+            raise ValueError("Data is not a string: %s" % (self._loc()))
+        data = _encodestrings(strings, encoding)
+        if codes is not None:
+            data = data[numpy.asarray(codes)]
+        if data.size != _product(int(n) for n in shape[:-1]):
+            raise ValueError("Shape mismatch %s!=%s: %s" %
+                             (data.shape, tuple(shape[:-1]), self._loc()))
+        self.putdata(data)
 
     nxlib.nxiputslab64_.restype = c_int
     nxlib.nxiputslab64_.argtypes = [c_void_p, c_void_p, c_int64_p, c_int64_p]
-    def putslab(self, data, slab_offset, slab_shape):
+    @_synchronized
+    def putslab(self, data, slab_offset, slab_shape, cast=False):
         """
         Put a slab into the data array.
 
         Offsets are 0-origin.  Shape can be inferred from the data.
         Offset and shape must each have one entry per dimension.
 
+        See putdata for the accepted data objects and for cast.
+
         Raises ValueError if this fails.
 
         Corresponds to NXputslab(handle,data,offset,shape)
         """
-        dummy_shape,dtype = self.getrawinfo()
-        data,pdata = self._pinput(data,dtype,slab_shape)
+        dtype = self._getdtype()
+        self._chunkcache.invalidate(self.path)
+        self._shape = None
+        data,pdata = self._pinput(data,dtype,slab_shape,cast)
         slab_offset = numpy.asarray(slab_offset,'int64')
         slab_shape = numpy.asarray(slab_shape,'int64')
+        if pdata is None:
+            self._putblocks(data,dtype,slab_offset,slab_shape)
+            return
         # print("slab", offset, size, data)
         status = nxlib.nxiputslab64_(self.handle,pdata,
                                      slab_offset.ctypes.data_as(c_int64_p),
                                      slab_shape.ctypes.data_as(c_int64_p))
         if status == ERROR:
             raise ValueError("Could not write slab: %s" % (self._loc()))
+        _transferred(self, _nbytes(data), write=True)
 
-
+    @_synchronized
+    def _putblocks(self, data, dtype, slab_offset, slab_shape):
+        """
+        Write data to the slab as a series of contiguous blocks of the
+        dataset type, each at most BLOCKSIZE bytes.  Returns the number
+        of blocks.
+        """
+        itemsize = max(data.dtype.itemsize, numpy.dtype(dtype).itemsize)
+        data = data.reshape([int(n) for n in slab_shape])
+        offset = numpy.zeros(len(slab_shape),'int64')
+        shape = numpy.zeros(len(slab_shape),'int64')
+        count = 0
+        for block_offset,block_shape in _slabblocks(slab_shape,itemsize,
+                                                    BLOCKSIZE):
+            index = tuple(slice(o,o+n)
+                          for o,n in zip(block_offset,block_shape))
+            block = numpy.ascontiguousarray(data[index],dtype=dtype)
+            offset[:] = slab_offset + block_offset
+            shape[:] = block_shape
+            status = nxlib.nxiputslab64_(self.handle,block.ctypes.data,
+                                         offset.ctypes.data_as(c_int64_p),
+                                         shape.ctypes.data_as(c_int64_p))
+            if status == ERROR:
+                raise ValueError("Could not write slab: %s" % (self._loc()))
+            _transferred(self, block.nbytes, write=True)
+            count += 1
+        return count
 
     # ==== Attributes ====
     nxlib.nxiinitattrdir_.restype = c_int
     nxlib.nxiinitattrdir_.argtypes = [c_void_p]
+    @_synchronized
     def initattrdir(self):
         """
         Reset the getnextattr list to the first attribute.
@@ -1077,6 +3732,7 @@ class NeXus(object):
 
     nxlib.nxigetattrinfo_.restype = c_int
     nxlib.nxigetattrinfo_.argtypes = [c_void_p, c_int_p]
+    @_synchronized
     def getattrinfo(self):
         """
         Returns the number of attributes for the currently open
@@ -1096,6 +3752,7 @@ class NeXus(object):
 
     nxlib.nxigetnextattr_.restype = c_int
     nxlib.nxigetnextattr_.argtypes = [c_void_p, c_char_p, c_int_p, c_int_p]
+    @_synchronized
     def getnextattr(self):
         """
         Returns the name, length, and data type for the next attribute.
@@ -1129,6 +3786,7 @@ class NeXus(object):
     # TODO: apparent behaviour for getattr/putattr length.
     nxlib.nxigetattr_.restype = c_int
     nxlib.nxigetattr_.argtypes = [c_void_p, c_char_p, c_void_p, c_int_p, c_int_p]
+    @_synchronized
     def getattr(self, name, length, dtype):
         """
         Returns the value of the named attribute.  Requires length and
@@ -1150,6 +3808,7 @@ class NeXus(object):
 
     nxlib.nxiputattr_.restype = c_int
     nxlib.nxiputattr_.argtypes = [c_void_p, c_char_p, c_void_p, c_int, c_int]
+    @_synchronized
     def putattr(self, name, value, dtype = None):
         """
         Saves the named attribute.  The attribute value is a string
@@ -1199,6 +3858,25 @@ class NeXus(object):
             raise NeXusError("Could not write attr %s: %s" %
                              (name, self._loc()))
 
+    def _putattrs(self, attrs):
+        """
+        Write the attributes, a dictionary or a list of (name,value) pairs,
+        where the value may be a (value,dtype) pair, returning the number
+        of calls to NeXus.
+        """
+        if not attrs:
+            return 0
+        if hasattr(attrs, 'items'):
+            attrs = attrs.items()
+        count = 0
+        for name,value in attrs:
+            if isinstance(value, tuple):
+                self.putattr(name,*value)
+            else:
+                self.putattr(name,value)
+            count += 1
+        return count
+
     def getattrs(self):
         """
         Returns a dicitonary of the attributes on the current node.
@@ -1233,6 +3911,7 @@ class NeXus(object):
     # ==== Linking ====
     nxlib.nxigetgroupid_.restype = c_int
     nxlib.nxigetgroupid_.argtypes = [c_void_p, c_NXlink_p]
+    @_synchronized
     def getgroupID(self):
         """
         Return the id of the current group so we can link to it later.
@@ -1249,6 +3928,7 @@ class NeXus(object):
 
     nxlib.nxigetdataid_.restype = c_int
     nxlib.nxigetdataid_.argtypes = [c_void_p, c_NXlink_p]
+    @_synchronized
     def getdataID(self):
         """
         Return the id of the current data so we can link to it later.
@@ -1265,6 +3945,7 @@ class NeXus(object):
 
     nxlib.nximakelink_.restype = c_int
     nxlib.nximakelink_.argtypes = [c_void_p, c_NXlink_p]
+    @_synchronized
     def makelink(self, ID):
         """
         Link the previously captured group/data ID into the currently
@@ -1275,11 +3956,13 @@ class NeXus(object):
         Corresponds to NXmakelink(handle, &ID)
         """
         status = nxlib.nximakelink_(self.handle,_ref(ID))
+        self._dircache.pop(self.path, None)
         if status == ERROR:
             raise NeXusError("Could not make link: %s" % (self._loc()))
 
     nxlib.nximakenamedlink_.restype = c_int
     nxlib.nximakenamedlink_.argtypes = [c_void_p, c_char_p, c_NXlink_p]
+    @_synchronized
     def makenamedlink(self,name,ID):
         """
         Link the previously captured group/data ID into the currently
@@ -1290,11 +3973,13 @@ class NeXus(object):
         Corresponds to NXmakenamedlink(handle,name,&ID)
         """
         status = nxlib.nximakenamedlink_(self.handle,name,_ref(ID))
+        self._dircache.pop(self.path, None)
         if status == ERROR:
             raise NeXusError("Could not make link %s: %s" % (name, self._loc()))
 
     nxlib.nxisameid_.restype = c_int
     nxlib.nxisameid_.argtypes = [c_void_p, c_NXlink_p, c_NXlink_p]
+    @_synchronized
     def sameID(self, ID1, ID2):
         """
         Return True of ID1 and ID2 point to the same group/data.
@@ -1308,6 +3993,7 @@ class NeXus(object):
 
     nxlib.nxiopensourcegroup_.restype = c_int
     nxlib.nxiopensourcegroup_.argtyps = [c_void_p]
+    @_synchronized
     def opensourcegroup(self):
         """
         If the current node is a linked to another group or data, then
@@ -1350,6 +4036,7 @@ class NeXus(object):
     # ==== External linking ====
     nxlib.nxiinquirefile_.restype = c_int
     nxlib.nxiinquirefile_.argtypes = [c_void_p, c_char_p, c_int]
+    @_synchronized
     def inquirefile(self, maxnamelen=MAXPATHLEN):
         """
         Return the filename for the current file.  This may be different
@@ -1369,6 +4056,7 @@ class NeXus(object):
     nxlib.nxilinkexternal_.restype = c_int
     nxlib.nxilinkexternal_.argtyps = [c_void_p, c_char_p,
                                        c_char_p, c_char_p]
+    @_synchronized
     def linkexternal(self, name, nxclass, url):
         """
         Return the filename for the external link if there is one,
@@ -1379,6 +4067,7 @@ class NeXus(object):
         Corresponds to NXisexternalgroup(&handle,name,nxclass,file,len)
         """
         status = nxlib.nxilinkexternal_(self.handle,name,nxclass,url)
+        self._dircache.pop(self.path, None)
         if status == ERROR:
             raise NeXusError("Could not link %s to %s: %s" %
                              (name, url, self._loc()))
@@ -1386,6 +4075,7 @@ class NeXus(object):
     nxlib.nxiisexternalgroup_.restype = c_int
     nxlib.nxiisexternalgroup_.argtyps = [c_void_p, c_char_p,
                                        c_char_p, c_char_p, c_int]
+    @_synchronized
     def isexternalgroup(self, name, nxclass, maxnamelen=MAXPATHLEN):
         """
         Return the filename for the external link if there is one,
@@ -1410,7 +4100,7 @@ class NeXus(object):
         """
         return "%s(%s)"%(self.filename,self.path)
 
-    def _poutput(self, dtype, shape):
+    def _poutput(self, dtype, shape, out=None):
         """
         Build space to collect a nexus data element.
         Returns data,pdata,size,datafn where
@@ -1420,9 +4110,14 @@ class NeXus(object):
         - datafn is a lamba expression to extract the return value from data
         Note that datafn can return a string, a scalar or an array depending
         on the data type and shape of the data group.
+
+        If out is an array or a BufferPool, the data is collected in the
+        supplied buffer rather than a new one and datafn returns the buffer.
         """
         if isinstance(shape, int):
             shape = [shape]
+        if out is not None:
+            return self._pbuffer(dtype, shape, out)
         if len(shape) == 1 and dtype == 'char':
             # string - use ctypes allocator
             size = int(shape[0])
@@ -1434,7 +4129,8 @@ class NeXus(object):
             if dtype=='char':
                 data = numpy.zeros(shape[:-1], dtype='S%i'%shape[-1])
             else:
-                data = numpy.zeros(shape, dtype)
+                # NeXus fills every element so skip the zero fill
+                data = numpy.empty(shape, dtype)
             if len(shape) == 1 and shape[0] == 1:
                 datafn = lambda: data[0]
             else:
@@ -1443,7 +4139,32 @@ class NeXus(object):
             size = data.nbytes
         return data,pdata,size,datafn
 
-    def _pinput(self, data, dtype, shape):
+    def _pbuffer(self, dtype, shape, out):
+        """
+        Check that out can hold a nexus data element of the given type
+        and shape.  Returns data,pdata,size,datafn as for _poutput.
+        """
+        if isinstance(out, BufferPool):
+            out = out.get(dtype, shape)
+        if dtype == 'char':
+            target,n = numpy.dtype('S%d'%shape[-1]),numpy.prod(shape[:-1])
+        else:
+            target,n = numpy.dtype(dtype),numpy.prod(shape)
+        if not isinstance(out, numpy.ndarray):
+            raise ValueError("Output buffer must be a numpy array: %s" %
+                             (self._loc()))
+        if out.dtype != target:
+            raise ValueError("Type mismatch %s!=%s: %s" %
+                             (target, out.dtype, self._loc()))
+        if out.size != n:
+            raise ValueError("Shape mismatch %s!=%s: %s" %
+                             (out.shape, tuple(shape), self._loc()))
+        if not out.flags.c_contiguous or not out.flags.writeable:
+            raise ValueError("Output buffer must be writable and contiguous:"
+                             " %s" % (self._loc()))
+        return out,out.ctypes.data,out.nbytes,lambda: out
+
+    def _pinput(self, data, dtype, shape, cast=False):
         """
         Convert an input array to a C pointer to a dense array.
 
@@ -1452,6 +4173,9 @@ class NeXus(object):
         - pdata is a pointer to the beginning of the array.
         Note that you must hold a reference to data for as long
         as you need pdata to keep the memory from being released to the heap.
+
+        If the data is not contiguous or (with cast) not of the dataset
+        type, pdata is None and data must be written with _putblocks.
         """
         if isinstance(shape, int):
             shape = [shape]
@@ -1461,6 +4185,7 @@ class NeXus(object):
             # Convert scalars to vectors of length one
             if numpy.prod(shape) == 1 and not hasattr(data,'shape'):
                 data = numpy.array([data], dtype=dtype)
+            data = _asbuffer(data, dtype, shape)
             # Check that dimensions match
             # Ick! need to exclude dimensions of length 1 in order to catch
             # array slices such as a[:,1], which only report one dimension
@@ -1472,57 +4197,278 @@ class NeXus(object):
                                  (data.shape, shape, self._loc()))
             # Check data type
             if str(data.dtype) != dtype:
-                raise ValueError("Type mismatch %s!=%s: %s" %
-                                 (dtype, data.dtype, self._loc()))
+                if not cast:
+                    raise ValueError("Type mismatch %s!=%s: %s" %
+                                     (dtype, data.dtype, self._loc()))
+                return data,None
+            if not data.flags.c_contiguous:
+                return data,None
 
         data = numpy.ascontiguousarray(data)
         pdata = data.ctypes.data
 
         return data,pdata
 
-    def show(self, path=None, indent=0):
+    def walk(self, visitor, values=0):
         """
-        Print the structure of a NeXus file from the current node.
+        Walk the tree below the current group, calling the visitor methods
+        for each node:
+
+            visitor.entergroup(path,entry)
+            visitor.visitdata(path,entry)
+            visitor.leavegroup(path,entry)
+
+        Entry is the NeXusEntry record of the node as returned by scandir,
+        with attributes and link target; datasets with fewer than values
+        elements have their value.  The current group is entered first.
+        Linked groups are entered but not walked, and the children of a
+        group are skipped if entergroup returns False.  See NeXusVisitor.
+
+        Each group is opened once and each dataset is read once, moving
+        the file cursor only with opengroup/closegroup, so the visitor can
+        produce its output as it goes.  The file must not be moved by the
+        visitor.
 
-        TODO: Break this into a tree walker and a visitor.
+        This does not correspond to an existing NeXus API function.
         """
-        oldpath = self.path
-        self.openpath(path)
+        n,name,nxclass = self.getgroupinfo()
+        self._walk(visitor, self.path,
+                   NeXusEntry(name,nxclass,None,None,None,None,None), values)
+
+    def _walk(self, visitor, path, entry, values):
+        attrs = self.getattrs()
+        target = attrs.get('target')
+        if target == path:
+            target = None
+        entry = entry._replace(attrs=attrs,target=target)
+        prefix = path.rstrip('/')+'/'
+        if visitor.entergroup(path,entry) is not False and target is None:
+            for child in self.scandir(values=values, groups=False):
+                if child.nxclass == "SDS":
+                    visitor.visitdata(prefix+child.name,child)
+                else:
+                    self.opengroup(child.name,child.nxclass)
+                    try:
+                        self._walk(visitor, prefix+child.name, child, values)
+                    finally:
+                        self.closegroup()
+        visitor.leavegroup(path,entry)
 
-        print("=== File", self.inquirefile(), path)
-        self._show(indent=indent)
-        self.openpath(oldpath)
+    def show(self, path=None, indent=0):
+        """
+        Print the structure of a NeXus file from path, or from the current
+        node if path is None.
+        """
+        oldpath = self.path
+        if path is not None:
+            self.openpath(path)
+        print("=== File %s %s" % (self.inquirefile(), self.path))
+        try:
+            self._show(indent=indent)
+        finally:
+            if path is not None:
+                self.openpath(oldpath)
 
     def _show(self, indent=0):
         """
         Print the structure of a NeXus file from the current node.
-
-        TODO: Break this into a tree walker and a visitor.
         """
-        prefix = ' '*indent
-        link = self.link()
-        if link:
-            print("%(prefix)s-> %(link)s" % locals())
-            return
-        for attr,value in self.attrs():
-            print("%(prefix)s@%(attr)s: %(value)s" % locals())
-        for name,nxclass in self.entries():
-            if nxclass == "SDS":
-                shape,dtype = self.getinfo()
-                dims = "x".join([str(x) for x in shape])
-                print("%(prefix)s%(name)s %(dtype)s %(dims)s" % locals())
-                link = self.link()
-                if link:
-                    print("  %(prefix)s-> %(link)s" % locals())
+        self.walk(ShowVisitor(indent=indent), values=8)
+
+
+def _speckind(entry):
+    """
+    Return 'group', 'link' or 'data' for an entry of a maketree spec.
+    """
+    if isinstance(entry, dict):
+        if 'link' in entry:
+            return 'link'
+        elif 'nxclass' in entry:
+            return 'group'
+    return 'data'
+
+class _TreeWriter(object):
+    """
+    Write a NeXus.maketree spec into the current group of file, counting
+    the calls made to NeXus in calls.
+    """
+    def __init__(self, file):
+        self.file = file
+        self.calls = 0
+        self.targets = set()
+        self.ids = {}
+        self.pending = {}
+
+    def write(self, spec):
+        prefix = self.file.path.rstrip('/')+'/'
+        paths = set()
+        self._scan(spec, prefix, paths)
+        missing = sorted(self.targets - paths)
+        if missing:
+            raise NeXusError("Link target %s is not in the tree: %s" %
+                             (missing[0], self.file._loc()))
+        self._writegroup(spec, prefix)
+        if self.pending:
+            self._linkgroup(spec, prefix)
+
+    def _call(self, fn, *args):
+        self.calls += 1
+        return fn(*args)
+
+    def _scan(self, spec, prefix, paths):
+        """Record the paths of the nodes in spec and the link targets"""
+        for name,entry in spec.items():
+            kind = _speckind(entry)
+            if kind == 'link':
+                self.targets.add(entry['link'].rstrip('/'))
+            else:
+                paths.add(prefix+name)
+                if kind == 'group':
+                    self._scan(entry.get('entries',{}), prefix+name+'/',
+                               paths)
+
+    def _writegroup(self, spec, prefix):
+        file = self.file
+        for name,entry in spec.items():
+            kind = _speckind(entry)
+            if kind == 'link':
+                target = entry['link'].rstrip('/')
+                if target in self.ids:
+                    self._makelink(name, target)
                 else:
-                    for attr,value in self.attrs():
-                        print("  %(prefix)s@%(attr)s: %(value)s" % locals())
-                    if numpy.prod(shape) < 8:
-                        value = self.getdata()
-                        print("  %s%s"%(prefix,str(value)))
+                    self.pending.setdefault(prefix,[]).append((name,target))
+            elif kind == 'group':
+                nxclass = entry['nxclass']
+                self._call(file.makegroup, name, nxclass)
+                self._call(file.opengroup, name, nxclass)
+                try:
+                    self.calls += file._putattrs(entry.get('attrs'))
+                    if prefix+name in self.targets:
+                        self.ids[prefix+name] = self._call(file.getgroupID)
+                    self._writegroup(entry.get('entries',{}), prefix+name+'/')
+                finally:
+                    self._call(file.closegroup)
             else:
-                print("%(prefix)s%(name)s %(nxclass)s" % locals())
-                self._show(indent=indent+2)
+                self._writedata(name, entry, prefix+name)
+
+    def _writedata(self, name, entry, path):
+        file = self.file
+        if not isinstance(entry, dict):
+            entry = dict(value=entry)
+        value,dtype,shape = entry.get('value'),entry.get('dtype'),\
+                            entry.get('shape')
+        if value is not None:
+            value,dtype,shape = _datainfo(value,dtype,shape)
+        dtype,shape = str(dtype),[int(n) for n in shape]
+        if 'compression' in entry or 'chunks' in entry:
+            attrs = self._call(file._compmakedata, name, dtype, shape,
+                               entry.get('compression','lzw'),
+                               entry.get('chunks'), value)
+        else:
+            attrs = None
+            self._call(file.makedata, name, dtype, shape)
+        self._call(file.opendata, name)
+        try:
+            # The chunk attributes go last so they describe the new data
+            self.calls += file._putattrs(entry.get('attrs'))
+            self.calls += file._putattrs(attrs)
+            if value is not None:
+                self.calls += file._putdata(value, dtype, shape)
+            if path in self.targets:
+                self.ids[path] = self._call(file.getdataID)
+        finally:
+            self._call(file.closedata)
+
+    def _makelink(self, name, target):
+        ID = self.ids[target]
+        if name == target.split('/')[-1]:
+            self._call(self.file.makelink, ID)
+        else:
+            self._call(self.file.makenamedlink, name, ID)
+
+    def _linkgroup(self, spec, prefix):
+        """Make the pending links, reentering only the groups holding them"""
+        for name,target in self.pending.pop(prefix,[]):
+            self._makelink(name, target)
+        for name,entry in spec.items():
+            path = prefix+name+'/'
+            if _speckind(entry) == 'group' \
+                    and any(p.startswith(path) for p in self.pending):
+                self._call(self.file.opengroup, name, entry['nxclass'])
+                try:
+                    self._linkgroup(entry.get('entries',{}), path)
+                finally:
+                    self._call(self.file.closegroup)
+
+
+class NeXusVisitor(object):
+    """
+    Base class for visitors of NeXus.walk, with methods which do nothing.
+    """
+    def entergroup(self, path, entry):
+        """
+        Called on entering the group at path.  Return False to skip the
+        children of the group.
+        """
+        pass
+
+    def leavegroup(self, path, entry):
+        """
+        Called after the children of the group at path have been visited.
+        """
+        pass
+
+    def visitdata(self, path, entry):
+        """
+        Called for the dataset at path.
+        """
+        pass
+
+
+class ShowVisitor(NeXusVisitor):
+    """
+    Visitor printing the structure of a file for NeXus.show.
+
+    Groups are listed as name nxclass and datasets as name dtype dims,
+    followed by their attributes, links and small values.  Lines are
+    passed to write, which defaults to print.
+    """
+    def __init__(self, indent=0, write=None):
+        self.indent = indent
+        self.depth = -1
+        self.write = write if write is not None else self._print
+
+    def _print(self, line):
+        print(line)
+
+    def _prefix(self):
+        return ' '*(self.indent + 2*self.depth)
+
+    def entergroup(self, path, entry):
+        if self.depth >= 0:
+            self.write("%s%s %s" % (self._prefix(), entry.name, entry.nxclass))
+        self.depth += 1
+        prefix = self._prefix()
+        if entry.target:
+            self.write("%s-> %s" % (prefix, entry.target))
+            return False
+        for attr,value in entry.attrs.items():
+            self.write("%s@%s: %s" % (prefix, attr, value))
+
+    def leavegroup(self, path, entry):
+        self.depth -= 1
+
+    def visitdata(self, path, entry):
+        prefix = self._prefix()
+        dims = "x".join([str(x) for x in entry.shape])
+        self.write("%s%s %s %s" % (prefix, entry.name, entry.dtype, dims))
+        if entry.target:
+            self.write("  %s-> %s" % (prefix, entry.target))
+        else:
+            for attr,value in entry.attrs.items():
+                self.write("  %s@%s: %s" % (prefix, attr, value))
+            if entry.value is not None:
+                self.write("  %s%s" % (prefix, str(entry.value)))
 
 
 __id__ = "$ID$"
@@ -1 +1,2 @@
 from .napi import *
+from .tree import *
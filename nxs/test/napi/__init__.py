@@ -13,6 +13,34 @@ platforms from the NeXus site.  Details of where the nxs package
 searches for the libraries are recorded in `nxs.napi`.
 """
 
+import sys
+
 from .test_constants import test_constants
 from .test_file_creation import test_file_creation
 from .test_field_creation import *
+from .test_buffers import *
+from .test_write_path import *
+from .test_dataset_handle import *
+from .test_navigation import *
+from .test_scandir import *
+from .test_threads import *
+from .test_handle_cache import *
+from .test_iterslabs import *
+from .test_chunks import *
+from .test_planchunks import *
+from .test_compression import *
+from .test_appender import *
+from .test_async_writer import *
+from .test_profile import *
+from .test_import import *
+from .test_index import *
+from .test_walk import *
+from .test_mapdata import *
+from .test_stride import *
+from .test_gather import *
+from .test_readpaths import *
+from .test_scheduler import *
+from .test_strings import *
+from .test_maketree import *
+if sys.version_info >= (3,6):
+    from .test_aio import *
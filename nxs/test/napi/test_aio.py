@@ -0,0 +1,68 @@
+import unittest
+import os
+import asyncio
+import numpy
+import nxs.napi as napi
+import nxs.aio as aio
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+class test_aio(unittest.TestCase):
+    filenames = ["test_aio_%d.nxs"%i for i in range(2)]
+
+    def setUp(self):
+        for i,filename in enumerate(self.filenames):
+            file = napi.open(filename,"w5")
+            file.makegroup("entry","NXentry")
+            file.opengroup("entry")
+            file.makedata("data",'int32',(4,3))
+            file.opendata("data")
+            file.putdata(numpy.arange(12,dtype='int32').reshape((4,3))+i)
+            file.close()
+
+    def tearDown(self):
+        for filename in self.filenames:
+            os.remove(filename)
+
+    def test_reads(self):
+        files = [run(aio.open(filename)) for filename in self.filenames]
+        requests = [f.getslab("/entry/data",[k,0],[1,3])
+                    for k in range(4) for f in files]
+        results = run(asyncio.gather(*requests))
+        self.assertEqual(results[0].tolist(),[[0,1,2]])
+        self.assertEqual(results[1].tolist(),[[1,2,3]])
+        self.assertEqual(results[-1].tolist(),[[10,11,12]])
+        data = run(files[0].getdata("/entry/data"))
+        self.assertEqual(data.shape,(4,3))
+        entries = run(files[0].scandir("/entry"))
+        self.assertEqual([entry.name for entry in entries],["data"])
+        for f in files:
+            run(f.close())
+        self.assertFalse(files[0].file.isopen)
+
+    def test_iterslabs(self):
+        f = run(aio.open(self.filenames[0]))
+        slabs = f.iterslabs("/entry/data",rows=3)
+        offsets = []
+        while True:
+            try:
+                offset,data = run(slabs.__anext__())
+            except StopAsyncIteration:
+                break
+            offsets.append(offset)
+        self.assertEqual(offsets,[[0,0],[3,0]])
+        run(f.close())
+
+    def test_loops(self):
+        # The same handle can be used from one event loop after another
+        f = run(aio.open(self.filenames[0]))
+        for _ in range(2):
+            loop = asyncio.new_event_loop()
+            try:
+                data = loop.run_until_complete(f.getslab("/entry/data",
+                                                         [1,0],[1,3]))
+            finally:
+                loop.close()
+            self.assertEqual(data.tolist(),[[3,4,5]])
+        run(f.close())
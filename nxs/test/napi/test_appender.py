@@ -0,0 +1,50 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_appender(unittest.TestCase):
+    filename = "test_appender.nxs"
+
+    def setUp(self):
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.compmakedata("data",'int32',[napi.UNLIMITED,3],'lzw',
+                                [4,3])
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_append(self):
+        expected = numpy.arange(30,dtype='int32').reshape((10,3))
+        with self._file.appender("data") as out:
+            self.assertEqual(out.rows % 4,0)
+            out.append(expected[0])
+            out.extend(expected[1:7])
+            out.flush()
+            self.assertEqual(out.extent,7)
+            out.extend(expected[7:])
+            self.assertEqual(len(out),10)
+        self.assertEqual(self._file.path,"/entry")
+        self._file.opendata("data")
+        shape,dtype = self._file.getinfo()
+        self.assertEqual(list(shape),[10,3])
+        self.assertEqual(self._file.getdata().tolist(),expected.tolist())
+
+    def test_batches(self):
+        with self._file.appender("data",rows=4) as out:
+            for i in range(9):
+                out.append([i,i,i])
+                self.assertEqual(out.extent,(i+1)//4*4)
+            self.assertEqual(out.pending,1)
+        self._file.opendata("data")
+        self.assertEqual(list(self._file.getinfo()[0]),[9,3])
+
+    def test_invalid(self):
+        self._file.makedata("fixed",'int32',[5,3])
+        self.assertRaises(ValueError,self._file.appender,"fixed")
+        self.assertRaises(ValueError,self._file.appender,"data",rows=0)
+        # The data is closed again after the error
+        self.assertEqual(self._file.path,"/entry")
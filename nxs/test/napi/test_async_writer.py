@@ -0,0 +1,42 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_async_writer(unittest.TestCase):
+    filename = "test_async_writer.nxs"
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_write(self):
+        frame = numpy.zeros((2,3),'int32')
+        with napi.AsyncWriter(napi.open(self.filename,"w5"),maxsize=2) as w:
+            w.submit('makegroup','entry','NXentry')
+            w.submit('opengroup','entry')
+            w.makedata('frames','int32',[5,2,3])
+            w.submit('opendata','frames')
+            w.putattr('units','counts')
+            for i in range(5):
+                frame[:] = i    # the writer keeps its own copy
+                w.putslab(frame,[i,0,0],[1,2,3])
+            w.drain()
+            path = w.submit('_getpath').result()
+            self.assertEqual(path,'/entry/frames')
+        file = napi.open(self.filename,"r")
+        file.openpath("/entry/frames")
+        data = file.getdata()
+        self.assertEqual([int(data[i,0,0]) for i in range(5)],[0,1,2,3,4])
+        self.assertEqual(file.getattrs()['units'],'counts')
+        file.close()
+
+    def test_error(self):
+        w = napi.AsyncWriter(napi.open(self.filename,"w5"))
+        bad = w.submit('opengroup','missing','NXentry')
+        skipped = w.submit('makegroup','entry','NXentry')
+        self.assertRaises(ValueError,w.drain)
+        self.assertTrue(bad.exception() is not None)
+        self.assertTrue(skipped.exception() is not None)
+        self.assertRaises(ValueError,w.submit,"flush")
+        self.assertRaises(ValueError,w.close)
+        self.assertFalse(w.file.isopen)
@@ -0,0 +1,51 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_output_buffers(unittest.TestCase):
+    filename = "test_output_buffers.nxs"
+
+    def setUp(self):
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._data = numpy.arange(60,dtype='float32').reshape((5,3,4))
+        self._file.makedata("data",'float32',self._data.shape)
+        self._file.opendata("data")
+        self._file.putdata(self._data)
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_getdata_out(self):
+        out = numpy.empty(self._data.shape,'float32')
+        result = self._file.getdata(out=out)
+        self.assertTrue(result is out)
+        self.assertListEqual(out.flatten().tolist(),
+                             self._data.flatten().tolist())
+
+    def test_getslab_out(self):
+        out = numpy.empty((1,3,4),'float32')
+        for i in range(5):
+            result = self._file.getslab([i,0,0],[1,3,4],out=out)
+            self.assertTrue(result is out)
+            self.assertListEqual(out.flatten().tolist(),
+                                 self._data[i].flatten().tolist())
+
+    def test_getslab_pool(self):
+        pool = napi.BufferPool()
+        first = self._file.getslab([0,0,0],[1,3,4],out=pool)
+        second = self._file.getslab([1,0,0],[1,3,4],out=pool)
+        self.assertTrue(first is second)
+        self.assertListEqual(second.flatten().tolist(),
+                             self._data[1].flatten().tolist())
+
+    def test_bad_out(self):
+        self.assertRaises(ValueError,self._file.getslab,[0,0,0],[1,3,4],
+                          numpy.empty((1,3,4),'float64'))
+        self.assertRaises(ValueError,self._file.getslab,[0,0,0],[1,3,4],
+                          numpy.empty((1,3,5),'float32'))
+        self.assertRaises(ValueError,self._file.getslab,[0,0,0],[1,3,4],
+                          numpy.empty((4,3),'float32').T)
@@ -0,0 +1,72 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_chunks(unittest.TestCase):
+    filename = "test_chunks.nxs"
+
+    def setUp(self):
+        self.data = numpy.arange(10*6*8,dtype='float64').reshape((10,6,8))
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.compmakedata("data",'float64',self.data.shape,'lzw',
+                                [2,3,8])
+        self._file.makedata("plain",'float64',(3,))
+        self._file.opendata("data")
+        self._file.putdata(self.data)
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_getchunks(self):
+        self.assertEqual(self._file.getchunks(),[2,3,8])
+        self.assertEqual(self._file.getattrs()['chunk_shape'],'2,3,8')
+        self._file.closedata()
+        self._file.opendata("plain")
+        self.assertTrue(self._file.getchunks() is None)
+
+    def test_cached_slabs(self):
+        for offset,shape in [([0,0,0],[1,1,1]),([1,2,3],[4,3,2]),
+                             ([9,5,7],[1,1,1]),([0,0,0],[10,6,8])]:
+            index = tuple(slice(o,o+n) for o,n in zip(offset,shape))
+            result = self._file.getslab(offset,shape)
+            self.assertEqual(numpy.asarray(result).reshape(shape).tolist(),
+                             self.data[index].tolist())
+        self.assertTrue(self._file._chunkcache.nbytes > 0)
+
+    def test_known_chunks(self):
+        # A new handle only reads through the cache once the chunks are
+        # known, and still knows them after the file is reopened
+        self._file.close()
+        self._file = napi.open(self.filename,"r")
+        self._file.openpath("/entry/data")
+        self._file.getslab([0,0,0],[1,1,1])
+        self.assertEqual(self._file._chunkcache.nbytes,0)
+        self._file.openpath("/entry")
+        list(self._file.scandir())
+        self._file.close()
+        self._file.open()
+        self._file.openpath("/entry/data")
+        result = self._file.getslab([1,2,3],[1,1,1])
+        self.assertEqual(result.tolist(),[[[self.data[1,2,3]]]])
+        self.assertTrue(self._file._chunkcache.nbytes > 0)
+
+    def test_write_invalidates(self):
+        self._file.getslab([0,0,0],[2,2,2])
+        self._file.putslab(numpy.zeros((1,1,8)),[0,0,0],[1,1,8])
+        result = self._file.getslab([0,0,0],[1,1,2])
+        self.assertEqual(result.tolist(),[[[0.,0.]]])
+
+    def test_no_cache(self):
+        self._file.setchunkcache(0)
+        result = self._file.getslab([1,1,1],[2,2,2])
+        self.assertEqual(result.tolist(),self.data[1:3,1:3,1:3].tolist())
+        self.assertEqual(self._file._chunkcache.nbytes,0)
+
+    def test_iterslabs_aligned(self):
+        # Budget of 3 rows is rounded down to the chunk size of 2
+        slabs = list(self._file.iterslabs(budget=3*6*8*8))
+        self.assertEqual([offset[0] for offset,_ in slabs],[0,2,4,6,8])
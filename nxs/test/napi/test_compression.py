@@ -0,0 +1,46 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_compression(unittest.TestCase):
+    filename = "test_compression.nxs"
+
+    def test_choose(self):
+        sparse = numpy.zeros((100,1000),'int32')
+        sparse[::7,::13] = 1
+        self.assertEqual(napi.choosecompression(sparse),'lzw')
+        modes = ('none','lzw','rle','huffman')
+        self.assertTrue(napi.choosecompression(sparse,'size',modes)
+                        in modes)
+        # Modes without a codec to time are only chosen by size
+        for objective in ('read','write'):
+            self.assertTrue(napi.choosecompression(sparse,objective,modes)
+                            in ('none','lzw'))
+            self.assertTrue(napi.choosecompression(sparse,objective,
+                                                   ('rle','huffman'))
+                            in ('rle','huffman'))
+        self.assertEqual(napi.choosecompression(sparse,modes=('none',)),
+                         'none')
+        self.assertEqual(napi.choosecompression(numpy.zeros(0)),'none')
+
+    def test_bad_arguments(self):
+        data = numpy.zeros(10)
+        self.assertRaises(ValueError,napi.choosecompression,data,'fast')
+        self.assertRaises(ValueError,napi.choosecompression,data,'size',
+                          ('zip',))
+
+    def test_auto(self):
+        data = numpy.zeros((20,1000),'float64')
+        file = napi.open(self.filename,"w5")
+        try:
+            file.makegroup("entry","NXentry")
+            file.opengroup("entry")
+            file.compmakedata("data",'float64',data.shape,'auto',
+                              sample=data)
+            file.opendata("data")
+            self.assertEqual(file.getattrs()['compression'],'lzw')
+            file.putdata(data)
+        finally:
+            file.close()
+            os.remove(self.filename)
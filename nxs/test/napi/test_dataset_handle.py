@@ -0,0 +1,43 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_dataset_handle(unittest.TestCase):
+    filename = "test_dataset_handle.nxs"
+
+    def setUp(self):
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.makedata("data",'float64',(3,4,5))
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_write_read(self):
+        data = numpy.arange(60,dtype='float64').reshape((3,4,5))
+        h = self._file.opendataset("data",slab=[1,1,5])
+        self.assertEqual(h.dtype,'float64')
+        self.assertListEqual(list(h.shape),[3,4,5])
+        for i in range(3):
+            for j in range(4):
+                h.write([i,j,0],data[i,j].copy())
+        vector = h.empty()
+        for i in range(3):
+            for j in range(4):
+                result = h.read([i,j,0],vector)
+                self.assertTrue(result is vector)
+                self.assertListEqual(vector.flatten().tolist(),
+                                     data[i,j].tolist())
+        h.setslab([3,4,5])
+        self.assertListEqual(h.read([0,0,0]).tolist(),data.tolist())
+        h.close()
+        self.assertEqual(self._file.path,"/entry")
+
+    def test_bad_slab(self):
+        with self._file.opendataset("data") as h:
+            self.assertRaises(ValueError,h.setslab,[1,5])
+            self.assertRaises(ValueError,h.read,[0,0,0],
+                              numpy.empty((3,4,5),'float32'))
@@ -0,0 +1,43 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_gather(unittest.TestCase):
+    filename = "test_gather.nxs"
+
+    def setUp(self):
+        self.expected = numpy.arange(50*40*30,dtype='int32').reshape((50,40,30))
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.compmakedata("data",'int32',(50,40,30),'lzw',[1,40,30])
+        self._file.opendata("data")
+        self._file.putdata(self.expected)
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_points(self):
+        rng = numpy.random.RandomState(1)
+        points = numpy.transpose([rng.randint(0,n,500)
+                                  for n in self.expected.shape])
+        values = self._file.getpoints(points)
+        self.assertEqual(values.tolist(),
+                         self.expected[tuple(points.T)].tolist())
+        values = self._file.getpoints([[-1,-1,-1],[0,0,0]])
+        self.assertEqual(values.tolist(),[self.expected[-1,-1,-1],0])
+        self.assertEqual(len(self._file.getpoints(numpy.zeros((0,3),'int'))),0)
+        self.assertRaises(ValueError,self._file.getpoints,[[50,0,0]])
+        self.assertRaises(ValueError,self._file.getpoints,[[1,2]])
+
+    def test_indexed(self):
+        frames = [40,3,3,-1,20,21]
+        data = self._file.getindexed(frames)
+        self.assertEqual(data.tolist(),self.expected[frames].tolist())
+        data = self._file.getindexed([5,1],axis=2,slab_offset=[2,0,0],
+                                     slab_shape=[3,10,0],stride=[2,4,1])
+        self.assertEqual(data.tolist(),
+                         self.expected[2:7:2,0:40:4][:,:,[5,1]].tolist())
+        self.assertRaises(ValueError,self._file.getindexed,[50])
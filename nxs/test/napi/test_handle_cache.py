@@ -0,0 +1,107 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_handle_cache(unittest.TestCase):
+    filenames = ["test_handle_cache_%d.nxs"%i for i in range(3)]
+
+    def setUp(self):
+        for filename in self.filenames:
+            file = napi.open(filename,"w5")
+            file.makegroup("entry","NXentry")
+            file.opengroup("entry")
+            file.makedata("data",'int32',(3,))
+            file.opendata("data")
+            file.putdata(numpy.array([1,2,3],'int32'))
+            file.close()
+        napi.sethandlecache(2)
+
+    def tearDown(self):
+        napi.sethandlecache(0)
+        for filename in self.filenames:
+            os.remove(filename)
+
+    def test_reuse(self):
+        file = napi.open(self.filenames[0])
+        file.openpath("/entry/data")
+        file.close()
+        self.assertFalse(file.isopen)
+        self.assertEqual(len(napi._handlecache),1)
+        file.open()
+        self.assertTrue(file.isopen)
+        self.assertEqual(len(napi._handlecache),0)
+        self.assertEqual(file.path,"/")
+        file.openpath("/entry/data")
+        self.assertEqual(file.getdata().tolist(),[1,2,3])
+        file.close()
+
+    def test_limit(self):
+        for filename in self.filenames:
+            napi.open(filename).close()
+        self.assertEqual(len(napi._handlecache),2)
+        napi.sethandlecache(1)
+        self.assertEqual(len(napi._handlecache),1)
+        napi.sethandlecache(0)
+        self.assertEqual(len(napi._handlecache),0)
+        self.assertRaises(ValueError,napi.sethandlecache,-1)
+
+    def test_timeout(self):
+        napi.sethandlecache(2,timeout=0)
+        napi.open(self.filenames[0]).close()
+        napi._handlecache.expire()
+        self.assertEqual(len(napi._handlecache),0)
+
+    def test_write(self):
+        file = napi.open(self.filenames[1],"rw")
+        file.openpath("/entry/data")
+        file.putdata(numpy.array([4,5,6],'int32'))
+        file.close()
+        self.assertEqual(len(napi._handlecache),0)
+        file = napi.open(self.filenames[1],"r")
+        file.openpath("/entry/data")
+        self.assertEqual(file.getdata().tolist(),[4,5,6])
+        file.close()
+        self.assertEqual(len(napi._handlecache),1)
+
+    def test_rewrite(self):
+        # Writable handles are closed, and parked read-only handles for
+        # the file are closed before it is created again
+        filename = self.filenames[2]
+        napi.open(filename,"r").close()
+        self.assertEqual(len(napi._handlecache),1)
+        for value in (7,8):
+            file = napi.open(filename,"w5")
+            self.assertEqual(len(napi._handlecache),0)
+            file.makegroup("entry","NXentry")
+            file.opengroup("entry")
+            file.makedata("data",'int32',(1,))
+            file.opendata("data")
+            file.putdata(numpy.array([value],'int32'))
+            file.close()
+            self.assertEqual(len(napi._handlecache),0)
+        file = napi.open(filename,"r")
+        file.openpath("/entry/data")
+        self.assertEqual(file.getdata(),8)
+        file.close()
+
+    def test_replaced(self):
+        # A handle parked before the file was replaced on disk is not
+        # reused, since it still refers to the old file
+        filename = self.filenames[0]
+        napi.open(filename,"r").close()
+        self.assertEqual(len(napi._handlecache),1)
+        replacement = filename + ".new"
+        file = napi.open(replacement,"w5")
+        file.makegroup("entry","NXentry")
+        file.opengroup("entry")
+        file.makedata("data",'int32',(3,))
+        file.opendata("data")
+        file.putdata(numpy.array([7,8,9],'int32'))
+        file.close()
+        os.rename(replacement,filename)
+        file = napi.open(filename,"r")
+        self.assertEqual(len(napi._handlecache),0)
+        file.openpath("/entry/data")
+        self.assertEqual(file.getdata().tolist(),[7,8,9])
+        file.close()
@@ -0,0 +1,40 @@
+import unittest
+import os
+import sys
+import subprocess
+
+# Script run in a fresh interpreter, printing the import time and whether
+# the library was loaded by the import
+SCRIPT = """
+import time
+start = time.time()
+import nxs.napi
+elapsed = time.time() - start
+print(elapsed)
+print(nxs.napi.nxlib.loaded)
+try:
+    nxs.napi.open('missing.nxs')
+except OSError:
+    print('OSError')
+"""
+
+class test_import(unittest.TestCase):
+    # Generous bound on a cold import; loading libNeXus and HDF5 is what
+    # it guards against
+    budget = 2.0
+
+    def run_script(self, env):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        env = dict(os.environ, PYTHONPATH=root, **env)
+        output = subprocess.check_output([sys.executable,'-c',SCRIPT],
+                                         env=env)
+        return output.decode('ascii').split()
+
+    def test_deferred_load(self):
+        elapsed,loaded,error = self.run_script(
+            dict(NEXUSLIB='/nonexistent/libNeXus.so'))
+        self.assertEqual(loaded,'False')
+        self.assertEqual(error,'OSError')
+        self.assertTrue(float(elapsed) < self.budget,
+                        "import took %s s"%elapsed)
@@ -0,0 +1,70 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+import nxs.tree as tree
+
+class test_index(unittest.TestCase):
+    filename = "test_index.nxs"
+    index = "test_index.nxs.nxindex"
+
+    def setUp(self):
+        file = napi.open(self.filename,"w5")
+        file.makegroup("entry","NXentry")
+        file.opengroup("entry")
+        file.putattr("title","run 1")
+        file.makegroup("data","NXdata")
+        file.opengroup("data")
+        file.makedata("counts",'int32',(3,4))
+        file.opendata("counts")
+        file.putdata(numpy.arange(12,dtype='int32').reshape((3,4)))
+        file.putattr("signal",numpy.int32(1))
+        file.closedata()
+        file.makedata("big",'float64',(2000,))
+        file.opendata("big")
+        file.putdata(numpy.arange(2000,dtype='float64'))
+        file.closedata()
+        file.close()
+
+    def tearDown(self):
+        for name in (self.filename,self.index):
+            if os.path.exists(name):
+                os.remove(name)
+
+    def check(self, root):
+        self.assertEqual(root.entry.nxclass,'NXentry')
+        self.assertEqual(root.entry.attrs['title'].nxdata,'run 1')
+        counts = root.entry.data.counts
+        self.assertEqual(counts.shape,(3,4))
+        self.assertEqual(counts.nxdata.tolist(),
+                         numpy.arange(12).reshape((3,4)).tolist())
+        self.assertEqual(counts.attrs['signal'].nxdata,1)
+        self.assertEqual(root.entry.data.big.shape,(2000,))
+
+    def test_index(self):
+        root = tree.load(self.filename,index=True)
+        self.assertTrue(os.path.exists(self.index))
+        self.check(root)
+        # The second load comes from the index without opening the file
+        root = tree.load(self.filename,index=True)
+        self.assertFalse(root.nxfile.isopen)
+        self.check(root)
+        # Large values are still read from the file on demand
+        self.assertEqual(root.entry.data.big.nxdata[1999],1999.)
+
+    def test_stale(self):
+        tree.load(self.filename,index=True)
+        file = napi.open(self.filename,"rw")
+        file.openpath("/entry")
+        file.putattr("title","run 2")
+        file.close()
+        # The rewrite is usually within the same second and keeps the
+        # inode, so the finer times in the key must show the change
+        root = tree.load(self.filename,index=True)
+        self.assertEqual(root.entry.attrs['title'].nxdata,'run 2')
+
+    def test_corrupt(self):
+        with open(self.index,'wb') as fid:
+            fid.write(b'garbage')
+        self.check(tree.load(self.filename,index=True))
+        self.check(tree.load(self.filename,index=True))
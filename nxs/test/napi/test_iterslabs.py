@@ -0,0 +1,44 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_iterslabs(unittest.TestCase):
+    filename = "test_iterslabs.nxs"
+
+    def setUp(self):
+        self.data = numpy.arange(7*3*4,dtype='float64').reshape((7,3,4))
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.makedata("data",'float64',self.data.shape)
+        self._file.opendata("data")
+        self._file.putdata(self.data)
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_rows(self):
+        for prefetch in (True,False):
+            slabs = list(self._file.iterslabs(rows=3,prefetch=prefetch))
+            self.assertEqual([offset for offset,_ in slabs],
+                             [[0,0,0],[3,0,0],[6,0,0]])
+            result = numpy.concatenate([data for _,data in slabs])
+            self.assertEqual(result.tolist(),self.data.tolist())
+
+    def test_budget(self):
+        # Each index along axis 2 takes 7*3*8 bytes
+        slabs = list(self._file.iterslabs(axis=2,budget=2*7*3*8))
+        self.assertEqual([data.shape for _,data in slabs],[(7,3,2),(7,3,2)])
+        result = numpy.concatenate([data for _,data in slabs],axis=2)
+        self.assertEqual(result.tolist(),self.data.tolist())
+
+    def test_early_exit(self):
+        for offset,data in self._file.iterslabs(rows=1):
+            break
+        self.assertEqual(data.tolist(),self.data[:1].tolist())
+        self.assertEqual(self._file.path,"/entry/data")
+
+    def test_bad_axis(self):
+        self.assertRaises(ValueError,list,self._file.iterslabs(axis=3))
@@ -0,0 +1,67 @@
+import unittest
+import os
+import numpy
+from collections import OrderedDict
+import nxs.napi as napi
+
+class test_maketree(unittest.TestCase):
+    filename = "test_maketree.nxs"
+
+    def setUp(self):
+        self._file = napi.open(self.filename,"w5")
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_maketree(self):
+        counts = numpy.arange(12,dtype='int32').reshape(3,4)
+        spec = {'entry':{'nxclass':'NXentry','attrs':{'version':'1.0'},
+                         'entries':OrderedDict([
+            ('data',{'nxclass':'NXdata','entries':{
+                'counts':{'link':'/entry/instrument/detector/counts'}}}),
+            ('title','run 1'),
+            ('temperature',{'value':300.5,'attrs':{'units':'K'}}),
+            ('instrument',{'nxclass':'NXinstrument','entries':{
+                'detector':{'nxclass':'NXdetector','entries':{
+                    'counts':{'value':counts,'compression':'lzw',
+                              'chunks':[1,4],
+                              'attrs':{'signal':(1,'int32')}}}}}}),
+            ])}}
+        with napi.profile() as profiler:
+            calls = self._file.maketree(spec)
+        functions = profiler.snapshot()['functions']
+        self.assertEqual(calls,sum(f['calls'] for f in functions.values()))
+        self.assertFalse('nxiopenpath_' in functions)
+        self.assertFalse('nxigetrawinfo64_' in functions)
+        # No more than making, opening and closing each node once, writing
+        # each attribute and value, getting the target id and making the
+        # link, and reopening the two groups to reach the link
+        self.assertTrue(calls <= 3*7 + 4 + 3 + 2 + 4)
+        self.assertEqual(self._file.path,"/")
+        self._file.openpath("/entry/title")
+        self.assertEqual(self._file.getdata(),"run 1")
+        self._file.openpath("/entry/temperature")
+        self.assertEqual(self._file.getdata(),300.5)
+        self.assertEqual(self._file.getattrs()['units'],'K')
+        self._file.openpath("/entry/data/counts")
+        self.assertEqual(self._file.getdata().tolist(),counts.tolist())
+        self.assertEqual(self._file.getattrs()['signal'],1)
+        self.assertEqual(self._file.getchunks(),[1,4])
+        self._file.openpath("/entry")
+        self.assertEqual(self._file.getattrs()['version'],'1.0')
+
+    def test_missing_target(self):
+        spec = {'entry':{'nxclass':'NXentry','entries':{
+            'counts':{'link':'/entry/missing'}}}}
+        self.assertRaises(napi.NeXusError,self._file.maketree,spec)
+        self.assertEqual(list(self._file.scandir()),[])
+
+    def test_makedata_value(self):
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.makedata("x",value=[1.,2.,3.],attrs={'units':'mm'})
+        self._file.opendata("x")
+        self.assertEqual(self._file.getinfo(),([3],'float64'))
+        self.assertEqual(self._file.getdata().tolist(),[1.,2.,3.])
+        self.assertEqual(self._file.getattrs()['units'],'mm')
@@ -0,0 +1,48 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+class test_mapdata(unittest.TestCase):
+    filename = "test_mapdata.nxs"
+
+    def setUp(self):
+        self.expected = numpy.arange(20000,dtype='int32').reshape((200,100))
+        file = napi.open(self.filename,"w5")
+        file.makegroup("entry","NXentry")
+        file.opengroup("entry")
+        file.makedata("raw",'int32',(200,100))
+        file.opendata("raw")
+        file.putdata(self.expected)
+        file.closedata()
+        file.compmakedata("packed",'int32',(200,100),'lzw',[20,100])
+        file.opendata("packed")
+        file.putdata(self.expected)
+        file.closedata()
+        file.close()
+        self._file = napi.open(self.filename,"r")
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    @unittest.skipUnless(h5py, "h5py is needed to map data")
+    def test_contiguous(self):
+        self._file.openpath("/entry/raw")
+        data = self._file.mapdata()
+        self.assertTrue(isinstance(data,numpy.memmap))
+        self.assertFalse(data.flags.writeable)
+        self.assertEqual(data.shape,(200,100))
+        self.assertEqual(data[150,17],self.expected[150,17])
+        self.assertTrue((data == self.expected).all())
+
+    def test_fallback(self):
+        self._file.openpath("/entry/packed")
+        data = self._file.mapdata()
+        self.assertFalse(isinstance(data,numpy.memmap))
+        self.assertTrue((data == self.expected).all())
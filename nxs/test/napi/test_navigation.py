@@ -0,0 +1,52 @@
+import unittest
+import os
+import nxs.napi as napi
+
+class test_navigation(unittest.TestCase):
+    filename = "test_navigation.nxs"
+
+    def setUp(self):
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.makegroup("data","NXdata")
+        self._file.makegroup("sample","NXsample")
+        self._file.opengroup("data")
+        self._file.makedata("counts",'int32',(3,))
+        self._file.closegroup()
+        self._file.closegroup()
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_parse(self):
+        path = napi.NeXusPath('/entry:NXentry/./data/../sample/')
+        self.assertTrue(path.absolute)
+        self.assertEqual(path.levels,(('entry','NXentry'),('sample',None)))
+        path = napi.NeXusPath('../data')
+        self.assertFalse(path.absolute)
+        self.assertEqual(path.resolve([('entry','NXentry'),
+                                       ('sample','NXsample')]),
+                         [('entry','NXentry'),('data',None)])
+        self.assertRaises(ValueError,napi.NeXusPath,'/..')
+
+    def test_openpath(self):
+        self._file.openpath("/entry/data/counts")
+        self.assertEqual(self._file.path,"/entry/data/counts")
+        self._file.openpath("../../sample")
+        self.assertEqual(self._file.path,"/entry/sample")
+        path = napi.NeXusPath("/entry/data/counts")
+        self._file.openpath(path)
+        self.assertEqual(self._file.path,"/entry/data/counts")
+        self._file.openpath("/")
+        self.assertEqual(self._file.path,"/")
+        self.assertRaises(napi.NeXusError,self._file.openpath,"/entry/missing")
+
+    def test_new_entries(self):
+        self._file.openpath("/entry")
+        self.assertEqual(self._file.getentries(),
+                         {'data':'NXdata','sample':'NXsample'})
+        self._file.makegroup("monitor","NXmonitor")
+        self._file.openpath("/entry/monitor")
+        self.assertEqual(self._file.path,"/entry/monitor")
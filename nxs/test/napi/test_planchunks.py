@@ -0,0 +1,43 @@
+import unittest
+import os
+import nxs.napi as napi
+
+class test_planchunks(unittest.TestCase):
+    filename = "test_planchunks.nxs"
+
+    def test_patterns(self):
+        shape = (631,461,4,825)
+        self.assertEqual(napi.planchunks(shape,'float64'),[1,1,1,825])
+        self.assertEqual(napi.planchunks((10,512,512),'uint16','frames'),
+                         [1,512,512])
+        chunks = napi.planchunks(shape,'float64','columns')
+        self.assertEqual(chunks[0],631)
+        for pattern in napi.ACCESS_PATTERNS:
+            chunks = napi.planchunks(shape,'float64',pattern,nbytes=65536)
+            self.assertEqual(len(chunks),4)
+            for c,n in zip(chunks,shape):
+                self.assertTrue(1 <= c <= n)
+            if pattern != 'rows':
+                size = 8
+                for c in chunks: size *= c
+                self.assertTrue(size <= 65536)
+
+    def test_unlimited(self):
+        chunks = napi.planchunks((napi.UNLIMITED,100),'float32','append',
+                                 nbytes=4000)
+        self.assertEqual(chunks,[10,100])
+
+    def test_bad_pattern(self):
+        self.assertRaises(ValueError,napi.planchunks,(10,),'int8','bogus')
+
+    def test_compmakedata(self):
+        file = napi.open(self.filename,"w5")
+        try:
+            file.makegroup("entry","NXentry")
+            file.opengroup("entry")
+            file.compmakedata("data",'uint16',(10,512,512),'lzw','frames')
+            file.opendata("data")
+            self.assertEqual(file.getchunks(),[1,512,512])
+        finally:
+            file.close()
+            os.remove(self.filename)
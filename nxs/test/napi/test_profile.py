@@ -0,0 +1,66 @@
+import unittest
+import os
+import ctypes
+import numpy
+import nxs.napi as napi
+
+class test_profile(unittest.TestCase):
+    filename = "test_profile.nxs"
+
+    def setUp(self):
+        file = napi.open(self.filename,"w5")
+        file.makegroup("entry","NXentry")
+        file.opengroup("entry")
+        file.makedata("data",'float64',(4,5))
+        file.opendata("data")
+        file.putdata(numpy.zeros((4,5)))
+        file.close()
+
+    def tearDown(self):
+        napi.stopprofile()
+        os.remove(self.filename)
+
+    def test_counts(self):
+        with napi.profile() as profiler:
+            file = napi.open(self.filename,"rw")
+            file.openpath("/entry/data")
+            file.getdata()
+            file.getslab([1,0],[2,5])
+            file.putslab(numpy.ones((1,5)),[0,0],[1,5])
+            file.close()
+        self.assertFalse(isinstance(napi.nxlib,napi._ProfiledLibrary))
+        stats = profiler.snapshot()
+        functions = stats['functions']
+        self.assertEqual(functions['nxigetdata_']['calls'],1)
+        self.assertEqual(functions['nxigetdata_']['read'],160)
+        self.assertEqual(functions['nxiputslab64_']['written'],40)
+        for key in ('p50','p90','p99','max'):
+            self.assertTrue(functions['nxigetdata_'][key] >= 0)
+        data = stats['paths']['/entry/data']
+        self.assertEqual(data['read'],160+80)
+        self.assertEqual(data['written'],40)
+
+    def test_reset(self):
+        profiler = napi.startprofile()
+        file = napi.open(self.filename)
+        file.close()
+        self.assertTrue(napi.stopprofile() is profiler)
+        self.assertTrue(profiler.snapshot()['functions'])
+        profiler.reset()
+        self.assertEqual(profiler.snapshot(),dict(functions={},paths={}))
+        # Calls after stopping are not recorded
+        file = napi.open(self.filename)
+        file.close()
+        self.assertEqual(profiler.snapshot()['functions'],{})
+        self.assertTrue(napi.stopprofile() is None)
+
+    def test_unloaded(self):
+        # Profiling a library which is not loaded yet times the library
+        # function itself rather than the placeholder
+        lib = napi._LazyLibrary(napi._init)
+        lib.nxiflush_.restype = ctypes.c_int
+        profiled = napi._ProfiledLibrary(lib, napi.Profiler())
+        profiled.nxiflush_
+        self.assertTrue(lib.loaded)
+        self.assertFalse(isinstance(lib.nxiflush_, napi._LazyFunction))
+        self.assertEqual(lib.nxiflush_.restype, ctypes.c_int)
@@ -0,0 +1,52 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_readpaths(unittest.TestCase):
+    filename = "test_readpaths.nxs"
+
+    def setUp(self):
+        file = napi.open(self.filename,"w5")
+        file.makegroup("entry","NXentry")
+        file.opengroup("entry")
+        for name,value in (("run_number",1234),("duration",60)):
+            file.makedata(name,'int32',(1,))
+            file.opendata(name)
+            file.putdata(numpy.array([value],'int32'))
+            file.closedata()
+        file.makegroup("sample","NXsample")
+        file.opengroup("sample")
+        file.makedata("temperature",'float64',(3,))
+        file.opendata("temperature")
+        file.putdata(numpy.array([4.,5.,6.]))
+        file.closedata()
+        file.close()
+        self._file = napi.open(self.filename,"r")
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_readpaths(self):
+        self._file.openpath("/entry/sample")
+        paths = ["/entry/sample/temperature","/entry/run_number",
+                 "/entry/duration","temperature"]
+        values = self._file.readpaths(paths)
+        self.assertEqual(sorted(values.keys()),sorted(paths))
+        self.assertEqual(values["/entry/run_number"],1234)
+        self.assertEqual(values["/entry/duration"],60)
+        self.assertEqual(values["temperature"].tolist(),[4.,5.,6.])
+        self.assertEqual(self._file.path,"/entry/sample")
+
+    def test_missing(self):
+        paths = ["/entry/run_number","/entry/missing"]
+        self.assertRaises(napi.NeXusError,self._file.readpaths,paths)
+        values = self._file.readpaths(paths,skipmissing=True)
+        self.assertEqual(list(values.keys()),["/entry/run_number"])
+
+    def test_closed(self):
+        self._file.close()
+        values = self._file.readpaths(["/entry/duration"])
+        self.assertEqual(values["/entry/duration"],60)
+        self.assertFalse(self._file.isopen)
@@ -0,0 +1,55 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_scandir(unittest.TestCase):
+    filename = "test_scandir.nxs"
+
+    def setUp(self):
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.makegroup("data","NXdata")
+        self._file.makedata("counts",'int32',(3,))
+        self._file.opendata("counts")
+        self._file.putdata(numpy.array([1,2,3],'int32'))
+        self._file.putattr("units","counts")
+        ID = self._file.getdataID()
+        self._file.closedata()
+        self._file.makedata("big",'float64',(10,10))
+        self._file.opengroup("data")
+        self._file.makelink(ID)
+        self._file.closegroup()
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_scandir(self):
+        entries = dict((entry.name,entry) for entry in
+                       self._file.scandir(values=10))
+        self.assertEqual(sorted(entries.keys()),['big','counts','data'])
+        counts = entries['counts']
+        self.assertEqual(counts.nxclass,'SDS')
+        self.assertEqual(list(counts.shape),[3])
+        self.assertEqual(counts.dtype,'int32')
+        self.assertEqual(counts.attrs['units'],'counts')
+        self.assertTrue(counts.target is None)
+        self.assertEqual(counts.value.tolist(),[1,2,3])
+        self.assertTrue(entries['big'].value is None)
+        self.assertEqual(entries['data'].nxclass,'NXdata')
+        self.assertTrue(entries['data'].shape is None)
+        self.assertEqual(self._file.path,"/entry")
+
+    def test_link_target(self):
+        self._file.opengroup("data")
+        entries = list(self._file.scandir())
+        self.assertEqual(len(entries),1)
+        self.assertEqual(entries[0].target,"/entry/counts")
+        self.assertTrue(entries[0].value is None)
+
+    def test_no_attrs(self):
+        for entry in self._file.scandir(attrs=False):
+            self.assertTrue(entry.attrs is None)
+            self.assertTrue(entry.target is None)
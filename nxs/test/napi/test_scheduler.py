@@ -0,0 +1,70 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_scheduler(unittest.TestCase):
+    filename = "test_scheduler.nxs"
+
+    def setUp(self):
+        self.expected = numpy.arange(20*30*40,dtype='int32').reshape((20,30,40))
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.makedata("data",'int32',(20,30,40))
+        self._file.opendata("data")
+        self._file.putdata(self.expected)
+        self._file.closedata()
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_coalesce(self):
+        with napi.SlabScheduler(self._file,window=0.05) as scheduler:
+            futures = [scheduler.submit("/entry/data",[i,0,0],[1,30,40])
+                       for i in range(10)]
+            part = scheduler.submit("/entry/data",[2,5,5],[3,2,2])
+            for i,future in enumerate(futures):
+                self.assertEqual(future.result().tolist(),
+                                 self.expected[i:i+1].tolist())
+            self.assertEqual(part.result().tolist(),
+                             self.expected[2:5,5:7,5:7].tolist())
+            self.assertFalse(part.result().flags.writeable)
+            stats = scheduler.stats()
+        self.assertEqual(stats['requests'],11)
+        self.assertTrue(stats['reads'] < stats['requests'])
+        self.assertEqual(stats['ratio'],
+                         float(stats['requests'])/stats['reads'])
+        # The reads leave the file where it was
+        self.assertEqual(self._file.path,"/entry")
+
+    def test_errors(self):
+        scheduler = napi.SlabScheduler(self._file)
+        bad = scheduler.submit("/entry/missing",[0],[1])
+        good = scheduler.submit("/entry/data",[0,0,0],[1,1,2])
+        self.assertRaises(Exception,bad.result)
+        self.assertEqual(good.result().tolist(),[[[0,1]]])
+        scheduler.close()
+        self.assertRaises(ValueError,scheduler.submit,"/entry/data",
+                          [0,0,0],[1,1,1])
+        self.assertTrue(self._file.isopen)
+
+    def test_invalid(self):
+        with napi.SlabScheduler(self._file) as scheduler:
+            self.assertRaises(ValueError,scheduler.submit,"/entry/data",
+                              [0,0,0],[1,-1,1])
+            self.assertRaises(ValueError,scheduler.submit,"/entry/data",
+                              [-1,0,0],[1,1,1])
+            self.assertRaises(ValueError,scheduler.submit,"/entry/data",
+                              [0,0],[1,1,1])
+            outside = scheduler.submit("/entry/data",[19,0,0],[2,1,1])
+            rank = scheduler.submit("/entry/data",[0,0],[1,1])
+            good = scheduler.submit("/entry/data",[19,0,0],[1,1,2])
+            self.assertRaises(ValueError,outside.result)
+            self.assertRaises(ValueError,rank.result)
+            # The thread carries on after the bad requests
+            self.assertEqual(good.result().tolist(),
+                             self.expected[19:,:1,:2].tolist())
+            later = scheduler.submit("/entry/data",[0,0,0],[1,1,1])
+            self.assertEqual(later.result().tolist(),[[[0]]])
@@ -0,0 +1,55 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_stride(unittest.TestCase):
+    filename = "test_stride.nxs"
+
+    def setUp(self):
+        self.expected = numpy.arange(40*30*20,dtype='int32').reshape((40,30,20))
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.makedata("data",'int32',(40,30,20))
+        self._file.opendata("data")
+        self._file.putdata(self.expected)
+        self._file.closedata()
+        self._file.compmakedata("packed",'int32',(40,30,20),'lzw',[1,30,20])
+        self._file.opendata("packed")
+        self._file.putdata(self.expected)
+        self._file.closedata()
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def check(self, path):
+        self._file.openpath(path)
+        data = self._file.getslab([1,0,3],[8,15,4],stride=[5,2,4])
+        self.assertEqual(data.tolist(),
+                         self.expected[1:40:5,0:30:2,3:20:4].tolist())
+        out = numpy.empty((8,15,4),'int32')
+        self._file.getslab([1,0,3],[8,15,4],out,stride=[5,2,4])
+        self.assertEqual(out.tolist(),data.tolist())
+        dense = self._file.getslab([2,3,4],[3,2,1],stride=[1,1,1])
+        self.assertEqual(dense.tolist(),self.expected[2:5,3:5,4:5].tolist())
+
+    def test_contiguous(self):
+        self.check("/entry/data")
+
+    def test_chunked(self):
+        self.check("/entry/packed")
+
+    def test_budget(self):
+        budget = napi.SLABBUDGET
+        napi.SLABBUDGET = 100
+        try:
+            self.check("/entry/data")
+        finally:
+            napi.SLABBUDGET = budget
+
+    def test_invalid(self):
+        self._file.openpath("/entry/data")
+        self.assertRaises(ValueError,self._file.getslab,[0,0,0],[2,2,2],
+                          None,[1,0,1])
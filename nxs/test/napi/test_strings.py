@@ -0,0 +1,46 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_strings(unittest.TestCase):
+    filename = "test_strings.nxs"
+
+    def setUp(self):
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_roundtrip(self):
+        labels = [u'sample',u'empty can',u'caf\xe9',u'sample']
+        self._file.makestrings("labels",labels)
+        self._file.opendata("labels")
+        data = self._file.getstrings()
+        self.assertEqual(data.dtype.kind,'S')
+        self.assertEqual(data.tolist()[1],b'empty can')
+        data = self._file.getstrings(encoding='utf-8')
+        self.assertEqual(data.tolist(),labels)
+        categories,codes = self._file.getstrings(encoding='utf-8',
+                                                 categorical=True)
+        self.assertEqual(codes.dtype,numpy.uint8)
+        self.assertEqual(categories[codes].tolist(),labels)
+
+    def test_padding(self):
+        self._file.makedata("names",'char',(3,8))
+        self._file.opendata("names")
+        self._file.putstrings([b'ab  ',b'c',b'defghijklm'])
+        self.assertEqual(self._file.getstrings().tolist(),
+                         [b'ab',b'c',b'defghijk'])
+        raw = self._file.getstrings(strip=False)
+        self.assertEqual(raw.dtype.itemsize,8)
+        self.assertRaises(ValueError,self._file.putstrings,[b'a'])
+
+    def test_categorical_write(self):
+        self._file.makestrings("kind",[u'a',u'b'],codes=[1,0,0,1])
+        self._file.opendata("kind")
+        self.assertEqual(self._file.getstrings(encoding='ascii').tolist(),
+                         [u'b',u'a',u'a',u'b'])
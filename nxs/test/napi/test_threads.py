@@ -0,0 +1,66 @@
+import unittest
+import os
+import threading
+import numpy
+import nxs.napi as napi
+
+class test_threads(unittest.TestCase):
+    filenames = ["test_threads_%d.nxs"%i for i in range(3)]
+
+    def setUp(self):
+        self._mode = napi.setlockmode('library')
+        for i,filename in enumerate(self.filenames):
+            file = napi.open(filename,"w5")
+            file.makegroup("entry","NXentry")
+            file.opengroup("entry")
+            file.makedata("data",'int32',(4,5))
+            file.opendata("data")
+            file.putdata(numpy.arange(20,dtype='int32').reshape((4,5))+i)
+            file.close()
+
+    def tearDown(self):
+        napi.setlockmode(self._mode)
+        for filename in self.filenames:
+            os.remove(filename)
+
+    def test_lockmode(self):
+        self.assertRaises(ValueError,napi.setlockmode,'bogus')
+        a = napi.open(self.filenames[0])
+        b = napi.open(self.filenames[1])
+        self.assertTrue(a.lock is b.lock)
+        napi.setlockmode('handle')
+        c = napi.open(self.filenames[2])
+        self.assertFalse(c.lock is a.lock)
+        for f in (a,b,c): f.close()
+
+    def test_readslabs(self):
+        requests = []
+        for i,filename in enumerate(self.filenames):
+            requests.append((filename,"/entry/data",[1,0],[1,5]))
+            requests.append((filename,"/entry/data",None,None))
+        results = napi.readslabs(requests,maxworkers=2)
+        for i in range(len(self.filenames)):
+            expected = numpy.arange(20).reshape((4,5))+i
+            self.assertEqual(results[2*i].tolist(),expected[1:2].tolist())
+            self.assertEqual(results[2*i+1].tolist(),expected.tolist())
+        self.assertEqual(napi.readslabs([]),[])
+        self.assertRaises(ValueError,napi.readslabs,requests,maxworkers=0)
+
+    def test_shared_handle(self):
+        file = napi.open(self.filenames[0])
+        errors = []
+        def worker():
+            try:
+                for _ in range(20):
+                    with file.lock:
+                        file.openpath("/entry/data")
+                        data = file.getslab([2,0],[1,5])
+                    if data.tolist() != [[10,11,12,13,14]]:
+                        errors.append(data)
+            except Exception as exc:
+                errors.append(exc)
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        file.close()
+        self.assertEqual(errors,[])
@@ -0,0 +1,60 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class Recorder(napi.NeXusVisitor):
+    def __init__(self):
+        self.events = []
+    def entergroup(self, path, entry):
+        self.events.append(('enter',path,entry.nxclass))
+    def leavegroup(self, path, entry):
+        self.events.append(('leave',path))
+    def visitdata(self, path, entry):
+        self.events.append(('data',path,entry.target))
+
+class test_walk(unittest.TestCase):
+    filename = "test_walk.nxs"
+
+    def setUp(self):
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.makegroup("data","NXdata")
+        self._file.makedata("counts",'int32',(3,))
+        self._file.opendata("counts")
+        self._file.putdata(numpy.array([1,2,3],'int32'))
+        self._file.putattr("units","counts")
+        ID = self._file.getdataID()
+        self._file.closedata()
+        self._file.opengroup("data")
+        self._file.makelink(ID)
+        self._file.closegroup()
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def test_walk(self):
+        visitor = Recorder()
+        self._file.walk(visitor)
+        events = visitor.events
+        self.assertEqual(events[0],('enter','/entry','NXentry'))
+        self.assertEqual(events[-1],('leave','/entry'))
+        self.assertTrue(('data','/entry/counts',None) in events)
+        self.assertTrue(('data','/entry/data/counts','/entry/counts')
+                        in events)
+        enter = events.index(('enter','/entry/data','NXdata'))
+        leave = events.index(('leave','/entry/data'))
+        self.assertTrue(enter < events.index(('data','/entry/data/counts',
+                                              '/entry/counts')) < leave)
+        self.assertEqual(len(events),6)
+        self.assertEqual(self._file.path,"/entry")
+
+    def test_show(self):
+        lines = []
+        self._file.walk(napi.ShowVisitor(write=lines.append),values=8)
+        self.assertTrue("counts int32 3" in lines)
+        self.assertTrue("  @units: counts" in lines)
+        self.assertTrue("data NXdata" in lines)
+        self.assertTrue("    -> /entry/counts" in lines)
@@ -0,0 +1,47 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+
+class test_write_path(unittest.TestCase):
+    filename = "test_write_path.nxs"
+
+    def setUp(self):
+        self._file = napi.open(self.filename,"w5")
+        self._file.makegroup("entry","NXentry")
+        self._file.opengroup("entry")
+        self._file.makedata("data",'int32',(6,8))
+        self._file.opendata("data")
+        self._data = numpy.arange(48,dtype='int32').reshape((6,8))
+
+    def tearDown(self):
+        self._file.close()
+        os.remove(self.filename)
+
+    def _check(self, expected):
+        self.assertListEqual(self._file.getdata().tolist(),
+                             numpy.asarray(expected).tolist())
+
+    def test_buffer_objects(self):
+        self._file.putdata(memoryview(self._data))
+        self._check(self._data)
+        self._file.putdata(bytearray((self._data+1).tobytes()))
+        self._check(self._data+1)
+
+    def test_strided(self):
+        wide = numpy.arange(96,dtype='int32').reshape((6,16))
+        self._file.putdata(wide[:,::2])
+        self._check(wide[:,::2])
+        self._file.putslab(wide[:3,1::2],[3,0],[3,8])
+        self._check(numpy.vstack((wide[:3,::2],wide[:3,1::2])))
+
+    def test_cast(self):
+        data = self._data.astype('float64')
+        self.assertRaises(ValueError,self._file.putdata,data)
+        saved = napi.BLOCKSIZE
+        napi.BLOCKSIZE = 64
+        try:
+            self._file.putdata(data,cast=True)
+        finally:
+            napi.BLOCKSIZE = saved
+        self._check(self._data)
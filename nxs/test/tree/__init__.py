@@ -0,0 +1,9 @@
+"""
+Tests of the nxs.tree interface on files written with nxs.napi.
+"""
+from .test_demo import *
+from .test_gather import *
+from .test_getitem import *
+from .test_iter_slabs import *
+from .test_read_many import *
+from .test_save import *
@@ -0,0 +1,39 @@
+import unittest
+import os
+import sys
+import numpy
+import six
+import nxs.napi as napi
+import nxs.tree
+tree = sys.modules['nxs.tree']
+
+class test_demo(unittest.TestCase):
+    filename = "test_demo.nxs"
+    copyname = "test_demo_copy.nxs"
+
+    def setUp(self):
+        file = napi.open(self.filename,"w5")
+        file.makegroup("entry","NXentry")
+        file.opengroup("entry")
+        file.makedata("counts",value=numpy.arange(5,dtype='int32'))
+        file.close()
+
+    def tearDown(self):
+        for filename in (self.filename,self.copyname):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def test_ls(self):
+        stdout = sys.stdout
+        sys.stdout = six.StringIO()
+        try:
+            tree.demo(['nxs','ls',self.filename])
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        self.assertTrue('counts' in output)
+
+    def test_copy(self):
+        tree.demo(['nxs','copy',self.filename,self.copyname])
+        root = tree.load(self.copyname)
+        self.assertEqual(root.entry.counts.nxdata.tolist(),[0,1,2,3,4])
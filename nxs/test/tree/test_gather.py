@@ -0,0 +1,58 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+import nxs.tree as tree
+
+class test_gather(unittest.TestCase):
+    filename = "test_gather.nxs"
+
+    def setUp(self):
+        # Large enough that load leaves the data in the file
+        self.data = numpy.arange(40*6*20,dtype='float64').reshape((40,6,20))
+        file = napi.open(self.filename,"w5")
+        file.makegroup("entry","NXentry")
+        file.opengroup("entry")
+        file.makedata("counts",value=self.data)
+        file.close()
+        self.root = tree.load(self.filename)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def check(self, index):
+        field = self.root.entry.counts
+        result = field[index].nxdata
+        expected = self.data[index]
+        self.assertEqual(numpy.shape(result),expected.shape)
+        self.assertEqual(numpy.asarray(result).tolist(),expected.tolist())
+        # Only the selection is read
+        self.assertTrue(field._value is None)
+
+    def test_list(self):
+        self.check([5,1,5,30])
+        self.check(numpy.array([-1,0,2]))
+        self.check(numpy.s_[::2,[4,0]])
+
+    def test_mask(self):
+        self.check(self.data % 7 == 0)
+        self.check(numpy.s_[:,numpy.arange(6) > 3])
+
+    def test_points(self):
+        self.check(numpy.s_[[0,39,7],[5,0,2],[19,3,3]])
+
+    def test_moved_axis(self):
+        # numpy puts the indexed axis first when an integer separates it
+        # from the array, or comes between them
+        self.check(numpy.s_[:,[1,3],2])
+        self.check(numpy.s_[[0,2],:,1])
+        self.check(numpy.s_[7,:,[4,1,9]])
+        # and leaves it in place when they are next to each other
+        self.check(numpy.s_[7,[4,1],:])
+
+    def test_out_of_range(self):
+        # The gather read fails, so the whole field is read and numpy
+        # raises the error
+        field = self.root.entry.counts
+        self.assertRaises(IndexError,field.__getitem__,[0,40])
+        self.assertFalse(field._value is None)
@@ -0,0 +1,47 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+import nxs.tree as tree
+
+class test_getitem(unittest.TestCase):
+    filename = "test_getitem.nxs"
+
+    def setUp(self):
+        # Large enough that load leaves the data in the file
+        self.data = numpy.arange(40*6*20,dtype='float64').reshape((40,6,20))
+        file = napi.open(self.filename,"w5")
+        file.makegroup("entry","NXentry")
+        file.opengroup("entry")
+        file.makedata("counts",value=self.data)
+        file.close()
+        self.root = tree.load(self.filename)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def check(self, index):
+        field = self.root.entry.counts
+        self.assertTrue(field._value is None)
+        result = field[index].nxdata
+        expected = self.data[index]
+        self.assertEqual(numpy.shape(result),expected.shape)
+        self.assertEqual(numpy.asarray(result).tolist(),expected.tolist())
+
+    def test_steps(self):
+        self.check(numpy.s_[::10,:,::4])
+        self.check(numpy.s_[1:35:7,2:5,3::5])
+
+    def test_negative_steps(self):
+        self.check(numpy.s_[::-3])
+        self.check(numpy.s_[5:1:-2,::-1])
+        self.check(numpy.s_[::-10,:,::-4])
+
+    def test_integers(self):
+        # Integer indexes drop their dimension, as they do in numpy
+        self.check(3)
+        self.check(-1)
+        self.check(numpy.s_[3,::2])
+        self.check(numpy.s_[3,4,5])
+        self.check(numpy.s_[...,7])
+        self.assertRaises(IndexError,self.root.entry.counts.__getitem__,40)
@@ -0,0 +1,38 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+import nxs.tree as tree
+
+class test_iter_slabs(unittest.TestCase):
+    filename = "test_iter_slabs.nxs"
+
+    def setUp(self):
+        # Large enough that load leaves the data in the file
+        self.data = numpy.arange(40*50,dtype='float64').reshape((40,50))
+        file = napi.open(self.filename,"w5")
+        file.makegroup("entry","NXentry")
+        file.opengroup("entry")
+        file.makedata("counts",value=self.data)
+        file.close()
+        self.root = tree.load(self.filename)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_rows(self):
+        field = self.root.entry.counts
+        for prefetch in (True,False):
+            slabs = list(field.iter_slabs(rows=16,prefetch=prefetch))
+            self.assertEqual([offset for offset,_ in slabs],
+                             [[0,0],[16,0],[32,0]])
+            result = numpy.concatenate([data for _,data in slabs])
+            self.assertEqual(result.tolist(),self.data.tolist())
+        self.assertFalse(self.root.nxfile.isopen)
+
+    def test_axis(self):
+        slabs = list(self.root.entry.counts.iter_slabs(axis=1,rows=25))
+        self.assertEqual([data.shape for _,data in slabs],
+                         [(40,25),(40,25)])
+        result = numpy.concatenate([data for _,data in slabs],axis=1)
+        self.assertEqual(result.tolist(),self.data.tolist())
@@ -0,0 +1,59 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+import nxs.tree as tree
+
+class test_read_many(unittest.TestCase):
+    filename = "test_read_many.nxs"
+
+    def setUp(self):
+        self.counts = numpy.arange(40*50,dtype='float64').reshape((40,50))
+        self.angles = numpy.linspace(0,90,1200)
+        file = napi.open(self.filename,"w5")
+        file.makegroup("entry","NXentry")
+        file.opengroup("entry")
+        file.makedata("title",value="run 42")
+        file.makedata("run_number",value=numpy.array([42],'int32'))
+        file.makegroup("data","NXdata")
+        file.opengroup("data")
+        file.makedata("counts",value=self.counts)
+        file.makedata("angles",value=self.angles)
+        file.close()
+        # The index means the tree is built without reading any data
+        self.root = tree.load(self.filename,index=True)
+
+    def tearDown(self):
+        os.remove(self.filename)
+        os.remove(self.filename+'.nxindex')
+
+    def check(self, values):
+        self.assertEqual(sorted(values.keys()),
+                         ['/entry/data/angles','/entry/data/counts',
+                          '/entry/run_number','/entry/title'])
+        self.assertEqual(values['/entry/title'],"run 42")
+        self.assertEqual(numpy.asarray(values['/entry/run_number']).tolist(),
+                         [42])
+        self.assertEqual(values['/entry/data/counts'].tolist(),
+                         self.counts.tolist())
+        self.assertEqual(values['/entry/data/angles'].tolist(),
+                         self.angles.tolist())
+
+    def test_tree(self):
+        paths = ['/entry/data/counts','/entry/title',
+                 '/entry/data/angles','/entry/run_number']
+        self.check(tree.read_many(self.root,paths))
+        self.assertFalse(self.root.nxfile.isopen)
+        self.assertTrue(self.root.entry.data.counts._value is None)
+
+    def test_filename(self):
+        paths = ['/entry/run_number','/entry/data/angles',
+                 '/entry/title','/entry/data/counts']
+        self.check(tree.read_many(self.filename,paths))
+
+    def test_skipmissing(self):
+        paths = ['/entry/title','/entry/missing','/entry/data/counts',
+                 '/entry/data/angles','/entry/run_number']
+        self.check(tree.read_many(self.root,paths,skipmissing=True))
+        self.assertRaises((napi.NeXusError,ValueError),tree.read_many,
+                          self.root,paths)
@@ -0,0 +1,78 @@
+import unittest
+import os
+import numpy
+import nxs.napi as napi
+import nxs.tree as tree
+
+class test_save(unittest.TestCase):
+    filenames = ["test_save_%d.nxs"%i for i in range(2)]
+
+    def setUp(self):
+        # Large enough to be written compressed
+        self.counts = numpy.arange(200*100,dtype='int32').reshape((200,100))
+        root = tree.NXroot(tree.NXentry(name='entry'))
+        entry = root.entry
+        entry.title = 'run 1'
+        entry.attrs['version'] = '1.0'
+        entry.instrument = tree.NXinstrument(tree.NXdetector(name='detector'))
+        detector = entry.instrument.detector
+        detector.counts = tree.NXfield(self.counts,attrs={'units':'counts'})
+        detector.x_pixel = tree.NXfield(numpy.arange(100.),
+                                        attrs={'units':'mm'})
+        entry.data = tree.NXdata()
+        entry.data.makelink(detector.counts)
+        root.save(self.filenames[0])
+        root.nxfile.close()
+
+    def tearDown(self):
+        for filename in self.filenames:
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def check(self, filename):
+        root = tree.load(filename)
+        entry = root.entry
+        self.assertEqual(entry.title.nxdata,'run 1')
+        self.assertEqual(entry.attrs['version'].nxdata,'1.0')
+        detector = entry.instrument.detector
+        self.assertEqual(detector.counts.attrs['units'].nxdata,'counts')
+        self.assertEqual(detector.counts.nxdata.tolist(),self.counts.tolist())
+        self.assertEqual(detector.x_pixel.nxdata.tolist(),list(range(100)))
+        self.assertTrue(isinstance(entry.data.counts,tree.NXlinkfield))
+        self.assertEqual(entry.data.counts._target,
+                         '/entry/instrument/detector/counts')
+        file = napi.open(filename)
+        file.openpath('/entry/instrument/detector/counts')
+        chunks = file.getchunks()
+        file.openpath('/entry/data/counts')
+        self.assertEqual(file.getdata().tolist(),self.counts.tolist())
+        file.close()
+        self.assertTrue(chunks is not None)
+        return root,chunks
+
+    def test_roundtrip(self):
+        self.check(self.filenames[0])
+
+    def test_resave(self):
+        # Saving a loaded tree again records the chunks it is written with
+        root,chunks = self.check(self.filenames[0])
+        counts = root.entry.instrument.detector.counts
+        counts.attrs['chunk_shape'] = '1,1'
+        root.save(self.filenames[1])
+        root.nxfile.close()
+        self.assertEqual(self.check(self.filenames[1])[1],chunks)
+
+    def test_compression(self):
+        # Large fields are compressed with the mode chosen for their data,
+        # which is recorded and reused when the tree is saved again
+        root = tree.load(self.filenames[0])
+        detector = root.entry.instrument.detector
+        mode = detector.counts.attrs['compression'].nxdata
+        self.assertTrue(mode in ('none','lzw','rle','huffman'))
+        # Small fields are not compressed
+        self.assertFalse('compression' in detector.x_pixel.attrs)
+        root.save(self.filenames[1])
+        root.nxfile.close()
+        root = tree.load(self.filenames[1])
+        self.assertEqual(root.entry.instrument.detector.counts
+                         .attrs['compression'].nxdata,mode)
@@ -206,6 +206,18 @@ functions __enter__ and __exit__::
     ... do the slab functions ...
     data.slab.__exit__()
 
+For tight loops over many small slabs, a `nxs.napi.DatasetHandle` on the
+open dataset avoids looking up the dataset type and rebuilding the offset
+and shape arguments on every call::
+
+    with root.NXentry[0].data.data as path:
+        Ni,Nj,Nk = root.NXentry[0].data.data.shape
+        slab = napi.DatasetHandle(path, [1,1,Nk])
+        vector = slab.empty()
+        for i in range(Ni):
+            for j in range(Nj):
+                slab.read([i,j,0], vector)
+
 Plotting NeXus data
 -------------------
 There is a plot() method for groups that automatically looks for 'signal' and
@@ -236,19 +248,22 @@ where signal is the field containing the data, axes are the fields listing the
 signal sample points, entry is file/path within the file to the data group and
 title is the title of the group or the parent NXentry, if available.
 """
-from __future__ import with_statement
+from __future__ import with_statement, print_function
 from copy import copy, deepcopy
+import os, marshal, zlib
 
 import numpy as np
-import napi
-from napi import NeXusError
+import six
+from . import napi
+from .napi import NeXusError
 
 #Memory in MB
 NX_MEMORY = 500
 
 __all__ = ['NeXusTree', 'NXobject', 'NXfield', 'NXgroup', 'NXattr',
            'NX_MEMORY', 'setmemory', 'load', 'save', 'tree', 'centers',
-           'NXlink', 'NXlinkfield', 'NXlinkgroup', 'SDS', 'NXlinkdata']
+           'NXlink', 'NXlinkfield', 'NXlinkgroup', 'SDS', 'NXlinkdata',
+           'read_many']
 
 #List of defined base classes (later added to __all__)
 _nxclasses = ['NXroot', 'NXentry', 'NXsubentry', 'NXdata', 'NXmonitor',
@@ -264,6 +279,199 @@ _nxclasses = ['NXroot', 'NXentry', 'NXsubentry', 'NXdata', 'NXmonitor',
 
 np.set_printoptions(threshold=5)
 
+def _planchunks(shape, dtype, access=None):
+    """
+    Return the chunks for writing a field compressed, or None if the field
+    is small enough to write uncompressed.
+
+    Fields of more than 10000 elements are compressed, with chunks planned
+    by napi.planchunks for the access pattern (default 'rows').
+    """
+    #If the array size is too large, their product needs a long integer
+    if np.prod(shape) > 10000:
+        return napi.planchunks(shape, dtype, access or 'rows')
+    else:
+        return None
+
+def _compression(field):
+    """
+    Return the compression for writing a large field, reusing the mode
+    recorded in its compression attribute by compmakedata(mode='auto'),
+    or 'auto' to choose one from the data and record it.
+    """
+    if 'compression' in field.attrs:
+        mode = field.attrs['compression'].nxdata
+        if mode in ('none','lzw','rle','huffman'):
+            return mode
+    return 'auto'
+
+def _treespec(group):
+    """
+    Return the napi.NeXus.maketree spec for writing the group into the
+    current group of a file, or for an NXroot, its entries into the root.
+    """
+    if group.nxclass == 'NXroot':
+        return _entriesspec(group, "")
+    spec = _nodespec(group, group.nxpath or "/" + group.nxname)
+    return {group.nxname: spec} if spec is not None else {}
+
+def _entriesspec(group, path):
+    """
+    Return the maketree spec for the entries of the group at path.
+    """
+    spec = {}
+    for name,child in group.entries.items():
+        childspec = _nodespec(child, path + "/" + name)
+        if childspec is not None:
+            spec[name] = childspec
+    return spec
+
+def _nodespec(node, path):
+    """
+    Return the maketree spec for the field, group or link at path, or
+    None for a link to itself.
+    """
+    if hasattr(node, '_target'):
+        if node._target == path:
+            return None
+        return dict(link=node._target)
+    elif node.nxclass == 'NXfield':
+        return _fieldspec(node)
+    else:
+        return dict(nxclass=node.nxclass, attrs=_attrspec(node.attrs),
+                    entries=_entriesspec(node, path))
+
+def _fieldspec(field):
+    """
+    Return the maketree spec for the field, compressing large fields.
+    """
+    shape = field.shape
+    if shape == (): shape = (1,)
+    spec = dict(value=field.nxdata, dtype=field.dtype, shape=shape,
+                attrs=_attrspec(field.attrs))
+    chunks = _planchunks(shape, field.dtype, field.nxaccess)
+    if chunks is not None:
+        spec.update(compression=_compression(field), chunks=chunks)
+    return spec
+
+def _attrspec(attrs):
+    """
+    Return the attributes as a maketree dictionary of (value,dtype) pairs,
+    leaving out the chunk_shape recorded for the chunks the field was read
+    with, since compmakedata records the chunks it is written with.
+    """
+    return dict((name,(attr.nxdata,attr.dtype))
+                for name,attr in attrs.items() if name != 'chunk_shape')
+
+# Version of the index file layout written by NeXusTree.readfile
+INDEX_VERSION = 2
+
+def _indexkey(filename):
+    """
+    Return the key identifying the current contents of the file in its
+    index: the absolute path, size, inode, and modification and status
+    change times, in nanoseconds where the platform reports them.
+
+    A change is only seen if it moves one of these, so on file systems
+    with coarse timestamps (one or two seconds on ext3, HFS+ or FAT) a
+    rewrite in place within the same tick that keeps the size can leave
+    a stale index in use.
+    """
+    info = os.stat(filename)
+    return (os.path.abspath(filename), info.st_size, info.st_ino,
+            getattr(info, 'st_mtime_ns', info.st_mtime),
+            getattr(info, 'st_ctime_ns', info.st_ctime))
+
+def _packvalue(value):
+    """
+    Return a value read from the file in a form that marshal can store.
+    """
+    if isinstance(value, np.ndarray) or isinstance(value, np.generic):
+        array = np.array(value, order='C')
+        return ('a', array.dtype.str, array.shape, array.tobytes(),
+                isinstance(value, np.generic))
+    return ('v', value)
+
+def _unpackvalue(packed):
+    if packed[0] == 'a':
+        dtype,shape,data,scalar = packed[1:]
+        array = np.frombuffer(data, dtype).reshape(shape).copy()
+        return array[()] if scalar else array
+    return packed[1]
+
+def _packattrs(attrs):
+    if attrs is None: return None
+    return dict((name,_packvalue(value)) for name,value in attrs.items())
+
+def _unpackattrs(attrs):
+    if attrs is None: return None
+    return dict((name,_unpackvalue(value)) for name,value in attrs.items())
+
+def _packgroup(record):
+    """
+    Convert a group record from NeXusTree._scangroup to marshal types.
+    """
+    name,nxclass,attrs,children = record
+    if children is None:
+        return (name, nxclass, _packattrs(attrs), None)
+    packed = []
+    for child in children:
+        if isinstance(child, napi.NeXusEntry):
+            packed.append(('f', child.name, child.nxclass,
+                           tuple(int(n) for n in child.shape), child.dtype,
+                           _packattrs(child.attrs), child.target,
+                           _packvalue(child.value)))
+        else:
+            packed.append(('g', _packgroup(child)))
+    return (name, nxclass, _packattrs(attrs), packed)
+
+def _unpackgroup(packed):
+    name,nxclass,attrs,children = packed
+    if children is None:
+        return (name, nxclass, _unpackattrs(attrs), None)
+    record = []
+    for child in children:
+        if child[0] == 'f':
+            name_,nxclass_,shape,dtype,attrs_,target,value = child[1:]
+            record.append(napi.NeXusEntry(name_, nxclass_, shape, dtype,
+                                          _unpackattrs(attrs_), target,
+                                          _unpackvalue(value)))
+        else:
+            record.append(_unpackgroup(child[1]))
+    return (name, nxclass, _unpackattrs(attrs), record)
+
+def _readindex(index, key):
+    """
+    Return the group record stored in the index file, or None if there is
+    no usable index for the file with the given key.
+    """
+    try:
+        with open(index, 'rb') as fid:
+            version,stored,packed = marshal.loads(zlib.decompress(fid.read()))
+        if version != INDEX_VERSION or tuple(stored) != key:
+            return None
+        return _unpackgroup(packed)
+    except Exception:
+        # Missing, stale or corrupt indices are rebuilt from the file
+        return None
+
+def _writeindex(index, key, record):
+    """
+    Store the group record in the index file.  Failure to write the index,
+    for example in a read-only directory, is ignored.
+    """
+    data = zlib.compress(marshal.dumps((INDEX_VERSION, key,
+                                        _packgroup(record))))
+    partial = index + '.tmp'
+    try:
+        with open(partial, 'wb') as fid:
+            fid.write(data)
+        if os.path.exists(index):
+            os.remove(index)
+        os.rename(partial, index)
+    except (IOError, OSError):
+        pass
+
 class NeXusTree(napi.NeXus):
 
     """
@@ -296,16 +504,30 @@ class NeXusTree(napi.NeXus):
     The NXdata objects in the returned tree hold the object values.
     """
 
-    def readfile(self):
+    def readfile(self, index=None):
         """
         Read the NeXus file structure from the file and return a tree of NXobjects.
 
         Large datasets are not read until they are needed.
-        """
-        self.open()
-        self.openpath("/")
-        root = self._readgroup()
-        self.close()
+
+        If index is given, it is the name of a file caching the structure,
+        attributes and small values of the NeXus file.  When the index
+        matches the path, size and modification time of the file the tree
+        is built from it without opening the file; otherwise the file is
+        read and the index is written.
+        """
+        record = None
+        if index is not None:
+            key = _indexkey(self.filename)
+            record = _readindex(index, key)
+        if record is None:
+            self.open()
+            self.openpath("/")
+            record = self._scangroup()
+            self.close()
+            if index is not None:
+                _writeindex(index, key, record)
+        root = self._buildgroup(record)
         root._group = None
         # Resolve links (not necessary now that link is set as a property)
         #self._readlinks(root, root)
@@ -318,13 +540,15 @@ class NeXusTree(napi.NeXus):
 
         The file is assumed to start empty. Updating individual objects can be
         done using the napi interface, with nx.handle as the nexus file handle.
+
+        The tree is written in one pass by napi.NeXus.maketree, which
+        returns the number of calls made to NeXus.
         """
         self.open()
-        links = []
-        for entry in tree.entries.values():
-            links += self._writegroup(entry, path="")
-        self._writelinks(links)
-        self.close()
+        try:
+            return self.maketree(tree)
+        finally:
+            self.close()
 
     def readpath(self, path):
         """
@@ -340,30 +564,19 @@ class NeXusTree(napi.NeXus):
         except ValueError:
             return None
 
-    def _readdata(self, name):
+    def _readdata(self, entry):
         """
-        Read a data object and return it as an NXfield or NXlink.
+        Return the data entry from scandir as an NXfield or NXlink.
         """
         # Finally some data, but don't read it if it is big
         # Instead record the location, type and size
-        self.opendata(name)
-        attrs={}
-        attrs = self.getattrs()
-        if 'target' in attrs and attrs['target'] != self.path:
+        if entry.target is not None:
             # This is a linked dataset; don't try to load it.
-            data = NXlinkfield(target=attrs['target'], name=name)
+            data = NXlinkfield(target=entry.target, name=entry.name)
         else:
-            dims,type = self.getinfo()
-            #Read in the data if it's not too large
-            if np.prod(dims) < 1000:# i.e., less than 1k dims
-                try:
-                    value = self.getdata()
-                except ValueError:
-                    value = None
-            else:
-                value = None
-            data = NXfield(value=value,name=name,dtype=type,shape=dims,attrs=attrs)
-        self.closedata()
+            # The value is only read by scandir for small datasets
+            data = NXfield(value=entry.value,name=entry.name,dtype=entry.dtype,
+                           shape=entry.shape,attrs=entry.attrs)
         data._infile = data._saved = data._changed = True
         return data
 
@@ -371,32 +584,57 @@ class NeXusTree(napi.NeXus):
     _skipgroups = ['CDF0.0','_HDF_CHK_TBL_','Attr0.0','RIG0.0','RI0.0',
                    'RIATTR0.0N','RIATTR0.0C']
 
-    def _readchildren(self,n):
-        children = {}
-        for _item in range(n):
-            name,nxclass = self.getnextentry()
+    def _scanchildren(self):
+        children = []
+        # Read values of datasets with less than 1k elements
+        for entry in self.scandir(values=1000, groups=False):
+            name,nxclass = entry.name,entry.nxclass
             if nxclass in self._skipgroups:
                 pass # Skip known bogus classes
             elif nxclass == 'SDS': # NXgetnextentry returns 'SDS' as the class for NXfields
-                children[name] = self._readdata(name)
+                children.append(entry)
             else:
                 self.opengroup(name,nxclass)
-                children[name] = self._readgroup()
+                children.append(self._scangroup())
                 self.closegroup()
         return children
 
-    def _readgroup(self):
+    def _scangroup(self):
         """
-        Read the currently open group and return it as an NXgroup.
+        Read the currently open group, returning the record name, nxclass,
+        attrs, children, where children lists the scandir entries of the
+        fields and the records of the subgroups.  Children is None for
+        linked groups.
         """
         n,name,nxclass = self.getgroupinfo()
-        attrs = {}
         attrs = self.getattrs()
         if 'target' in attrs and attrs['target'] != self.path:
+            children = None
+        else:
+            children = self._scanchildren()
+        return name,nxclass,attrs,children
+
+    def _readgroup(self):
+        """
+        Read the currently open group and return it as an NXgroup.
+        """
+        return self._buildgroup(self._scangroup())
+
+    def _buildgroup(self, record):
+        """
+        Return the group record from _scangroup as an NXgroup.
+        """
+        name,nxclass,attrs,records = record
+        if records is None:
             # This is a linked group; don't try to load it.
             group = NXlinkgroup(target=attrs['target'], name=name)
         else:
-            children = self._readchildren(n)
+            children = {}
+            for child in records:
+                if isinstance(child, napi.NeXusEntry):
+                    children[child.name] = self._readdata(child)
+                else:
+                    children[child[0]] = self._buildgroup(child)
             # If we are subclassed with a handler for the particular
             # NXentry class name use that constructor for the group
             # rather than the generic NXgroup class.
@@ -429,108 +667,122 @@ class NeXusTree(napi.NeXus):
 
         If no group or data object is open, the file attributes are returned.
         """
-        for name,pair in attrs.iteritems():
-            self.putattr(name,pair.nxdata,pair.dtype)
+        for name,pair in six.iteritems(attrs):
+            # The chunk_shape in the file is kept up to date by compmakedata
+            if name != 'chunk_shape':
+                self.putattr(name,pair.nxdata,pair.dtype)
 
-    def _writedata(self, data, path):
-        """
-        Write the given data to a file.
 
-        NXlinks cannot be written until the linked group is created, so
-        this routine returns the set of links that need to be written.
-        Call writelinks on the list.
-        """
+def _expandindex(index, shape):
+    """
+    Return the index as a tuple with one entry per dimension, replacing
+    Ellipsis and filling missing dimensions with full slices, or None if
+    there are too many entries.
+    """
+    if not isinstance(index, tuple):
+        index = (index,)
+    if any(ind is Ellipsis for ind in index):
+        k = [ind is Ellipsis for ind in index].index(True)
+        fill = (slice(None),)*(len(shape)-len(index)+1)
+        index = index[:k] + fill + index[k+1:]
+    if len(index) > len(shape):
+        return None
+    return index + (slice(None),)*(len(shape)-len(index))
 
-        path = path + "/" + data.nxname
+def _isint(ind):
+    return isinstance(ind, six.integer_types + (np.integer,))
 
-        # If the data is linked then
-        if hasattr(data,'_target'):
-            return [(path, data._target)]
+def _gatherindex(index, shape):
+    """
+    Convert an index containing integer arrays or boolean masks into a
+    gather read.  Returns one of
 
-        shape = data.shape
-        if shape == (): shape = (1,)
+        ('points', points, resultshape)
+        ('indexed', axis, indices, (offset, count, stride, post), moveto)
 
-        #If the array size is too large, their product needs a long integer
-        if np.prod(shape) > 10000:
-            # Compress the fastest moving dimension of large datasets
-            slab_dims = np.ones(len(shape),'i')
-            if shape[-1] < 100000:
-                slab_dims[-1] = shape[-1]
-            else:
-                slab_dims[-1] = 100000
-            self.compmakedata(data.nxname, data.dtype, shape, 'lzw', slab_dims)
-        else:
-            # Don't use compression for small datasets
-            try:
-                self.makedata(data.nxname, data.dtype, shape)
-            except StandardError as errortype:
-                print("Error in tree, makedata: ", errortype)
+    for reading with getpoints, or with getindexed followed by the post
+    index and moving the indexed axis to position moveto (or not at all
+    if moveto is None), so that the result is what numpy would return.
+    Returns None if the index is not one of these forms.
+    """
+    if isinstance(index, (list, np.ndarray)):
+        mask = np.asarray(index)
+        if mask.dtype == bool and mask.shape == tuple(shape):
+            return ('points', np.transpose(np.nonzero(mask)), (mask.sum(),))
+    index = _expandindex(index, shape)
+    if index is None:
+        return None
+    arrays = []
+    expanded = []
+    for k,ind in enumerate(index):
+        if isinstance(ind, (list, np.ndarray)):
+            ind = np.asarray(ind)
+            if ind.dtype == bool:
+                if ind.shape != (shape[k],):
+                    return None
+                ind = np.nonzero(ind)[0]
+            elif ind.dtype.kind not in 'iu':
+                return None
+            arrays.append(k)
+        elif not (_isint(ind) or isinstance(ind, slice)):
+            return None
+        expanded.append(ind)
+    if not arrays:
+        return None
+    if all(not isinstance(ind, slice) for ind in expanded):
+        # Every dimension is indexed: read the broadcast points
+        coords = np.broadcast_arrays(*[np.asarray(ind) for ind in expanded])
+        points = np.transpose([c.ravel() for c in coords])
+        return ('points', points, coords[0].shape)
+    if len(arrays) > 1 or np.ndim(expanded[arrays[0]]) != 1:
+        return None
+    axis = arrays[0]
+    slab = _slabindex(tuple(slice(None) if k == axis else ind
+                            for k,ind in enumerate(expanded)), shape)
+    # numpy puts the indexed axis first if the integers and the array
+    # are not next to each other
+    advanced = [k for k,ind in enumerate(expanded) if k == axis or _isint(ind)]
+    moveto = None
+    if advanced[-1]-advanced[0] != len(advanced)-1:
+        moveto = 0
+    return ('indexed', axis, expanded[axis], slab, moveto)
+
+def _slabindex(index, shape):
+    """
+    Convert an index of integers, slices and Ellipsis into the offset,
+    count and stride of a strided slab, and the index to apply to the slab
+    to give the result numpy would return.
 
-        self.opendata(data.nxname)
-        self._writeattrs(data.attrs)
-        value = data.nxdata
-        if value is not None:
-            self.putdata(data.nxdata)
-        self.closedata()
-        return []
-
-    def _writegroup(self, group, path):
-        """
-        Write the given group structure, including the data.
-
-        NXlinks cannot be written until the linked group is created, so
-        this routine returns the set of links that need to be written.
-        Call writelinks on the list.
-        """
-        path = path + "/" + group.nxname
-
-        links = []
-        self.makegroup(group.nxname, group.nxclass)
-        self.opengroup(group.nxname, group.nxclass)
-        self._writeattrs(group.attrs)
-        if hasattr(group, '_target'):
-            links += [(path, group._target)]
-        for child in group.entries.values():
-            if child.nxclass == 'NXfield':
-                links += self._writedata(child,path)
-            elif hasattr(child,'_target'):
-                links += [(path+"/"+child.nxname,child._target)]
+    Returns None for indices which cannot be read as a slab, such as
+    lists, arrays and newaxis.
+    """
+    index = _expandindex(index, shape)
+    if index is None:
+        return None
+    offset,count,stride,post = [],[],[],[]
+    for ind,n in zip(index,shape):
+        if isinstance(ind, six.integer_types + (np.integer,)):
+            ind = int(ind)
+            if ind < 0: ind += n
+            if not 0 <= ind < n:
+                raise IndexError("index %d out of range"%ind)
+            offset.append(ind); count.append(1); stride.append(1)
+            post.append(0)
+        elif isinstance(ind, slice):
+            selected = range(*ind.indices(n))
+            step = ind.indices(n)[2]
+            if step > 0:
+                first = selected[0] if selected else 0
+                post.append(slice(None))
             else:
-                links += self._writegroup(child,path)
-        self.closegroup()
-        return links
-
-    def _writelinks(self, links):
-        """
-        Create links within the NeXus file.
-
-        THese are defined by the set of pairs returned by _writegroup.
-        """
-        gid = {}
-
-        # identify targets
-        for path,target in links:
-            gid[target] = None
-
-        # find gids for targets
-        for target in gid.iterkeys():
-            self.openpath(target)
-            # Can't tell from the name if we are linking to a group or
-            # to a dataset, so cheat and rely on getdataID to signal
-            # an error if we are not within a group.
-            try:
-                gid[target] = self.getdataID()
-            except NeXusError:
-                gid[target] = self.getgroupID()
-
-        # link sources to targets
-        for path,target in links:
-            if path != target:
-                # ignore self-links
-                parent = "/".join(path.split("/")[:-1])
-                self.openpath(parent)
-                self.makelink(gid[target])
-
+                # Read forward and reverse afterwards
+                first = selected[-1] if selected else 0
+                post.append(slice(None,None,-1))
+            offset.append(first); count.append(len(selected))
+            stride.append(abs(step))
+        else:
+            return None
+    return offset,count,stride,tuple(post)
 
 def _readaxes(axes):
     """
@@ -539,8 +791,8 @@ def _readaxes(axes):
     The delimiter separating each axis can be white space, a comma, or a colon.
     """
     import re
-    sep=re.compile('[\[]*(\s*,*:*)+[\]]*')
-    return filter(lambda x: len(x)>0, sep.split(axes))
+    sep=re.compile(r'[\[]*(\s*,*:*)+[\]]*')
+    return [x for x in sep.split(axes) if len(x)>0]
 
 
 class AttrDict(dict):
@@ -654,7 +906,7 @@ class NXattr(object):
     nxdata = property(_getdata,doc="The attribute values")
     dtype = property(_getdtype, "Data type of NeXus attribute")
 
-_npattrs = filter(lambda x: not x.startswith('_'), np.ndarray.__dict__.keys())
+_npattrs = [x for x in np.ndarray.__dict__.keys() if not x.startswith('_')]
 
 class NXobject(object):
 
@@ -751,8 +1003,7 @@ class NXobject(object):
         return ""
 
     def _str_attrs(self,indent=0):
-        names = self.attrs.keys()
-        names.sort()
+        names = sorted(self.attrs.keys())
         result = []
         for k in names:
             result.append(" "*indent+"@%s = %s"%(k,self.attrs[k].nxdata))
@@ -768,8 +1019,7 @@ class NXobject(object):
         # Print children
         entries = self.entries
         if entries:
-            names = entries.keys()
-            names.sort()
+            names = sorted(entries.keys())
             if recursive:
                 for k in names:
                     result.append(entries[k]._str_tree(indent=indent+2,
@@ -792,7 +1042,7 @@ class NXobject(object):
         displayed. If 'recursive' is True, the contents of child groups are
         also displayed.
         """
-        print self._str_tree(attrs=attrs,recursive=recursive)
+        print(self._str_tree(attrs=attrs,recursive=recursive))
 
     @property
     def tree(self):
@@ -1054,6 +1304,11 @@ class NXfield(NXobject):
         NeXus data read from a file, this will be a group of class NXroot, but
         if the NeXus tree was defined interactively, it can be any valid
         NXgroup.
+    nxaccess : string or None
+        The expected access pattern of a large field, one of 'rows',
+        'frames', 'columns', 'tiles' or 'append', used to choose the
+        compressed chunks when the field is written to a file. The default,
+        None, is the same as 'rows'. See napi.planchunks.
 
     NeXus Attributes
     ----------------
@@ -1200,15 +1455,27 @@ class NXfield(NXobject):
     >>> y = NXfield(np.sin(phi))
 
     # Read a Ni x Nj x Nk array one vector at a time
-    >>> with root.NXentry[0].data.data as slab:
-            Ni,Nj,Nk = slab.shape
+    >>> data = root.NXentry[0].data.data
+    >>> with data as path:
+            Ni,Nj,Nk = data.shape
             size = [1,1,Nk]
             for i in range(Ni):
                 for j in range(Nj):
-                    value = slab.get([i,j,0],size)
+                    value = path.getslab([i,j,0],size)
+
+    # The same loop with a dataset handle, reusing one output vector
+    >>> with data as path:
+            slab = napi.DatasetHandle(path, [1,1,Nk])
+            vector = slab.empty()
+            for i in range(Ni):
+                for j in range(Nj):
+                    slab.read([i,j,0], vector)
 
     """
 
+    # Access pattern used to plan the chunks of large fields when written
+    _access = None
+
     def __init__(self, value=None, name='field', dtype=None, shape=(), group=None,
                  attrs={}, **attr):
         if isinstance(value, list) or isinstance(value, tuple):
@@ -1289,35 +1556,65 @@ class NXfield(NXobject):
         This is to allow axis arrays to be limited by their actual value. This
         real-space slicing should only be used on monotonically increasing (or
         decreasing) one-dimensional arrays.
+
+        If the data is not loaded, only the selected elements are read from
+        the file, including for slices with steps such as field[::10,:,::4],
+        lists or arrays of indices along one axis such as field[frames],
+        integer arrays for every axis and boolean masks of the whole field.
+        As with numpy, an integer index removes its dimension from the
+        result, so field[3] of a three-dimensional field is two-dimensional
+        whether or not the data is loaded.
         """
         if isinstance(index, slice) and \
            (isinstance(index.start, float) or isinstance(index.stop, float)):
             index = slice(self.index(index.start), self.index(index.stop,max=True)+1)
-        if self._value is not None:
-            result = self.nxdata.__getitem__(index)
-        else:
-            offset = np.zeros(len(self.shape),dtype=int)
-            size = np.array(self.shape)
-            if isinstance(index, int):
-                offset[0] = index
-                size[0] = 1
-            else:
-                if isinstance(index, slice): index = [index]
-                i = 0
-                for ind in index:
-                    if isinstance(ind, int):
-                        offset[i] = ind
-                        size[i] = 1
-                    else:
-                        if ind.start: offset[i] = ind.start
-                        if ind.stop: size[i] = ind.stop - offset[i]
-                    i = i + 1
+        slab = gather = None
+        if self._value is None and str(self.dtype) != 'char':
+            slab = _slabindex(index, self.shape)
+            if slab is None:
+                gather = _gatherindex(index, self.shape)
+        if gather is not None:
+            # Read only the selected points or entries along one axis
             try:
-                result = self.get(offset, size)
+                result = self._getgathered(gather)
             except ValueError:
                 result = self.nxdata.__getitem__(index)
+        elif slab is None:
+            result = self.nxdata.__getitem__(index)
+        else:
+            # Read only the selected elements, with any slice steps
+            offset,count,stride,post = slab
+            if min(count) == 0:
+                result = np.empty(count,self.dtype)[post]
+            else:
+                try:
+                    result = np.asarray(self.get(offset, count,
+                                                 stride=stride))
+                    result = result.reshape(count)[post]
+                except ValueError:
+                    result = self.nxdata.__getitem__(index)
         return NXfield(result, name=self.nxname, attrs=self.attrs)
 
+    def _getgathered(self, gather):
+        """
+        Read the selection returned by _gatherindex from the file.
+        """
+        if not self.nxfile:
+            raise IOError("Data is not attached to a file")
+        with self as path:
+            if gather[0] == 'points':
+                points,shape = gather[1:]
+                return path.getpoints(points).reshape(shape)
+            axis,indices,slab,moveto = gather[1:]
+            offset,count,stride,post = slab
+            result = path.getindexed(indices, axis, offset, count, stride)
+        result = result[post]
+        if moveto is not None:
+            # Position of the indexed axis once the integer axes are gone
+            position = len([p for p in post[:axis] if p != 0])
+            result = np.rollaxis(result, position, moveto)
+        return result
+
     def __setitem__(self, index, value):
         """
         Assign a slice to the NXfield.
@@ -1459,6 +1756,9 @@ class NXfield(NXobject):
             return NXfield(value=other/self.nxdata, name=self.nxname,
                            attrs=self.attrs)
 
+    __truediv__ = __div__
+    __rtruediv__ = __rdiv__
+
     def __pow__(self, power):
         """
         Return the NXfield raised to the specified power.
@@ -1530,15 +1830,11 @@ class NXfield(NXobject):
                 shape = self.shape
                 if shape == (): shape = (1,)
                 with self.nxgroup as path:
-                    if np.prod(shape) > 10000:
-                    # Compress the fastest moving dimension of large datasets
-                        slab_dims = np.ones(len(shape),'i')
-                        if shape[-1] < 100000:
-                            slab_dims[-1] = shape[-1]
-                        else:
-                            slab_dims[-1] = 100000
-                        path.compmakedata(self.nxname, self.dtype, shape, 'lzw', 
-                                          slab_dims)
+                    chunks = _planchunks(shape, self.dtype, self.nxaccess)
+                    if chunks is not None:
+                        path.compmakedata(self.nxname, self.dtype, shape,
+                                          _compression(self), chunks,
+                                          sample=self._value)
                     else:
                     # Don't use compression for small datasets
                         path.makedata(self.nxname, self.dtype, shape)
@@ -1553,22 +1849,69 @@ class NXfield(NXobject):
         else:
             raise IOError("Data is not attached to a file")
 
-    def get(self, offset, size):
+    def get(self, offset, size, out=None, stride=None):
         """
         Return a slab from the data array.
 
         Offsets are 0-origin. Shape can be inferred from the data.
         Offset and shape must each have one entry per dimension.
 
+        If out is a numpy array or a napi.BufferPool the slab is read into
+        it rather than into a newly allocated array.
+
+        If stride is given, every stride'th element is read along each
+        dimension, with size elements in all.  Slicing the field with
+        steps, as in field[::10,:,::4], reads the data this way.
+
         Corresponds to NXgetslab(handle,data,offset,shape)
         """
         if self.nxfile:
             with self as path:
-                value = path.getslab(offset,size)
+                value = path.getslab(offset,size,out,stride)
                 return value
         else:
             raise IOError("Data is not attached to a file")
 
+    def mmap(self):
+        """
+        Return the data as a read-only numpy.memmap of the file, falling
+        back to reading it for compressed or chunked data.
+
+        Only the parts of the array which are used are read, so this is
+        suited to random access into large uncompressed arrays.  See
+        napi.NeXus.mapdata.
+        """
+        if self.nxfile:
+            with self as path:
+                return path.mapdata()
+        else:
+            raise IOError("Data is not attached to a file")
+
+    def iter_slabs(self, axis=0, rows=None, budget=None, prefetch=True):
+        """
+        Iterate over consecutive slabs of the data along an axis.
+
+        Yields (offset, data) pairs covering the whole array, rows
+        indices along axis at a time.  If rows is not given, the slabs
+        are sized to fit within budget bytes.  The next slab is read in
+        the background while the current one is processed unless
+        prefetch is False.  See napi.NeXus.iterslabs.
+
+        The file stays open until the iteration finishes, so this can be
+        used on data larger than NX_MEMORY.
+
+        Example
+        -------
+        >>> for offset,slab in root.entry.data.data.iter_slabs(rows=10):
+        ...     total += slab.sum()
+        """
+        if self.nxfile:
+            with self as path:
+                for item in path.iterslabs(axis,rows,budget,prefetch):
+                    yield item
+        else:
+            raise IOError("Data is not attached to a file")
+
     def put(self, data, offset, refresh=True):
         """
         Put a slab into the data array.
@@ -1583,10 +1926,10 @@ class NXfield(NXobject):
                 raise NeXusError("NeXus file is readonly")
             with self as path:
                 if isinstance(data, NXfield):
-                    path.putslab(data.nxdata.astype(self.dtype), offset, data.shape)
+                    path.putslab(data.nxdata, offset, data.shape, cast=True)
                 else:
-                    data = np.array(data)
-                    path.putslab(data.astype(self.dtype), offset, data.shape)
+                    data = np.asarray(data)
+                    path.putslab(data, offset, data.shape, cast=True)
             if refresh: self.read()
         else:
             raise IOError("Data is not attached to a file")
@@ -1717,11 +2060,21 @@ class NXfield(NXobject):
     def _getsize(self):
         return len(self)
 
+    def _getaccess(self):
+        return self._access
+
+    def _setaccess(self, value):
+        if value is not None and value not in napi.ACCESS_PATTERNS:
+            raise NeXusError("Invalid access pattern: %s" % value)
+        self._access = value
+
     nxdata = property(_getdata,_setdata,doc="The data values")
     nxaxes = property(_getaxes,doc="The plotting axes")
     dtype = property(_getdtype,doc="Data type of NeXus field")
     shape = property(_getshape,doc="Shape of NeXus field")
     size = property(_getsize,doc="Size of NeXus field")
+    nxaccess = property(_getaccess,_setaccess,
+                        doc="Access pattern for chunking the field in the file")
 
 SDS = NXfield # For backward compatibility
 
@@ -1823,7 +2176,7 @@ class PylabPlotter(object):
                 for _dim in data.shape[2:]:
                     slab.append(0)
                 data = data[slab].view().reshape(data.shape[:2])
-                print "Warning: Only the top 2D slice of the data is plotted"
+                print("Warning: Only the top 2D slice of the data is plotted")
 
             x = axis_data[0]
             y = axis_data[1]
@@ -2293,7 +2646,7 @@ class NXgroup(NXobject):
         """
         Returns true if the NeXus object with the specified name is in the group.
         """
-        return self._entries.has_key(name)
+        return name in self._entries
 
     def insert(self, value, name='unknown'):
         """
@@ -2332,20 +2685,18 @@ class NXgroup(NXobject):
                 if nxclass != self.nxclass:
                     raise NeXusError("The NeXus group class does not match the file")
                 self._setattrs(path.getattrs())
-                entries = path.entries()
-            for name,nxclass in entries:
-                path = self.nxpath + '/' + name
+                entries = list(path.scandir())
+            for entry in entries:
+                name,nxclass = entry.name,entry.nxclass
                 if nxclass == 'SDS':
-                    attrs = self.nxfile.getattrs()
-                    if 'target' in attrs and attrs['target'] != path:
-                        self._entries[name] = NXlinkfield(target=attrs['target'])            
+                    if entry.target is not None:
+                        self._entries[name] = NXlinkfield(target=entry.target)
                     else:
                         self._entries[name] = NXfield(name=name)
                 else:
-                    attrs = self.nxfile.getattrs()
-                    if 'target' in attrs and attrs['target'] != path:
+                    if entry.target is not None:
                         self._entries[name] = NXlinkgroup(name=name,
-                                                          target=attrs['target'])
+                                                          target=entry.target)
                     else:
                         self._entries[name] = NXgroup(nxclass=nxclass)
                 self._entries[name]._group = self
@@ -3081,6 +3432,8 @@ class NXdata(NXgroup):
             if self.nxerrors: result.errors = self.errors / other
             return result
 
+    __truediv__ = __div__
+
 
 class NXmonitor(NXdata):
 
@@ -3172,17 +3525,51 @@ def label(field):
         return field.nxname
 
 # File level operations
-def load(filename, mode='r'):
+def load(filename, mode='r', index=False):
     """
     Read a NeXus file returning a tree of objects.
 
+    If index is True, the structure of the file is cached in filename.nxindex
+    so that later loads of the unchanged file do not need to open it until
+    data is requested.  Index can also be the name of the cache file.  See
+    NeXusTree.readfile.
+
     This is aliased to 'read' because of potential name clashes with Numpy
     """
-    file = NeXusTree(filename,mode)
-    tree = file.readfile()
+    if index is True:
+        index = filename + '.nxindex'
+    file = NeXusTree(filename,mode,defer=bool(index))
+    tree = file.readfile(index=index or None)
     file.close()
     return tree
 
+def read_many(root, paths, skipmissing=False):
+    """
+    Read the data at many paths in a NeXus file, returning a dictionary
+    of path: value.
+
+    Root is a tree loaded from the file, or the file name.  The paths are
+    absolute paths in the file and are read in a single session, opening
+    each group once.  Paths which cannot be read raise an error unless
+    skipmissing is True, when they are left out of the result.  See
+    napi.NeXus.readpaths.
+
+    Example
+    -------
+    >>> root = nxs.load('run.nxs')
+    >>> meta = nxs.tree.read_many(root, ['/entry/run_number',
+    ...                                  '/entry/duration'])
+    """
+    if isinstance(root, six.string_types):
+        file = NeXusTree(root, 'r', defer=True)
+        try:
+            return file.readpaths(paths, skipmissing)
+        finally:
+            file.close()
+    if not root.nxfile:
+        raise IOError("Data is not attached to a file")
+    return root.nxfile.readpaths(paths, skipmissing)
+
 #Definition for when there are name clashes with Numpy
 nxload = load
 __all__.append('nxload')
@@ -3203,10 +3590,15 @@ def save(filename, group, format='w5'):
 
 def tree(file):
     """
-    Read and summarize the named NeXus file.
+    Print the structure of the named NeXus file.
+
+    The file is listed as it is read, without building the tree in memory.
     """
-    nxfile = load(file)
-    nxfile.tree
+    nxfile = NeXusTree(file)
+    try:
+        nxfile.show("/")
+    finally:
+        nxfile.close()
 
 def demo(argv):
     """
@@ -3222,16 +3614,16 @@ def demo(argv):
     else:
         op = 'help'
     if op == 'ls':
-        for f in argv[2:]: dir(f)
+        for f in argv[2:]: tree(f)
     elif op == 'copy' and len(argv)==4:
-        tree = load(argv[2])
-        save(argv[3], tree)
+        root = load(argv[2])
+        save(argv[3], root)
     elif op == 'plot' and len(argv)==4:
-        tree = load(argv[2])
+        root = load(argv[2])
         for entry in argv[3].split('.'):
-            tree = getattr(tree,entry)
-        tree.plot()
-        tree._plotter.show()
+            root = getattr(root,entry)
+        root.plot()
+        root._plotter.show()
 
     else:
         usage = """
@@ -3240,7 +3632,7 @@ usage: %s cmd [args]
     ls *.nxs
     plot file.nxs entry.data
         """%(argv[0],)
-        print usage
+        print(usage)
 
 
 if __name__ == "__main__":
@@ -12,7 +12,19 @@
 #
 #        python setup.py install
 #
+import sys
 from setuptools import setup
+from setuptools.command.build_py import build_py
+
+class build_py_compat(build_py):
+    """Leave out the modules which need a newer python than the one
+    installing, so byte-compiling them does not fail"""
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info < (3,6):
+            # nxs.aio uses async/await
+            modules = [m for m in modules if m[:2] != ('nxs','aio')]
+        return modules
  
 setup(name='NeXus', 
       version='4.4.1', 
@@ -21,5 +33,6 @@ setup(name='NeXus',
       url="https://github.com/nexusformat/python-nxs",
       packages = ['nxs'], 
       test_suite="nxs.test",
-      license='LGPLv2'
+      license='LGPLv2',
+      cmdclass={'build_py': build_py_compat},
       ) 